@@ -47,6 +47,7 @@ setup(
 
     install_requires=[
         "openpyxl>=3.0.0",
+        "numpy>=1.17",
         "pandas>=1.0.0",
         "nbformat>=5.0.0",
         "nbclient>=0.5.0",
@@ -55,6 +56,7 @@ setup(
 
     extras_require={
         "xlwings": ["xlwings>=0.24.0"],
+        "parquet": ["pyarrow>=8.0.0"],
         "dev": ["pytest>=6.0", "black>=21.0", "flake8>=3.9"],
         "test": ["pytest>=6.0", "coverage>=5.5"],
         "docs": [
@@ -70,6 +72,7 @@ setup(
         ],
         "all": [
             "xlwings>=0.24.0",
+            "pyarrow>=8.0.0",
             "pytest>=6.0",
             "black>=21.0",
             "flake8>=3.9",
@@ -1,6 +1,452 @@
-class ExecutionResult:
+"""
+Result envelope shared by every grading backend.
+
+`ExecutionResult` is the one schema a graded submission travels in between
+processes (forked children, Docker containers), hosts and caches:
+
+  student_path, name, roll_number, success, errors, results
+  (+ optional namespace, namespace_file, duplicate_of, rejected, skipped,
+  elapsed, stdout)
+
+Each row of `results` is an `AssertionRecord`: a read-mostly mapping with
+exactly the keys in `ROW_FIELDS`. The question / assertion / description
+strings repeat for every student, so a record only holds a reference to
+the shared, interned `AssertionSpec` plus its own status, score and error.
+Records behave like the old row dicts (`r["status"]`, `r.get("error")`,
+`dict(r)`); `to_dict()` makes a real dict where one is required.
+
+Everything is plain str / int / float / bool / None, so encoding never has
+to fall back to pickling student objects:
+
+  * `to_json()` / `from_json()`  compact JSON (one line, no indentation);
+    `dump_jsonl()` / `load_jsonl()` stream many results as JSON lines
+  * `to_bytes()` / `from_bytes()`  `marshal` of plain tuples with a magic
+    header; `dump_binary()` / `load_binary()` write length-prefixed frames.
+    `marshal` is fast but not hardened against crafted input: use it
+    between trusted processes only and JSON for anything a student
+    sandbox wrote.
+
+`to_dict()` returns the legacy result dict reporting and existing callers
+consume (`{"student_path", "execution": {...}, "results": [...]}`).
+"""
+
+import json
+import marshal
+import struct
+import sys
+import weakref
+from collections.abc import Mapping
+from pathlib import Path
+from typing import Any, Dict, IO, Iterable, Iterator, List, Optional, Tuple
+
+ROW_FIELDS = ("question", "assertion", "status", "score", "error", "description")
+
+_MAGIC = b"IGR1"
+_FRAME = struct.Struct("<I")
+_PRIMITIVES = (str, int, float, bool, type(None))
+
+
+def _text(value: Any) -> Optional[str]:
+    return None if value is None else str(value)
+
+
+def _score(value: Any) -> float | int:
+    try:
+        score = float(value or 0)
+    except (TypeError, ValueError):
+        return 0
+    return int(score) if score.is_integer() else score
+
+
+def _plain(value: Any, depth: int = 0) -> Any:
+    """JSON-safe copy of a namespace entry; live objects become type descriptions."""
+    if isinstance(value, _PRIMITIVES):
+        return value
+    if depth < 3 and isinstance(value, dict) and all(isinstance(k, str) for k in value):
+        return {k: _plain(v, depth + 1) for k, v in value.items()}
+    if depth < 3 and isinstance(value, (list, tuple)) and len(value) <= 16:
+        return [_plain(v, depth + 1) for v in value]
+    cls = type(value)
+    return {"type": f"{cls.__module__}.{cls.__qualname__}"}
+
+
+class AssertionSpec:
+    """The per-assertion strings every student's record shares."""
+
+    __slots__ = ("question", "assertion", "description", "__weakref__")
+
+    def __init__(self, question: Optional[str], assertion: Optional[str], description: str):
+        self.question = question
+        self.assertion = assertion
+        self.description = description
+
+    def __repr__(self) -> str:
+        return f"AssertionSpec({self.question!r}, {self.assertion!r})"
+
+
+_SPECS: "weakref.WeakValueDictionary[Tuple, AssertionSpec]" = weakref.WeakValueDictionary()
+
+
+def intern_spec(
+    question: Optional[str], assertion: Optional[str], description: str = ""
+) -> AssertionSpec:
+    """The shared `AssertionSpec` for these strings (created on first use)."""
+    key = (question, assertion, description)
+    spec = _SPECS.get(key)
+    if spec is None:
+        spec = AssertionSpec(question, assertion, description)
+        _SPECS[key] = spec
+    return spec
+
+
+class AssertionRecord(Mapping):
     """
-    Placeholder. Real fields will be populated later.
+    One assertion outcome. Reads like the legacy row dict; `status`,
+    `score`, `error` and `description` can be assigned by key as before.
     """
 
-    pass
+    __slots__ = ("spec", "status", "score", "error")
+
+    def __init__(
+        self,
+        spec: AssertionSpec,
+        status: Optional[str],
+        score: float | int = 0,
+        error: Optional[str] = None,
+    ):
+        self.spec = spec
+        self.status = sys.intern(status) if isinstance(status, str) else status
+        self.score = score
+        # Identical errors (same NameError, same template traceback) share one string
+        self.error = sys.intern(error) if type(error) is str else error
+
+    @classmethod
+    def make(
+        cls,
+        question: Optional[str],
+        assertion: Optional[str],
+        status: Optional[str],
+        score: float | int = 0,
+        error: Optional[str] = None,
+        description: str = "",
+    ) -> "AssertionRecord":
+        return cls(intern_spec(question, assertion, description), status, score, error)
+
+    @property
+    def question(self) -> Optional[str]:
+        return self.spec.question
+
+    @property
+    def assertion(self) -> Optional[str]:
+        return self.spec.assertion
+
+    @property
+    def description(self) -> str:
+        return self.spec.description
+
+    def as_tuple(self) -> tuple:
+        """Field values in `ROW_FIELDS` order."""
+        spec = self.spec
+        return (
+            spec.question,
+            spec.assertion,
+            self.status,
+            self.score,
+            self.error,
+            spec.description,
+        )
+
+    @classmethod
+    def from_tuple(cls, values: Iterable[Any]) -> "AssertionRecord":
+        question, assertion, status, score, error, description = values
+        return cls.make(question, assertion, status, score, error, description)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return dict(zip(ROW_FIELDS, self.as_tuple()))
+
+    # Mapping protocol -------------------------------------------------
+    def __getitem__(self, key: str) -> Any:
+        if key in _SPEC_FIELDS:
+            return getattr(self.spec, key)
+        if key in _OWN_FIELDS:
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(ROW_FIELDS)
+
+    def __len__(self) -> int:
+        return len(ROW_FIELDS)
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        if key in _OWN_FIELDS:
+            if key == "status" and isinstance(value, str):
+                value = sys.intern(value)
+            setattr(self, key, value)
+        elif key in _SPEC_FIELDS:
+            fields = {f: getattr(self.spec, f) for f in _SPEC_FIELDS}
+            fields[key] = value
+            self.spec = intern_spec(**fields)
+        else:
+            raise KeyError(key)
+
+    def __reduce__(self):
+        # Pickle / deepcopy by value so specs are re-interned on the way in
+        return (AssertionRecord.from_tuple, (self.as_tuple(),))
+
+    def __repr__(self) -> str:
+        return f"AssertionRecord({self.to_dict()!r})"
+
+
+_SPEC_FIELDS = ("question", "assertion", "description")
+_OWN_FIELDS = ("status", "score", "error")
+
+
+def normalize_row(row: Mapping) -> AssertionRecord:
+    """A result row restricted to `ROW_FIELDS` with plain types, as a record."""
+    return AssertionRecord.make(
+        _text(row.get("question")),
+        _text(row.get("assertion")),
+        _text(row.get("status")),
+        _score(row.get("score", 0)),
+        _text(row.get("error")),
+        _text(row.get("description")) or "",
+    )
+
+
+def row_dicts(rows: Iterable[Mapping]) -> List[Dict[str, Any]]:
+    """Plain dict copies of result rows, for JSON and other API boundaries."""
+    return [r.to_dict() if isinstance(r, AssertionRecord) else dict(r) for r in rows]
+
+
+class ExecutionResult:
+    """One graded submission in the transport schema."""
+
+    __slots__ = (
+        "student_path",
+        "name",
+        "roll_number",
+        "success",
+        "errors",
+        "results",
+        "namespace",
+        "namespace_file",
+        "duplicate_of",
+        "rejected",
+        "skipped",
+        "elapsed",
+        "stdout",
+    )
+
+    def __init__(
+        self,
+        student_path: str | Path,
+        name: Optional[str] = None,
+        roll_number: Optional[str] = None,
+        success: bool = False,
+        errors: Optional[List[str]] = None,
+        results: Optional[Iterable[Mapping]] = None,
+        namespace: Optional[Dict[str, Any]] = None,
+        namespace_file: Optional[str] = None,
+        duplicate_of: Optional[str] = None,
+        rejected: bool = False,
+        skipped: bool = False,
+        elapsed: Optional[float] = None,
+        stdout: Optional[str] = None,
+    ):
+        self.student_path = str(student_path)
+        self.name = _text(name)
+        self.roll_number = _text(roll_number)
+        self.success = bool(success)
+        self.errors = [str(e) for e in errors or []]
+        self.results = [normalize_row(r) for r in results or []]
+        # May hold a live namespace in-process; encoders make it plain
+        self.namespace = namespace
+        self.namespace_file = _text(namespace_file)
+        self.duplicate_of = _text(duplicate_of)
+        self.rejected = bool(rejected)
+        self.skipped = bool(skipped)
+        self.elapsed = None if elapsed is None else float(elapsed)
+        self.stdout = _text(stdout)
+
+    # ------------------------------------------------------------------
+    # Legacy result dicts
+    # ------------------------------------------------------------------
+    @classmethod
+    def from_dict(cls, result: Dict[str, Any]) -> "ExecutionResult":
+        """Build from a legacy result dict produced by any backend."""
+        execution = result.get("execution", {}) or {}
+        ns = execution.get("namespace")
+        meta = execution.get("student_meta", {}) or {}
+        name = meta.get("name") or (ns or {}).get("name")
+        roll = meta.get("roll_number") or (ns or {}).get("roll_number")
+
+        errors = list(execution.get("errors", []) or [])
+        if result.get("error") and result["error"] not in errors:
+            errors.append(result["error"])
+
+        return cls(
+            student_path=result.get("student_path", ""),
+            # Identity may be any literal (e.g. an int roll number); keep it as text
+            name=_text(name),
+            roll_number=_text(roll),
+            success=execution.get("success", False),
+            errors=errors,
+            results=result.get("results", []) or [],
+            namespace=ns,
+            namespace_file=execution.get("namespace_file"),
+            duplicate_of=result.get("duplicate_of"),
+            rejected=result.get("rejected", False),
+            skipped=result.get("skipped", False),
+            elapsed=execution.get("elapsed"),
+            stdout=execution.get("docker_stdout") or None,
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        The legacy result dict (with `student_path` as a Path) used by
+        reporting. Rows stay `AssertionRecord`s; `row_dicts()` converts them.
+        """
+        execution: Dict[str, Any] = {
+            "success": self.success,
+            "errors": list(self.errors),
+            "student_meta": {
+                "name": self.name or "Unknown",
+                "roll_number": self.roll_number or "Unknown",
+            },
+        }
+        if self.namespace is not None:
+            execution["namespace"] = self.namespace
+        if self.namespace_file:
+            execution["namespace_file"] = self.namespace_file
+        if self.elapsed is not None:
+            execution["elapsed"] = self.elapsed
+        if self.stdout is not None:
+            execution["docker_stdout"] = self.stdout
+
+        out: Dict[str, Any] = {
+            "student_path": Path(self.student_path),
+            "execution": execution,
+            "results": list(self.results),
+        }
+        if self.duplicate_of:
+            out["duplicate_of"] = self.duplicate_of
+        if self.rejected:
+            out["rejected"] = True
+        if self.skipped:
+            out["skipped"] = True
+        return out
+
+    # ------------------------------------------------------------------
+    # JSON / JSON lines
+    # ------------------------------------------------------------------
+    def to_json_obj(self) -> Dict[str, Any]:
+        obj: Dict[str, Any] = {
+            "student_path": self.student_path,
+            "name": self.name,
+            "roll_number": self.roll_number,
+            "success": self.success,
+            "errors": self.errors,
+            "results": row_dicts(self.results),
+        }
+        if self.namespace is not None:
+            obj["namespace"] = _plain(self.namespace)
+        for key in ("namespace_file", "duplicate_of", "elapsed", "stdout"):
+            value = getattr(self, key)
+            if value is not None:
+                obj[key] = value
+        if self.rejected:
+            obj["rejected"] = True
+        if self.skipped:
+            obj["skipped"] = True
+        return obj
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_json_obj(), separators=(",", ":"), ensure_ascii=False)
+
+    @classmethod
+    def from_json_obj(cls, obj: Dict[str, Any]) -> "ExecutionResult":
+        return cls(**{k: obj[k] for k in cls.__slots__ if k in obj})
+
+    @classmethod
+    def from_json(cls, text: str | bytes) -> "ExecutionResult":
+        return cls.from_json_obj(json.loads(text))
+
+    # ------------------------------------------------------------------
+    # Binary (trusted transport)
+    # ------------------------------------------------------------------
+    def to_bytes(self) -> bytes:
+        rows = tuple(r.as_tuple() for r in self.results)
+        ns = None if self.namespace is None else json.dumps(_plain(self.namespace))
+        payload = (
+            self.student_path,
+            self.name,
+            self.roll_number,
+            self.success,
+            tuple(self.errors),
+            rows,
+            ns,
+            self.namespace_file,
+            self.duplicate_of,
+            self.rejected,
+            self.skipped,
+            self.elapsed,
+            self.stdout,
+        )
+        return _MAGIC + marshal.dumps(payload)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "ExecutionResult":
+        if data[:4] != _MAGIC:
+            raise ValueError("Not an encoded ExecutionResult")
+        fields = list(marshal.loads(data[4:]))
+        fields[4] = list(fields[4])
+        fields[5] = [AssertionRecord.from_tuple(row) for row in fields[5]]
+        if fields[6] is not None:
+            fields[6] = json.loads(fields[6])
+        return cls(*fields)
+
+    def __repr__(self) -> str:
+        return (
+            f"ExecutionResult({self.student_path!r}, name={self.name!r}, "
+            f"roll_number={self.roll_number!r}, rows={len(self.results)})"
+        )
+
+
+# ----------------------------------------------------------------------
+# Streams
+# ----------------------------------------------------------------------
+def dump_jsonl(results: Iterable[ExecutionResult], fh: IO[str]) -> int:
+    """Write one compact JSON object per line; returns the number written."""
+    n = 0
+    for result in results:
+        fh.write(result.to_json())
+        fh.write("\n")
+        n += 1
+    return n
+
+
+def load_jsonl(fh: IO[str]) -> Iterator[ExecutionResult]:
+    for line in fh:
+        if line.strip():
+            yield ExecutionResult.from_json(line)
+
+
+def dump_binary(results: Iterable[ExecutionResult], fh: IO[bytes]) -> int:
+    """Write length-prefixed binary frames; returns the number written."""
+    n = 0
+    for result in results:
+        data = result.to_bytes()
+        fh.write(_FRAME.pack(len(data)))
+        fh.write(data)
+        n += 1
+    return n
+
+
+def load_binary(fh: IO[bytes]) -> Iterator[ExecutionResult]:
+    while True:
+        header = fh.read(_FRAME.size)
+        if len(header) < _FRAME.size:
+            return
+        (size,) = _FRAME.unpack(header)
+        yield ExecutionResult.from_bytes(fh.read(size))
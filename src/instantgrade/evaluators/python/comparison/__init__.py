@@ -1,5 +1,7 @@
 """Comparison package (copied from legacy instantgrade)."""
 
 from .comparison_service import ComparisonService
+from .differential import DifferentialTester
+from .memo import ResultMemo
 
-__all__ = ["ComparisonService"]
+__all__ = ["ComparisonService", "DifferentialTester", "ResultMemo"]
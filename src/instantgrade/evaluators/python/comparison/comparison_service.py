@@ -8,7 +8,37 @@ with detailed student-friendly diagnostics:
 import traceback
 import ast
 import difflib
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
+
+from instantgrade.core.models import AssertionRecord, normalize_row
+from instantgrade.evaluators.python.comparison.differential import (
+    DifferentialTester,
+    assertion_label,
+)
+from instantgrade.evaluators.python.execution.namespace import OverlayNamespace
+
+
+def question_rows(
+    question_name: str,
+    question_data: Dict[str, Any],
+    status: str,
+    error: str,
+    placeholder: Optional[str] = None,
+) -> List[Dict[str, Any]]:
+    """
+    One zero-score record per assertion (and differential batch) of a question
+    that was not graded normally. Every row shares the same `error` string.
+    A question without assertions gets a single `placeholder` row, or none
+    when `placeholder` is None.
+    """
+    assertions = list(question_data.get("tests", []) or [])
+    if question_data.get("differential"):
+        assertions.append(assertion_label(question_data["differential"]))
+    description = question_data.get("description", "") or ""
+    return [
+        AssertionRecord.make(question_name, code, status, 0, error, description)
+        for code in assertions or ([placeholder] if placeholder else [])
+    ]
 
 
 class ComparisonService:
@@ -87,9 +117,9 @@ class ComparisonService:
         context_code: str = "",
         timeout: int = 20,
         **kwargs,
-    ) -> List[Dict[str, Any]]:
+    ) -> List[AssertionRecord]:
         """
-        Run assertions.
+        Run assertions; one `AssertionRecord` per assertion.
 
         Compatibility: older callers (and the grader) call this with keywords like
         student_namespace and question_name. This method accepts either the
@@ -107,6 +137,18 @@ class ComparisonService:
         if assertions is None:
             assertions = kwargs.get("assertions") or []
 
+        # Run the question's setup code (helper data / intermediate results)
+        # in the same namespace the assertions see. Callers pass a per-question
+        # OverlayNamespace so these names never leak into other questions.
+        context_error = None
+        if context_code and context_code.strip():
+            try:
+                exec(compile(context_code, "<context>", "exec"), namespace)
+            except Exception:
+                context_error = (
+                    "Setup code for this question raised an error:\n" f"{traceback.format_exc()}\n"
+                )
+
         for a in assertions:
             # Support multiple assertion formats for backwards compatibility:
             # - a is a dict with keys: code, question, description
@@ -129,16 +171,7 @@ class ComparisonService:
             try:
                 exec(compile(code, "<assertion>", "exec"), namespace)
 
-                results.append(
-                    {
-                        "question": question,
-                        "assertion": code,
-                        "status": "passed",
-                        "score": 1,
-                        "error": None,
-                        "description": description,
-                    }
-                )
+                results.append(AssertionRecord.make(question, code, "passed", 1, None, description))
                 continue
 
             # ----------------------------------------------------------
@@ -179,14 +212,7 @@ class ComparisonService:
                     )
 
                 results.append(
-                    {
-                        "question": question,
-                        "assertion": code,
-                        "status": "failed",
-                        "score": 0,
-                        "error": err_msg,
-                        "description": description,
-                    }
+                    AssertionRecord.make(question, code, "failed", 0, err_msg, description)
                 )
                 continue
 
@@ -202,14 +228,7 @@ class ComparisonService:
                 )
 
                 results.append(
-                    {
-                        "question": question,
-                        "assertion": code,
-                        "status": "failed",
-                        "score": 0,
-                        "error": err_msg,
-                        "description": description,
-                    }
+                    AssertionRecord.make(question, code, "failed", 0, err_msg, description)
                 )
                 continue
 
@@ -224,14 +243,7 @@ class ComparisonService:
                 )
 
                 results.append(
-                    {
-                        "question": question,
-                        "assertion": code,
-                        "status": "failed",
-                        "score": 0,
-                        "error": err_msg,
-                        "description": description,
-                    }
+                    AssertionRecord.make(question, code, "failed", 0, err_msg, description)
                 )
                 continue
 
@@ -247,14 +259,7 @@ class ComparisonService:
                 )
 
                 results.append(
-                    {
-                        "question": question,
-                        "assertion": code,
-                        "status": "failed",
-                        "score": 0,
-                        "error": err_msg,
-                        "description": description,
-                    }
+                    AssertionRecord.make(question, code, "failed", 0, err_msg, description)
                 )
                 continue
 
@@ -270,15 +275,140 @@ class ComparisonService:
                 )
 
                 results.append(
-                    {
-                        "question": question,
-                        "assertion": code,
-                        "status": "failed",
-                        "score": 0,
-                        "error": err_msg,
-                        "description": description,
-                    }
+                    AssertionRecord.make(question, code, "failed", 0, err_msg, description)
                 )
                 continue
 
+        if context_error:
+            for r in results:
+                if r["status"] != "passed":
+                    r["error"] = context_error + (r["error"] or "")
+
+        return results
+
+    # --------------------------------------------------------------
+    # Differential testing against the reference solution
+    # --------------------------------------------------------------
+    def run_differential(
+        self,
+        question_name: str,
+        question_data: Dict[str, Any],
+        namespace: Dict[str, Any],
+    ) -> List[Dict[str, Any]]:
+        """
+        Run the question's differential batch (if configured) and return
+        a single result row scored by pass fraction, or [] when the
+        question has no `differential` options.
+        """
+        options = question_data.get("differential")
+        if not options:
+            return []
+
+        row = DifferentialTester().run(
+            question=question_name,
+            func_name=question_name,
+            function_source=question_data.get("function") or "",
+            options=options,
+            namespace=namespace,
+            description=question_data.get("description", ""),
+            setup_code=question_data.get("reference_setup"),
+            context_code=question_data.get("context_code", "") or "",
+        )
+        return [normalize_row(row)]
+
+    # --------------------------------------------------------------
+    # Pre-check: the graded function exists and is callable
+    # --------------------------------------------------------------
+    def check_function(
+        self,
+        question_name: str,
+        question_data: Dict[str, Any],
+        namespace: Dict[str, Any],
+    ) -> Optional[str]:
+        """
+        Return an error message when the question's function is missing from
+        `namespace` or is not callable, or None when assertions should run.
+        Questions without a function spec, or whose setup code binds the
+        name itself, are never short-circuited.
+        """
+        if not question_data.get("function"):
+            return None
+
+        context_code = question_data.get("context_code", "") or ""
+        if question_name in context_code:
+            try:
+                tree = ast.parse(context_code)
+            except SyntaxError:
+                return None
+            for node in ast.walk(tree):
+                if getattr(node, "name", None) == question_name or (
+                    isinstance(node, ast.Name)
+                    and isinstance(node.ctx, ast.Store)
+                    and node.id == question_name
+                ):
+                    return None
+
+        n = len(question_data.get("tests", []) or [])
+        if question_name not in namespace:
+            return (
+                f"NameError: function '{question_name}' is not defined.\n"
+                f"The notebook never defined '{question_name}' (or the cell defining it "
+                "raised an error), so none of this question's "
+                f"{n} assertion(s) could run.\n"
+                "Check that the function name is spelled exactly as in the template.\n"
+            )
+
+        value = namespace[question_name]
+        if not callable(value):
+            shown = repr(value)
+            if len(shown) > 80:
+                shown = shown[:77] + "..."
+            return (
+                f"TypeError: '{question_name}' is not a function.\n"
+                f"It is bound to a {type(value).__name__}: {shown}\n"
+                f"None of this question's {n} assertion(s) could run. "
+                f"Did a later cell overwrite '{question_name}' with a value?\n"
+            )
+        return None
+
+    # --------------------------------------------------------------
+    # One whole question: setup code, assertions, differential batch
+    # --------------------------------------------------------------
+    def run_question(
+        self,
+        question_name: str,
+        question_data: Dict[str, Any],
+        namespace: Dict[str, Any],
+        timeout: int = 20,
+    ) -> List[Dict[str, Any]]:
+        """
+        Grade one question in a private OverlayNamespace over `namespace`
+        and attach the question description to every row.
+        """
+        problem = self.check_function(question_name, question_data, namespace)
+        if problem:
+            # One consolidated diagnosis instead of a NameError per assertion
+            return question_rows(question_name, question_data, "failed", problem)
+
+        q_ns = OverlayNamespace(namespace)
+
+        try:
+            results = self.run_assertions(
+                student_namespace=q_ns,
+                assertions=question_data.get("tests", []) or [],
+                question_name=question_name,
+                context_code=question_data.get("context_code", "") or "",
+                timeout=timeout,
+            )
+            results.extend(self.run_differential(question_name, question_data, q_ns))
+        except Exception:
+            results = [
+                AssertionRecord.make(
+                    question_name, "[comparison error]", "failed", 0, traceback.format_exc()
+                )
+            ]
+
+        description = question_data.get("description", "") or ""
+        for r in results:
+            r["description"] = description
         return results
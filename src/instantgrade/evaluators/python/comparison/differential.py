@@ -0,0 +1,549 @@
+"""
+Differential Testing — compares a student's function against the
+instructor's reference implementation on K auto-generated inputs.
+
+Enabled per question by a directive comment in the instructor's test cell:
+
+    # differential: k=200 seed=0 max_failures=5 timeout=5
+    assert fib(5) == 5
+
+Inputs are generated deterministically (seeded) from the reference
+function's parameter annotations, falling back to the literal arguments of
+sample calls found in the question's assertions. The reference function is
+evaluated once per run (cached), on top of the solution's setup cells and
+the question's setup code; each student function is evaluated in a tight
+loop under a single timeout budget for the whole batch, stopping early
+after `max_failures` mismatches. The score is the pass fraction.
+
+When the reference itself cannot run (it fails to define, or a case raises
+NameError/ImportError), the batch is not scored against it: the row gets
+status "error" and an instructor-side message instead.
+"""
+
+import ast
+import copy
+import hashlib
+import math
+import random
+import signal
+import string
+import threading
+import time
+import traceback
+from typing import Any, Dict, List, Optional, Tuple
+
+DIRECTIVE_PREFIX = "# differential"
+
+DEFAULT_OPTIONS = {
+    "k": 100,
+    "seed": 0,
+    "max_failures": 5,
+    "timeout": 5.0,
+}
+
+# Reference outcomes shared by every student graded in this process,
+# keyed by (question, reference code hash, k, seed); a broken reference
+# is cached as its `ReferenceFailure`.
+_REFERENCE_CACHE: Dict[Tuple[str, str, int, int], Any] = {}
+
+# Raised by the reference on a generated case, these mean the reference
+# (or the solution code it runs on) is broken rather than the input invalid
+_REFERENCE_BUGS = (NameError, ImportError)
+
+
+class ReferenceFailure(Exception):
+    """The instructor's reference could not be evaluated."""
+
+
+class _BatchTimeout(BaseException):
+    """Raised inside the batch loop when the whole-batch budget is exhausted.
+
+    Derives from BaseException so a student's bare `except Exception`
+    cannot swallow it.
+    """
+
+
+# --------------------------------------------------------------------------
+# Directive parsing
+# --------------------------------------------------------------------------
+def parse_directive(line: str) -> Optional[Dict[str, Any]]:
+    """
+    Parse a `# differential: k=... seed=...` comment line.
+
+    Returns the options dict (defaults filled in) or None when the line is
+    not a differential directive.
+    """
+    stripped = line.strip()
+    if not stripped.lower().startswith(DIRECTIVE_PREFIX):
+        return None
+
+    options = dict(DEFAULT_OPTIONS)
+    rest = stripped[len(DIRECTIVE_PREFIX) :].lstrip(":").replace(",", " ")
+    for token in rest.split():
+        if "=" not in token:
+            continue
+        key, value = token.split("=", 1)
+        key = key.strip().lower()
+        if key not in options:
+            continue
+        try:
+            options[key] = float(value) if key == "timeout" else int(value)
+        except ValueError:
+            continue
+    return options
+
+
+def assertion_label(options: Dict[str, Any]) -> str:
+    """The `assertion` text used for a question's differential result row."""
+    k = int(options.get("k", DEFAULT_OPTIONS["k"]))
+    seed = int(options.get("seed", DEFAULT_OPTIONS["seed"]))
+    return f"[differential] {k} generated cases (seed={seed})"
+
+
+# --------------------------------------------------------------------------
+# Type specs: ("int", lo, hi) | ("float", lo, hi) | ("str",) | ("bool",)
+#             ("none",) | ("list", spec) | ("set", spec) | ("dict", k, v)
+#             ("tuple", [specs]) | ("optional", spec)
+# --------------------------------------------------------------------------
+_DEFAULT_INT = ("int", 0, 20)
+_DEFAULT_FLOAT = ("float", -10.0, 10.0)
+
+
+def _spec_from_annotation(node: Optional[ast.expr]) -> Optional[tuple]:
+    if node is None:
+        return None
+
+    if isinstance(node, ast.Constant) and node.value is None:
+        return ("none",)
+
+    if isinstance(node, ast.Name):
+        if node.id == "int":
+            return _DEFAULT_INT
+        if node.id == "float":
+            return _DEFAULT_FLOAT
+        if node.id in ("str", "bool"):
+            return (node.id,)
+        if node.id in ("list", "List"):
+            return ("list", _DEFAULT_INT)
+        if node.id in ("set", "Set"):
+            return ("set", _DEFAULT_INT)
+        if node.id in ("dict", "Dict"):
+            return ("dict", ("str",), _DEFAULT_INT)
+        return None
+
+    # X | None
+    if isinstance(node, ast.BinOp) and isinstance(node.op, ast.BitOr):
+        left, right = _spec_from_annotation(node.left), _spec_from_annotation(node.right)
+        if left == ("none",) and right:
+            return ("optional", right)
+        if right == ("none",) and left:
+            return ("optional", left)
+        return left or right
+
+    if isinstance(node, ast.Subscript):
+        base = node.value.id if isinstance(node.value, ast.Name) else None
+        if isinstance(node.value, ast.Attribute):
+            base = node.value.attr
+        args = node.slice.elts if isinstance(node.slice, ast.Tuple) else [node.slice]
+        specs = [_spec_from_annotation(a) for a in args]
+        if base in ("list", "List", "Sequence", "Iterable") and specs[0]:
+            return ("list", specs[0])
+        if base in ("set", "Set", "frozenset", "FrozenSet") and specs[0]:
+            return ("set", specs[0])
+        if base in ("dict", "Dict", "Mapping") and len(specs) == 2 and all(specs):
+            return ("dict", specs[0], specs[1])
+        if base in ("tuple", "Tuple") and all(specs):
+            return ("tuple", specs)
+        if base == "Optional" and specs[0]:
+            return ("optional", specs[0])
+    return None
+
+
+def _spec_from_values(values: List[Any]) -> Optional[tuple]:
+    """Infer a spec from sample argument values seen in the assertions."""
+    values = [v for v in values if v is not None]
+    if not values:
+        return None
+    first = values[0]
+
+    if isinstance(first, bool):
+        return ("bool",)
+    if isinstance(first, int) and all(isinstance(v, int) for v in values):
+        lo, hi = min(values), max(values)
+        # Never wander below zero when the instructor only used non-negatives
+        lo = lo if lo >= 0 else lo - 5
+        return ("int", lo, max(hi, lo + 10))
+    if isinstance(first, (int, float)) and all(isinstance(v, (int, float)) for v in values):
+        lo, hi = float(min(values)), float(max(values))
+        return ("float", lo, max(hi, lo + 10.0))
+    if isinstance(first, str):
+        return ("str",)
+    if isinstance(first, (list, set, frozenset)):
+        items = [x for v in values for x in v]
+        elem = _spec_from_values(items) or _DEFAULT_INT
+        return ("set", elem) if isinstance(first, (set, frozenset)) else ("list", elem)
+    if isinstance(first, tuple):
+        same_len = [v for v in values if isinstance(v, tuple) and len(v) == len(first)]
+        elems = [_spec_from_values([v[i] for v in same_len]) for i in range(len(first))]
+        return ("tuple", elems) if all(elems) else None
+    if isinstance(first, dict):
+        keys = [k for v in values for k in v.keys()]
+        vals = [x for v in values for x in v.values()]
+        return (
+            "dict",
+            _spec_from_values(keys) or ("str",),
+            _spec_from_values(vals) or _DEFAULT_INT,
+        )
+    return None
+
+
+def build_arg_specs(function_source: str, func_name: str, assertions: List[str]) -> Optional[list]:
+    """
+    Derive one type spec per required positional parameter of `func_name`.
+
+    Annotations on the reference function take priority; unannotated
+    parameters are inferred from literal arguments of sample calls in the
+    assertions. Returns None when any parameter cannot be typed.
+    """
+    try:
+        tree = ast.parse(function_source)
+    except SyntaxError:
+        return None
+
+    func = next(
+        (n for n in tree.body if isinstance(n, ast.FunctionDef) and n.name == func_name), None
+    )
+    if func is None:
+        return None
+
+    positional = func.args.posonlyargs + func.args.args
+    required = positional[: len(positional) - len(func.args.defaults)]
+
+    # Collect literal sample arguments per position
+    samples: List[List[Any]] = [[] for _ in required]
+    for code in assertions:
+        try:
+            node = ast.parse(code)
+        except SyntaxError:
+            continue
+        for call in ast.walk(node):
+            if not (
+                isinstance(call, ast.Call)
+                and isinstance(call.func, ast.Name)
+                and call.func.id == func_name
+            ):
+                continue
+            for i, arg in enumerate(call.args[: len(required)]):
+                try:
+                    samples[i].append(ast.literal_eval(arg))
+                except Exception:
+                    continue
+
+    specs = []
+    for i, param in enumerate(required):
+        spec = _spec_from_annotation(param.annotation)
+        # Prefer sample-derived ranges for plain numeric annotations
+        if spec is None or (spec[0] in ("int", "float") and samples[i]):
+            spec = _spec_from_values(samples[i]) or spec
+        if spec is None:
+            return None
+        specs.append(spec)
+    return specs
+
+
+# --------------------------------------------------------------------------
+# Generation
+# --------------------------------------------------------------------------
+def _generate(spec: tuple, rng: random.Random, depth: int = 0) -> Any:
+    kind = spec[0]
+    if kind == "int":
+        return rng.randint(int(spec[1]), int(spec[2]))
+    if kind == "float":
+        return round(rng.uniform(spec[1], spec[2]), 3)
+    if kind == "str":
+        return "".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(0, 8)))
+    if kind == "bool":
+        return rng.random() < 0.5
+    if kind == "none":
+        return None
+    if kind == "optional":
+        return None if rng.random() < 0.1 else _generate(spec[1], rng, depth)
+
+    size = rng.randint(0, 8 if depth == 0 else 3)
+    if kind == "list":
+        return [_generate(spec[1], rng, depth + 1) for _ in range(size)]
+    if kind == "set":
+        return {_generate(spec[1], rng, depth + 1) for _ in range(size)}
+    if kind == "dict":
+        return {
+            _generate(spec[1], rng, depth + 1): _generate(spec[2], rng, depth + 1)
+            for _ in range(size)
+        }
+    if kind == "tuple":
+        return tuple(_generate(s, rng, depth + 1) for s in spec[1])
+    raise ValueError(f"Unknown spec: {spec!r}")
+
+
+def generate_inputs(specs: list, k: int, seed: int) -> List[tuple]:
+    """Generate `k` argument tuples deterministically for `seed`."""
+    rng = random.Random(seed)
+    return [tuple(_generate(s, rng) for s in specs) for _ in range(k)]
+
+
+def _fresh(value: Any) -> Any:
+    """Cheap defensive copy of generated inputs (faster than deepcopy for builtins)."""
+    if isinstance(value, (int, float, complex, str, bytes, bool, type(None), frozenset)):
+        return value
+    if isinstance(value, tuple):
+        # Argument tuples hold lists and dicts the called function may mutate
+        return tuple(_fresh(v) for v in value)
+    if isinstance(value, list):
+        return [_fresh(v) for v in value]
+    if isinstance(value, dict):
+        return {k: _fresh(v) for k, v in value.items()}
+    if isinstance(value, set):
+        return set(value)
+    return copy.deepcopy(value)
+
+
+def _strip_magics(src: str) -> str:
+    """Notebook cell source with IPython magics / shell escapes blanked out."""
+    lines = []
+    for line in src.splitlines():
+        stripped = line.lstrip()
+        if stripped.startswith(("%", "!")):
+            line = line[: len(line) - len(stripped)] + "pass"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def _safe_repr(value: Any) -> str:
+    try:
+        return repr(value)
+    except Exception as e:
+        return f"<{type(value).__name__} object; repr() raised {type(e).__name__}>"
+
+
+def _outputs_match(actual: Any, expected: Any) -> bool:
+    if isinstance(expected, float) and isinstance(actual, (int, float)):
+        return math.isclose(actual, expected, rel_tol=1e-9, abs_tol=1e-9)
+    equals = getattr(expected, "equals", None)
+    if callable(equals) and not isinstance(expected, (list, dict, set, tuple, str)):
+        try:
+            return bool(equals(actual))
+        except Exception:
+            return False
+    try:
+        return bool(actual == expected)
+    except Exception:
+        return False
+
+
+# --------------------------------------------------------------------------
+# Batch runner
+# --------------------------------------------------------------------------
+class DifferentialTester:
+    """
+    Runs one question's differential batch for a student namespace.
+
+    Reference outcomes are cached at module level, so every student graded
+    in the same process reuses a single evaluation of the reference.
+    """
+
+    def run(
+        self,
+        question: str,
+        func_name: str,
+        function_source: str,
+        options: Dict[str, Any],
+        namespace: Dict[str, Any],
+        description: str = "",
+        setup_code: Optional[List[str]] = None,
+        context_code: str = "",
+    ) -> Dict[str, Any]:
+        """
+        Score `namespace[func_name]` against the reference defined by
+        `function_source`, which runs on top of the solution's `setup_code`
+        cells and the question's `context_code`.
+        """
+        k = int(options.get("k", DEFAULT_OPTIONS["k"]))
+        seed = int(options.get("seed", DEFAULT_OPTIONS["seed"]))
+        max_failures = int(options.get("max_failures", DEFAULT_OPTIONS["max_failures"]))
+        budget = float(options.get("timeout", DEFAULT_OPTIONS["timeout"]))
+        label = assertion_label(options)
+
+        def _row(score: float, error: Optional[str]) -> Dict[str, Any]:
+            return {
+                "question": question,
+                "assertion": label,
+                "status": "passed" if score >= 1.0 else "failed",
+                "score": score,
+                "error": error,
+                "description": description,
+            }
+
+        student_fn = namespace.get(func_name)
+        if not callable(student_fn):
+            return _row(
+                0.0,
+                f"NameError: name '{func_name}' is not defined\n"
+                "This means the required function was NOT defined, or is spelled incorrectly.\n",
+            )
+
+        try:
+            cases = self._reference_cases(
+                question, func_name, function_source, options, k, seed, setup_code, context_code
+            )
+        except ReferenceFailure as e:
+            row = _row(0.0, f"Instructor error, not a student failure: {e}")
+            row["status"] = "error"
+            return row
+
+        passed, failures, timed_out = self._run_batch(student_fn, cases, max_failures, budget)
+
+        score = round(passed / len(cases), 4) if cases else 0.0
+        if not failures and not timed_out:
+            return _row(score, None)
+
+        lines = [f"Differential testing: {passed}/{len(cases)} generated cases passed."]
+        if timed_out:
+            lines.append(f"Stopped: the batch exceeded its {budget}s time budget.")
+        elif len(failures) >= max_failures:
+            lines.append(f"Stopped early after {max_failures} failing cases.")
+        for args, expected, actual in failures[:3]:
+            call = f"{func_name}({', '.join(repr(a) for a in args)})"
+            lines.append(f"\nInput: {call}\nExpected:\n  {expected}\nActual:\n  {actual}")
+        return _row(score, "\n".join(lines) + "\n")
+
+    # ------------------------------------------------------------------
+    def _reference_cases(
+        self,
+        question: str,
+        func_name: str,
+        function_source: str,
+        options: Dict[str, Any],
+        k: int,
+        seed: int,
+        setup_code: Optional[List[str]] = None,
+        context_code: str = "",
+    ) -> List[Tuple[tuple, bool, Any]]:
+        """
+        Return [(args, ok, expected_value_or_exception_type), ...] for the
+        reference, or raise `ReferenceFailure` when it cannot be evaluated.
+        """
+        setup_code = list(setup_code or [])
+        digest = hashlib.sha1()
+        for part in setup_code + [function_source, context_code]:
+            digest.update(part.encode("utf-8") + b"\0")
+        key = (question, digest.hexdigest(), k, seed)
+        if key not in _REFERENCE_CACHE:
+            try:
+                _REFERENCE_CACHE[key] = self._evaluate_reference(
+                    func_name, function_source, options, k, seed, setup_code, context_code
+                )
+            except ReferenceFailure as e:
+                _REFERENCE_CACHE[key] = e
+        cached = _REFERENCE_CACHE[key]
+        if isinstance(cached, ReferenceFailure):
+            raise cached
+        return cached
+
+    def _evaluate_reference(
+        self,
+        func_name: str,
+        function_source: str,
+        options: Dict[str, Any],
+        k: int,
+        seed: int,
+        setup_code: List[str],
+        context_code: str,
+    ) -> List[Tuple[tuple, bool, Any]]:
+        ref_ns: Dict[str, Any] = {"__name__": "__main__"}
+        # Setup cells that fail are skipped (they may need files or input
+        # only a student run has); if the reference then cannot run, their
+        # errors are reported with it.
+        setup_errors = []
+        for n, src in enumerate(setup_code):
+            try:
+                exec(compile(_strip_magics(src), f"<solution_setup_{n}>", "exec"), ref_ns)
+            except Exception as e:
+                setup_errors.append(f"{type(e).__name__}: {e}")
+        notes = "".join(f"\nSolution setup cell failed: {err}" for err in setup_errors)
+
+        try:
+            exec(compile(function_source, f"<reference_{func_name}>", "exec"), ref_ns)
+            if context_code.strip():
+                exec(compile(context_code, "<reference_context>", "exec"), ref_ns)
+        except Exception:
+            raise ReferenceFailure(
+                "the reference solution could not be defined.\n\n" + traceback.format_exc() + notes
+            ) from None
+        ref_fn = ref_ns.get(func_name)
+        if not callable(ref_fn):
+            raise ReferenceFailure(f"the reference solution does not define '{func_name}'.")
+
+        cases = []
+        for args in generate_inputs(options["arg_specs"], k, seed):
+            try:
+                cases.append((args, True, ref_fn(*_fresh(args))))
+            except _REFERENCE_BUGS as e:
+                call = f"{func_name}({', '.join(repr(a) for a in args)})"
+                raise ReferenceFailure(
+                    f"the reference solution raised {type(e).__name__}: {e} on {call}.{notes}"
+                ) from None
+            except Exception as e:
+                cases.append((args, False, type(e)))
+        return cases
+
+    # ------------------------------------------------------------------
+    def _run_batch(self, fn, cases, max_failures: int, budget: float):
+        passed = 0
+        failures: List[Tuple[tuple, str, str]] = []
+        timed_out = False
+
+        use_alarm = (
+            hasattr(signal, "setitimer") and threading.current_thread() is threading.main_thread()
+        )
+        previous = None
+        if use_alarm:
+
+            def _on_alarm(signum, frame):
+                raise _BatchTimeout()
+
+            previous = signal.signal(signal.SIGALRM, _on_alarm)
+            signal.setitimer(signal.ITIMER_REAL, budget)
+
+        deadline = time.perf_counter() + budget
+        try:
+            for args, ok, expected in cases:
+                if time.perf_counter() > deadline:
+                    timed_out = True
+                    break
+                try:
+                    actual = fn(*_fresh(args))
+                except _BatchTimeout:
+                    raise
+                except Exception as e:
+                    matched = not ok and isinstance(e, expected)
+                    actual_repr = f"raised {type(e).__name__}: {e}"
+                else:
+                    matched = ok and _outputs_match(actual, expected)
+                    # Only shown for mismatches; a failing __repr__ is not a wrong answer
+                    actual_repr = None if matched else _safe_repr(actual)
+
+                if matched:
+                    passed += 1
+                    continue
+
+                expected_repr = _safe_repr(expected) if ok else f"raises {expected.__name__}"
+                failures.append((args, expected_repr, actual_repr))
+                if len(failures) >= max_failures:
+                    break
+        except _BatchTimeout:
+            timed_out = True
+        finally:
+            if use_alarm:
+                signal.setitimer(signal.ITIMER_REAL, 0)
+                signal.signal(signal.SIGALRM, previous)
+
+        return passed, failures, timed_out
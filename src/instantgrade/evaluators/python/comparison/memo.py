@@ -0,0 +1,501 @@
+"""
+Question-result memoization keyed by function fingerprints.
+
+Many students submit the same implementation of a function inside otherwise
+different notebooks. Before a question is graded, every student name it
+reads (the graded function, helpers the assertions touch, ...) is
+fingerprinted:
+
+  * Python functions by their bytecode, which already ignores formatting,
+    comments and local variable names; argument names, constants
+    (docstrings stripped), nested code objects and default values are
+    included, and every global the function references is fingerprinted
+    recursively (recursive references become positional markers).
+  * Immutable values (numbers, strings, bytes, tuples, frozensets) by
+    type and repr; allow-listed pure modules by name; builtins by name.
+
+The question payload (assertions, setup code, differential options, the
+reference solution and its setup cells, the description) plus those
+fingerprints form the memo key. Identical implementations are then
+verified once and later students reuse the stored rows.
+
+Anything that could make results differ between two runs of the same code
+bypasses the memo: mutable or unknown objects (lists, dicts, classes,
+instances, DataFrames), closures, `global` writes, non-pure modules,
+builtins such as `open`/`input`/`id`/`hash`, attributes such as
+`random`/`now`/`time`, and file I/O through otherwise pure modules such as
+`pd.read_csv`/`np.loadtxt`/`df.to_csv`. Rows whose messages embed a student traceback
+(line numbers differ per notebook) or a timeout are never stored.
+
+`ResultMemo(path)` persists entries as JSON so they survive across runs;
+keys include the interpreter's bytecode tag, so a memo is never reused
+across Python versions.
+"""
+
+import ast
+import builtins
+import copy
+import dis
+import hashlib
+import json
+import os
+import sys
+import types
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from instantgrade.core.models import normalize_row, row_dicts
+
+MEMO_VERSION = 2
+
+# Modules whose functions are deterministic for the same inputs
+PURE_MODULES = frozenset(
+    {
+        "array",
+        "bisect",
+        "builtins",
+        "cmath",
+        "collections",
+        "copy",
+        "decimal",
+        "enum",
+        "fractions",
+        "functools",
+        "heapq",
+        "itertools",
+        "json",
+        "math",
+        "numbers",
+        "numpy",
+        "operator",
+        "pandas",
+        "re",
+        "statistics",
+        "string",
+        "textwrap",
+        "typing",
+        "unicodedata",
+    }
+)
+
+UNSAFE_BUILTINS = frozenset(
+    {
+        "__import__",
+        "breakpoint",
+        "compile",
+        "delattr",
+        "eval",
+        "exec",
+        "exit",
+        "globals",
+        "hash",
+        "help",
+        "id",
+        "input",
+        "locals",
+        "open",
+        "quit",
+        "setattr",
+        "vars",
+    }
+)
+
+NONDETERMINISTIC_ATTRS = frozenset(
+    {
+        "choice",
+        "choices",
+        "default_rng",
+        "environ",
+        "getenv",
+        "getrandbits",
+        "monotonic",
+        "now",
+        "perf_counter",
+        "popen",
+        "process_time",
+        "rand",
+        "randint",
+        "randn",
+        "random",
+        "sample",
+        "seed",
+        "shuffle",
+        "system",
+        "time",
+        "time_ns",
+        "today",
+        "urandom",
+        "utcnow",
+        "uuid1",
+        "uuid4",
+    }
+)
+
+# Attributes that read or write files (pandas / numpy I/O): their results
+# depend on the file system, not only on the function's inputs
+IO_ATTRS = frozenset(
+    {
+        "fromfile",
+        "genfromtxt",
+        "load",
+        "loadtxt",
+        "memmap",
+        "read_clipboard",
+        "read_csv",
+        "read_excel",
+        "read_feather",
+        "read_fwf",
+        "read_hdf",
+        "read_html",
+        "read_json",
+        "read_orc",
+        "read_parquet",
+        "read_pickle",
+        "read_sas",
+        "read_spss",
+        "read_sql",
+        "read_sql_query",
+        "read_sql_table",
+        "read_stata",
+        "read_table",
+        "read_xml",
+        "save",
+        "savetxt",
+        "savez",
+        "savez_compressed",
+        "to_clipboard",
+        "to_csv",
+        "to_excel",
+        "to_feather",
+        "to_hdf",
+        "to_json",
+        "to_orc",
+        "to_parquet",
+        "to_pickle",
+        "to_sql",
+        "to_stata",
+        "tofile",
+    }
+)
+
+# Substrings marking rows that must not be reused for another notebook
+_UNSTABLE_MARKERS = ("<student_cell", "time budget", "Timed out")
+
+_IMPURE_ATTRS = NONDETERMINISTIC_ATTRS | IO_ATTRS
+
+_GLOBAL_LOADS = {"LOAD_GLOBAL", "LOAD_NAME"}
+_GLOBAL_WRITES = {"STORE_GLOBAL", "DELETE_GLOBAL", "STORE_NAME", "DELETE_NAME"}
+_ATTR_OPS = {"LOAD_ATTR", "LOAD_METHOD", "STORE_ATTR"}
+
+
+class _Bypass(Exception):
+    """Raised while fingerprinting when a value is not safe to memoize."""
+
+
+def _root(module: Optional[str]) -> str:
+    return (module or "").split(".")[0].lstrip("_")
+
+
+class _Fingerprinter:
+    """Fingerprints values reachable from one question; one per key computation."""
+
+    def __init__(self):
+        self._stack: List[int] = []
+        self._done: Dict[int, str] = {}
+
+    # ------------------------------------------------------------------
+    def value(self, value: Any) -> str:
+        if value is None or isinstance(value, (bool, int, float, complex, str, bytes)):
+            return f"{type(value).__name__}:{value!r}"
+        if isinstance(value, tuple):
+            return "tuple(" + ",".join(self.value(v) for v in value) + ")"
+        if isinstance(value, frozenset):
+            return "frozenset(" + ",".join(sorted(self.value(v) for v in value)) + ")"
+        if isinstance(value, types.ModuleType):
+            if _root(value.__name__) in PURE_MODULES:
+                return f"module:{value.__name__}"
+            raise _Bypass(f"module {value.__name__}")
+        if isinstance(value, types.FunctionType):
+            if value.__name__ in IO_ATTRS and _root(value.__module__) in PURE_MODULES:
+                raise _Bypass(f"{value.__module__}.{value.__name__} does file I/O")
+            return self.function(value)
+        if isinstance(value, types.BuiltinFunctionType):
+            owner = getattr(value, "__self__", None)
+            if owner is not None and not isinstance(owner, types.ModuleType):
+                raise _Bypass("bound builtin method")
+            if value.__name__ in UNSAFE_BUILTINS or value.__name__ in _IMPURE_ATTRS:
+                raise _Bypass(f"builtin {value.__name__}")
+            if _root(value.__module__) in PURE_MODULES:
+                return f"builtin:{value.__module__}.{value.__name__}"
+            raise _Bypass(f"builtin from {value.__module__}")
+        wrapped = getattr(value, "__wrapped__", None)
+        if isinstance(wrapped, types.FunctionType) and _root(type(value).__module__) == "functools":
+            # functools.lru_cache / cache wrappers: same results as the wrapped function
+            return f"{type(value).__name__}({self.function(wrapped)})"
+        raise _Bypass(type(value).__name__)
+
+    # ------------------------------------------------------------------
+    def function(self, fn: types.FunctionType) -> str:
+        key = id(fn)
+        if key in self._stack:
+            return f"cycle:{len(self._stack) - self._stack.index(key)}"
+        if key in self._done:
+            return self._done[key]
+        if fn.__closure__:
+            raise _Bypass(f"{fn.__name__} closes over outer variables")
+
+        self._stack.append(key)
+        try:
+            code = fn.__code__
+            parts = [self.code(code)]
+            parts.append("defaults:" + self.value(fn.__defaults__ or ()))
+            kwdefaults = fn.__kwdefaults__ or {}
+            parts.append(
+                "kwdefaults:"
+                + ",".join(f"{k}={self.value(kwdefaults[k])}" for k in sorted(kwdefaults))
+            )
+
+            fn_globals = fn.__globals__
+            fn_builtins = fn.__builtins__ if isinstance(fn.__builtins__, dict) else vars(builtins)
+            for name in sorted(_global_names(code)):
+                if name in fn_globals:
+                    parts.append(f"{name}={self.value(fn_globals[name])}")
+                elif name in fn_builtins:
+                    if name in UNSAFE_BUILTINS:
+                        raise _Bypass(f"builtin {name}")
+                    parts.append(f"{name}=builtin")
+                else:
+                    parts.append(f"{name}=absent")
+        finally:
+            self._stack.pop()
+
+        digest = hashlib.sha256("\n".join(parts).encode("utf-8")).hexdigest()
+        self._done[key] = digest
+        return digest
+
+    # ------------------------------------------------------------------
+    def code(self, code: types.CodeType) -> str:
+        """
+        Hash the instruction stream: opcodes plus normalized arguments.
+        Locals are identified by slot (so renaming them changes nothing),
+        constants by value (so an unused docstring changes nothing) and
+        positions are never read (so formatting and comments change nothing).
+        """
+        n_args = code.co_argcount + code.co_kwonlyargcount
+        n_args += bool(code.co_flags & 0x04) + bool(code.co_flags & 0x08)  # *args, **kwargs
+        h = hashlib.sha256()
+        h.update(repr(code.co_varnames[:n_args]).encode("utf-8"))
+        h.update(repr((code.co_argcount, code.co_posonlyargcount, code.co_kwonlyargcount)).encode())
+        h.update(repr(code.co_flags).encode())
+
+        for ins in dis.get_instructions(code):
+            if ins.opname in _GLOBAL_WRITES:
+                raise _Bypass(f"{code.co_name} writes global {ins.argval}")
+            if ins.opname in _ATTR_OPS and ins.argval in _IMPURE_ATTRS:
+                raise _Bypass(f"{code.co_name} uses .{ins.argval}")
+
+            if ins.opname == "NOP" or ins.opname == "CACHE":
+                continue
+            if ins.opcode in dis.hasconst:
+                if isinstance(ins.argval, types.CodeType):
+                    arg = "code:" + self.code(ins.argval)
+                else:
+                    arg = self.value(ins.argval)
+            elif ins.opcode in dis.haslocal or ins.opcode in dis.hasfree:
+                arg = str(ins.arg)
+            else:
+                arg = repr(ins.argval)
+            h.update(f"{ins.opname} {arg}\n".encode("utf-8"))
+        return h.hexdigest()
+
+
+def _global_names(code: types.CodeType) -> set:
+    """Global names loaded by `code` and every code object nested in it."""
+    names = set()
+    for ins in dis.get_instructions(code):
+        if ins.opname in _GLOBAL_LOADS:
+            names.add(ins.argval)
+    for c in code.co_consts:
+        if isinstance(c, types.CodeType):
+            names |= _global_names(c)
+    return names
+
+
+def _question_reads(question_name: str, question_data: Dict[str, Any]) -> Optional[List[str]]:
+    """
+    Names the question's own code reads from the student namespace, or None
+    when that code itself is not safe to memoize.
+    """
+    sources = [question_data.get("context_code", "") or ""]
+    for t in question_data.get("tests", []) or []:
+        sources.append(t if isinstance(t, str) else json.dumps(t, sort_keys=True, default=str))
+
+    names = {question_name}
+    for src in sources:
+        try:
+            tree = ast.parse(src)
+        except SyntaxError:
+            continue
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Name) and isinstance(node.ctx, ast.Load):
+                if node.id in UNSAFE_BUILTINS:
+                    return None
+                names.add(node.id)
+            elif isinstance(node, ast.Attribute) and node.attr in _IMPURE_ATTRS:
+                return None
+            elif isinstance(node, ast.Import):
+                if any(_root(a.name) not in PURE_MODULES for a in node.names):
+                    return None
+            elif isinstance(node, ast.ImportFrom):
+                if _root(node.module) not in PURE_MODULES:
+                    return None
+            elif isinstance(node, (ast.Global, ast.Nonlocal)):
+                return None
+    return sorted(names)
+
+
+class ResultMemo:
+    """
+    Memo of graded question rows, shared by every student in a run and,
+    when `path` is given, persisted across runs as JSON.
+    """
+
+    def __init__(self, path: Optional[str | Path] = None):
+        self.path = Path(path) if path else None
+        self.entries: Dict[str, List[Dict[str, Any]]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.bypassed = 0
+        self._added: Dict[str, List[Dict[str, Any]]] = {}
+        self._reads: Dict[str, Optional[List[str]]] = {}
+        self._salt = f"{MEMO_VERSION}:{sys.implementation.cache_tag}"
+        if self.path and self.path.exists():
+            self.load()
+
+    # ------------------------------------------------------------------
+    def key(
+        self, question_name: str, question_data: Dict[str, Any], namespace: Dict[str, Any]
+    ) -> Optional[str]:
+        """Memo key for grading `question_name` against `namespace`, or None to bypass."""
+        payload = json.dumps(
+            {
+                "question": question_name,
+                "tests": question_data.get("tests", []) or [],
+                "context_code": question_data.get("context_code", "") or "",
+                "differential": question_data.get("differential"),
+                "reference": question_data.get("function", "") or "",
+                "reference_setup": question_data.get("reference_setup") or [],
+                "description": question_data.get("description", "") or "",
+            },
+            sort_keys=True,
+            default=repr,
+        )
+        if payload not in self._reads:
+            self._reads[payload] = _question_reads(question_name, question_data)
+        reads = self._reads[payload]
+        if reads is None:
+            return None
+
+        fp = _Fingerprinter()
+        parts = [self._salt, payload]
+        try:
+            for name in reads:
+                if name in namespace:
+                    parts.append(f"{name}={fp.value(namespace[name])}")
+                elif hasattr(builtins, name):
+                    parts.append(f"{name}=builtin")
+                else:
+                    parts.append(f"{name}=absent")
+        except _Bypass:
+            return None
+        return hashlib.sha256("\n".join(parts).encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[List[Dict[str, Any]]]:
+        rows = self.entries.get(key)
+        return copy.deepcopy(rows) if rows is not None else None
+
+    def put(self, key: str, rows: List[Dict[str, Any]]) -> None:
+        for r in rows:
+            error = r.get("error") or ""
+            if any(m in error for m in _UNSTABLE_MARKERS):
+                return
+        stored = [normalize_row(r) for r in rows]
+        self.entries[key] = stored
+        self._added[key] = stored
+
+    # ------------------------------------------------------------------
+    def grade(
+        self,
+        questions: Dict[str, Dict[str, Any]],
+        namespace: Dict[str, Any],
+        grade_questions: Callable[[Dict[str, Dict[str, Any]]], List[Dict[str, Any]]],
+    ) -> List[Dict[str, Any]]:
+        """
+        Grade `questions` against `namespace`, serving memoized questions from
+        the memo and passing the rest to `grade_questions(subset)`. Rows are
+        returned in question order.
+        """
+        keys: Dict[str, Optional[str]] = {}
+        cached: Dict[str, List[Dict[str, Any]]] = {}
+        pending: Dict[str, Dict[str, Any]] = {}
+
+        for qname, qdata in questions.items():
+            key = self.key(qname, qdata, namespace)
+            keys[qname] = key
+            rows = self.get(key) if key else None
+            if rows is not None:
+                self.hits += 1
+                cached[qname] = rows
+            else:
+                if key is None:
+                    self.bypassed += 1
+                else:
+                    self.misses += 1
+                pending[qname] = qdata
+
+        by_question: Dict[str, List[Dict[str, Any]]] = {q: [] for q in pending}
+        if pending:
+            for row in grade_questions(pending):
+                by_question.setdefault(row.get("question"), []).append(row)
+            for qname in pending:
+                if keys[qname] and by_question[qname]:
+                    self.put(keys[qname], by_question[qname])
+
+        results: List[Dict[str, Any]] = []
+        for qname in questions:
+            results.extend(cached.get(qname) or by_question.pop(qname, []))
+        # Rows labelled with a question outside `questions`
+        for rows in by_question.values():
+            results.extend(rows)
+        return results
+
+    # ------------------------------------------------------------------
+    def take_added(self) -> Dict[str, List[Dict[str, Any]]]:
+        """Return (as plain dicts) and forget the entries stored since the last call."""
+        added, self._added = self._added, {}
+        return {key: row_dicts(rows) for key, rows in added.items()}
+
+    def merge(self, entries: Optional[Dict[str, List[Dict[str, Any]]]]) -> None:
+        """Adopt entries produced elsewhere (forked child, Docker container)."""
+        for key, rows in (entries or {}).items():
+            if isinstance(rows, list):
+                self.entries[key] = [normalize_row(r) for r in rows]
+
+    def load(self) -> None:
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return
+        if isinstance(data, dict) and data.get("salt") == self._salt:
+            self.merge(data.get("entries"))
+
+    def save(self, path: Optional[str | Path] = None) -> None:
+        """Write the memo atomically to `path` (default: the constructor path)."""
+        target = Path(path) if path else self.path
+        if target is None:
+            return
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp = target.with_name(target.name + ".tmp")
+        entries = {key: row_dicts(rows) for key, rows in self.entries.items()}
+        tmp.write_text(json.dumps({"salt": self._salt, "entries": entries}), encoding="utf-8")
+        os.replace(tmp, target)
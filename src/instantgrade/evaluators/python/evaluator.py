@@ -8,15 +8,39 @@ Responsibilities:
   4. Collect, consolidate, and report results
 """
 
+import csv
+import sqlite3
 import time
 from pathlib import Path
-from typing import List, Dict, Any, Optional, Tuple
+from typing import List, Dict, Any, Callable, Optional, Tuple
 
+from instantgrade.core.models import ExecutionResult
+from instantgrade.evaluators.python.comparison.memo import ResultMemo
 from instantgrade.evaluators.python.ingestion.solution_ingestion import SolutionIngestion
+from instantgrade.evaluators.python.ingestion.identity_scan import (
+    IdentityScan,
+    prescan_submissions,
+    rejected_result,
+)
+from instantgrade.evaluators.python.ingestion.submission_dedup import fan_out, group_submissions
+from instantgrade.evaluators.python.ingestion.template_diff import (
+    grade_attempted,
+    template_stubs,
+    untouched_questions,
+)
 from instantgrade.reporting.reporting_service import ReportingService
+from instantgrade.reporting.results_store import ResultsStore
 from instantgrade.utils.logger import setup_logger
 from instantgrade.evaluators.python.execution_service_docker import ExecutionServiceDocker
 from instantgrade.evaluators.python.notebook_executor import NotebookExecutor
+from instantgrade.evaluators.python.execution.forking import (
+    fork_supported,
+    grade_questions_forked,
+    run_in_fork,
+)
+from instantgrade.evaluators.python.execution.prelude import plan_prelude
+from instantgrade.evaluators.python.execution.retention import RETENTION_POLICIES, apply_retention
+from instantgrade.utils.io_utils import build_student_template
 
 
 class Evaluator:
@@ -44,6 +68,67 @@ class Evaluator:
 
     scaled_range : Optional[Tuple[float, float]]
         If provided AND best_n provided, scores are scaled to this range.
+
+    isolation : str, optional
+        How questions are isolated from each other after the student's
+        notebook has run once: "overlay" (default) gives every question a
+        private overlay namespace in-process; "fork" grades each group of
+        questions in a forked child, so a crash, sys.exit() or runaway loop
+        only fails that group. Falls back to "overlay" where fork() is
+        unavailable.
+    fork_group_size : int, optional
+        Questions graded per forked child when isolation="fork" (default=1).
+    per_question_timeout : int, optional
+        Time budget in seconds for one question (default=20).
+    question_memory_mb : int, optional
+        Address-space limit in MB for each forked grading child when
+        isolation="fork", locally and inside Docker (default=None, no limit).
+    shared_prelude : bool, optional
+        Local grading only. Execute the code cells that submissions share
+        byte-for-byte with the distributed template (imports, data loading,
+        setup) once, then fork each student's run from that warm state and
+        execute only the remaining cells (default=False). Cell errors and
+        `success` match the regular local run; the extra nbclient kernel
+        pass is skipped, so kernel start-up failures are not reported.
+    deduplicate : bool, optional
+        Grade submissions whose normalized code cells are identical only
+        once and copy the results to every duplicate, with each student's
+        identity taken from their own notebook (default=False).
+    reject_unpersonalized : bool, optional
+        Statically scan every notebook's name/roll_number before grading and
+        record notebooks that keep the instructor defaults as failed without
+        executing them. Defaults to `use_docker`, matching the Docker
+        grader's identity check; see `prescan()`.
+    skip_unattempted : bool, optional
+        Score questions whose function is still the template's `pass` stub
+        as "not attempted" (zero) without running their assertions
+        (default=False).
+    memoize : bool, optional
+        Reuse a question's result rows for every student whose graded
+        function (and everything it references) has the same normalized
+        fingerprint. Functions touching mutable or non-deterministic state
+        are always graded (default=False).
+    memo_path : str or Path, optional
+        JSON file the memo is loaded from and saved to, so identical
+        implementations are verified once across runs; implies
+        memoize=True (default=None).
+    namespace_retention : str, optional
+        What `executed[i]["execution"]["namespace"]` keeps once a student
+        has been graded: "keep" (default; the live namespace, holding every
+        student's objects in memory), "summary" (identity plus each name's
+        type and size), "drop" (identity only) or "spill" (summary, with
+        picklable values written to `<log_path>/namespaces/<notebook>.pkl`).
+    summary_only : bool, optional
+        Build a summary-only report of per-question totals, Best-N and
+        scaled scores without the per-assertion rows. Each result is added
+        to the report (and `results_db`) as it is graded and then dropped,
+        so `executed` stays empty; `to_html()` writes the summary page, as
+        do `report.to_summary_csv()` / `report.to_summary_html()`
+        (default=False).
+    results_db : str or Path, optional
+        SQLite database every run's results are appended to (runs,
+        attempts, question scores and assertion outcomes), for queries
+        across runs; see `ResultsStore` (default=None).
     """
 
     def __init__(
@@ -57,6 +142,19 @@ class Evaluator:
         # NEW OPTIONAL PARAMETERS FOR REPORTING
         best_n: Optional[int] = None,
         scaled_range: Optional[Tuple[float, float]] = None,
+        isolation: str = "overlay",
+        fork_group_size: int = 1,
+        per_question_timeout: int = 20,
+        question_memory_mb: Optional[int] = None,
+        shared_prelude: bool = False,
+        deduplicate: bool = False,
+        reject_unpersonalized: Optional[bool] = None,
+        skip_unattempted: bool = False,
+        memoize: bool = False,
+        memo_path: Optional[str | Path] = None,
+        namespace_retention: str = "keep",
+        summary_only: bool = False,
+        results_db: Optional[str | Path] = None,
     ):
         self.solution_path = Path(solution_file_path)
         self.submission_path = Path(submission_folder_path)
@@ -71,11 +169,38 @@ class Evaluator:
         # REPORT + EXECUTION STORAGE
         self.report = None
         self.executed = []
+        self.solution = None
+        self.submissions: List[Path] = []
+        self.rejected: List[IdentityScan] = []
+        self._stubs: Optional[Dict[str, str]] = None
 
         # NEW: store Best-N and scaling configuration
         self.best_n = best_n
         self.scaled_range = scaled_range
 
+        # Question isolation
+        self.isolation = isolation
+        self.fork_group_size = fork_group_size
+        self.per_question_timeout = per_question_timeout
+        self.question_memory_mb = question_memory_mb
+        self.shared_prelude = shared_prelude
+        self.deduplicate = deduplicate
+        self.reject_unpersonalized = reject_unpersonalized
+        self.skip_unattempted = skip_unattempted
+        self.executions_saved = 0
+
+        if namespace_retention not in RETENTION_POLICIES:
+            raise ValueError(
+                f"namespace_retention must be one of {RETENTION_POLICIES}, "
+                f"got {namespace_retention!r}"
+            )
+        self.namespace_retention = namespace_retention
+        self.summary_only = summary_only
+        self.results_db = Path(results_db) if results_db else None
+
+        # Function-fingerprint memo of question results
+        self.memo = ResultMemo(memo_path) if memoize or memo_path else None
+
     # ------------------------------------------------------------------
     def run(self) -> ReportingService:
         """Run the full evaluation pipeline."""
@@ -84,13 +209,184 @@ class Evaluator:
         start_time = time.time()
 
         # 1. Load instructor solution
-        self.logger.info("Loading instructor solution...")
-        solution_service = SolutionIngestion(self.solution_path)
-        self.solution = solution_service.understand_notebook_solution()
-        self.logger.info(f"Loaded {len(self.solution['questions'])} questions.")
+        self._load_solution()
+
+        # 2. Discover student submissions and reject unpersonalized ones
+        all_submissions = self._discover_submissions()
+        self.logger.info(f"Discovered {len(all_submissions)} submissions to grade.")
+
+        rejected_results = []
+        if self._rejects_unpersonalized():
+            default_name, default_roll = self._default_identity()
+            rejected_paths = set()
+            for scan in self.prescan(all_submissions):
+                rejected_paths.add(scan.path)
+                rejected_results.append(rejected_result(scan, default_name, default_roll))
+            all_submissions = [p for p in all_submissions if p not in rejected_paths]
+
+        # 3. Skip re-grading submissions with identical code
+        to_grade, duplicates = all_submissions, {}
+        if self.deduplicate and len(all_submissions) > 1:
+            meta = self.solution.get("metadata", {})
+            to_grade, duplicates = group_submissions(
+                all_submissions, (meta.get("name"), meta.get("roll_number"))
+            )
+            self.executions_saved = len(all_submissions) - len(to_grade)
+            if self.executions_saved:
+                self.logger.info(
+                    f"{len(to_grade)} distinct code sets; "
+                    f"{self.executions_saved} duplicate submission(s) will reuse results."
+                )
+
+        # 4. Execute grading
+        if self.summary_only:
+            # Results go straight into the report; no result rows are kept
+            self.executed = []
+            self.report = self._new_report([])
+            self._grade_into_summary(to_grade, duplicates, rejected_results)
+        else:
+            executed = self.execute_all(to_grade)
+            if duplicates:
+                by_path = {Path(r["student_path"]): r for r in executed}
+                for rep, fps in duplicates.items():
+                    for fp in fps:
+                        executed.append(fan_out(by_path[rep], fp))
+            if duplicates or rejected_results:
+                executed.extend(rejected_results)
+                order = {p: i for i, p in enumerate(self.submissions)}
+                executed.sort(key=lambda r: order.get(Path(r["student_path"]), len(order)))
+            self.executed = executed
+        self.logger.info("Execution phase completed successfully.")
+
+        if self.memo is not None:
+            self.logger.info(
+                f"[Memo] {self.memo.hits} question(s) reused, {self.memo.misses} graded, "
+                f"{self.memo.bypassed} bypassed."
+            )
+            if self.memo.path:
+                try:
+                    self.memo.save()
+                except OSError as e:
+                    self.logger.warning(f"Could not save result memo: {e}")
+
+        # 5. Build report (NEW → pass best_n and scaled_range)
+        if not self.summary_only:
+            self.report = self._new_report(self.executed)
+            if self.results_db is not None:
+                try:
+                    run_id = self.report.to_sqlite(
+                        self.results_db,
+                        name=self.submission_path.name,
+                        meta={"solution": str(self.solution_path)},
+                    )
+                    self.logger.info(f"[Results] Stored as run {run_id} in {self.results_db}.")
+                except (OSError, sqlite3.Error) as e:
+                    self.logger.warning(f"Could not store results in {self.results_db}: {e}")
+
+        self.logger.info("Report generation complete.")
+
+        elapsed = round(time.time() - start_time, 2)
+        self.logger.info(f"Total evaluation completed in {elapsed}s.")
+
+        return self.report
+
+    # ------------------------------------------------------------------
+    def _new_report(self, executed: List[Dict[str, Any]]) -> ReportingService:
+        return ReportingService(
+            executed_results=executed,
+            logger=self.logger,
+            total_assertions=self.solution["summary"]["total_assertions"],
+            best_n=self.best_n,
+            scaled_range=self.scaled_range,
+            executions_saved=self.executions_saved,
+            summary_only=self.summary_only,
+        )
+
+    def _grade_into_summary(
+        self,
+        to_grade: List[Path],
+        duplicates: Dict[Path, list],
+        rejected_results: List[Dict[str, Any]],
+    ) -> None:
+        """
+        Summary-only grading: add each result to `self.report` (and the
+        results database) once it and every earlier submission are graded,
+        then let it go, so memory holds question totals rather than result
+        rows. Duplicates and rejected submissions keep their submission
+        order, as in a full run.
+        """
+        store = run_id = None
+        if self.results_db is not None:
+            try:
+                store = ResultsStore(self.results_db)
+                run_id = store.start_run(
+                    self.submission_path.name,
+                    self.report.run_meta({"solution": str(self.solution_path)}),
+                )
+            except (OSError, sqlite3.Error) as e:
+                self.logger.warning(f"Could not store results in {self.results_db}: {e}")
+                store = None
+
+        def add(result: Dict[str, Any]) -> None:
+            nonlocal store
+            self.report.add_result(result)
+            if store is not None:
+                try:
+                    store.add_result(run_id, result)
+                except (OSError, sqlite3.Error) as e:
+                    self.logger.warning(f"Could not store results in {self.results_db}: {e}")
+                    store = None
+
+        order = {p: i for i, p in enumerate(self.submissions)}
+        pending: Dict[int, Dict[str, Any]] = {}
+        position = 0
+
+        def place(result: Dict[str, Any]) -> None:
+            nonlocal position
+            at = order.get(Path(result["student_path"]))
+            if at is None:
+                add(result)
+                return
+            pending[at] = result
+            while position in pending:
+                add(pending.pop(position))
+                position += 1
+
+        def finished(result: Dict[str, Any]) -> None:
+            place(result)
+            for fp in duplicates.get(Path(result["student_path"]), []):
+                place(fan_out(result, fp))
+
+        for result in rejected_results:
+            place(result)
+        try:
+            self.execute_all(to_grade, on_result=finished)
+            for at in sorted(pending):
+                add(pending.pop(at))
+        except BaseException:
+            # An interrupted run keeps only the batches already written
+            if store is not None:
+                store.close(flush=False)
+            raise
+        if store is not None:
+            try:
+                store.close()
+                self.logger.info(f"[Results] Stored as run {run_id} in {self.results_db}.")
+            except (OSError, sqlite3.Error) as e:
+                self.logger.warning(f"Could not store results in {self.results_db}: {e}")
 
-        # 2. Discover student submissions
-        # Accept either a folder containing .ipynb files or a single .ipynb file.
+    # ------------------------------------------------------------------
+    def _load_solution(self) -> Dict[str, Any]:
+        """Parse the instructor solution once."""
+        if self.solution is None:
+            self.logger.info("Loading instructor solution...")
+            solution_service = SolutionIngestion(self.solution_path)
+            self.solution = solution_service.understand_notebook_solution()
+            self.logger.info(f"Loaded {len(self.solution['questions'])} questions.")
+        return self.solution
+
+    def _discover_submissions(self) -> List[Path]:
+        """Accept either a folder containing .ipynb files or a single .ipynb file."""
         if not self.submission_path.exists():
             raise FileNotFoundError(f"Submission path does not exist: {self.submission_path}")
 
@@ -100,44 +396,87 @@ class Evaluator:
                 raise FileNotFoundError(
                     f"Submission file provided is not a .ipynb: {self.submission_path}"
                 )
-            all_submissions = [self.submission_path]
+            self.submissions = [self.submission_path]
         else:
             # Directory provided: discover all .ipynb files at top-level
-            all_submissions = sorted(
+            self.submissions = sorted(
                 [f for f in self.submission_path.glob("*.ipynb") if f.is_file()]
             )
-            if not all_submissions:
+            if not self.submissions:
                 raise FileNotFoundError(f"No student notebooks found in {self.submission_path}")
+        return self.submissions
 
-        self.logger.info(f"Discovered {len(all_submissions)} submissions to grade.")
-
-        # 3. Execute grading
-        executed = self.execute_all(all_submissions)
-        self.executed = executed
-        self.logger.info("Execution phase completed successfully.")
-
-        # 4. Build report (NEW → pass best_n and scaled_range)
-        self.report = ReportingService(
-            executed_results=executed,
-            logger=self.logger,
-            total_assertions=self.solution["summary"]["total_assertions"],
-            best_n=self.best_n,
-            scaled_range=self.scaled_range,
-        )
+    def _template_stubs(self) -> Dict[str, str]:
+        if self._stubs is None:
+            self._stubs = template_stubs(self._load_solution().get("questions", {}))
+        return self._stubs
 
-        self.logger.info("Report generation complete.")
+    def _default_identity(self) -> Tuple[str, str]:
+        meta = self._load_solution().get("metadata", {}) or {}
+        return meta.get("name", "student name"), meta.get("roll_number", "student roll number")
 
-        elapsed = round(time.time() - start_time, 2)
-        self.logger.info(f"Total evaluation completed in {elapsed}s.")
+    def _rejects_unpersonalized(self) -> bool:
+        if self.reject_unpersonalized is None:
+            return self.use_docker
+        return bool(self.reject_unpersonalized)
 
-        return self.report
+    # ------------------------------------------------------------------
+    def prescan(self, submission_paths: Optional[List[Path]] = None) -> List[IdentityScan]:
+        """
+        Statically scan submissions for their name/roll_number (nothing is
+        executed) and return the ones that still carry the instructor's
+        default identity. Runs across `parallel_workers` processes, can be
+        called before `run()`, and writes `rejected_submissions.csv` to the
+        log directory.
+        """
+        if submission_paths is None:
+            submission_paths = self._discover_submissions()
+        default_name, default_roll = self._default_identity()
+
+        scans = prescan_submissions(submission_paths, workers=self.parallel_workers)
+        self.rejected = [s for s in scans if s.is_unpersonalized(default_name, default_roll)]
+
+        report_path = self.log_path / "rejected_submissions.csv"
+        with open(report_path, "w", newline="", encoding="utf-8") as fh:
+            writer = csv.writer(fh)
+            writer.writerow(["file", "name", "roll_number"])
+            for scan in self.rejected:
+                writer.writerow([scan.path.name, scan.name or "", scan.roll_number or ""])
+
+        if self.rejected:
+            self.logger.warning(
+                f"[Pre-scan] {len(self.rejected)}/{len(scans)} submission(s) keep the default "
+                f"name/roll_number and will not be executed (see {report_path}):"
+            )
+            for scan in self.rejected:
+                self.logger.warning(f"  - {scan.path.name}")
+        else:
+            self.logger.info(f"[Pre-scan] All {len(scans)} submission(s) are personalized.")
+        return self.rejected
 
     # ------------------------------------------------------------------
-    def execute_all(self, submission_paths: List[Path]) -> List[Dict[str, Any]]:
-        """Run grading across all students sequentially (parallel later)."""
+    def execute_all(
+        self,
+        submission_paths: List[Path],
+        on_result: Optional[Callable[[Dict[str, Any]], None]] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Run grading across all students sequentially (parallel later).
+        With `on_result`, each result is passed to it as soon as it is
+        graded instead of being collected, and an empty list is returned.
+        """
         if self.use_docker:
             self.logger.info("Starting Docker-based evaluation pipeline...")
-            execution_service = ExecutionServiceDocker(logger=self.logger)
+            execution_service = ExecutionServiceDocker(
+                logger=self.logger,
+                per_question_timeout=self.per_question_timeout,
+                question_memory_mb=self.question_memory_mb,
+                isolation=self.isolation,
+                fork_group_size=self.fork_group_size,
+                memo=self.memo,
+                skip_unattempted=self.skip_unattempted,
+                template_stubs=self._template_stubs() if self.skip_unattempted else None,
+            )
             # Try to start a persistent container for reuse to speed up grading
             try:
                 execution_service.start_container()
@@ -150,6 +489,11 @@ class Evaluator:
             execution_service = NotebookExecutor(timeout=120)
 
         results = []
+        emit = on_result or results.append
+
+        prelude = None
+        if not self.use_docker and self.shared_prelude:
+            prelude = self._prepare_prelude(submission_paths)
 
         try:
             for idx, sub in enumerate(submission_paths, start=1):
@@ -158,24 +502,27 @@ class Evaluator:
                 try:
                     if self.use_docker:
                         result = execution_service.execute_student(self.solution_path, sub)
+                    elif prelude is not None and sub in prelude[1]:
+                        result = self._grade_from_prelude(prelude[0], sub, prelude[1][sub])
                     else:
                         result = self._grade_local_student(execution_service, sub)
 
-                    results.append(result)
+                    # Release the student's objects before grading the next one
+                    apply_retention(result, self.namespace_retention, self.log_path / "namespaces")
+                    # Same envelope whichever backend produced the result
+                    emit(ExecutionResult.from_dict(result).to_dict())
 
                 except Exception as e:
                     self.logger.exception(f"Fatal error grading {sub.name}: {e}")
 
-                    results.append(
-                        {
-                            "student_path": sub,
-                            "execution": {
-                                "success": False,
-                                "errors": [str(e)],
-                                "student_meta": {"name": "Unknown", "roll_number": "Unknown"},
-                            },
-                            "results": [],
-                        }
+                    emit(
+                        ExecutionResult(
+                            sub,
+                            name="Unknown",
+                            roll_number="Unknown",
+                            success=False,
+                            errors=[str(e)],
+                        ).to_dict()
                     )
 
         finally:
@@ -200,6 +547,11 @@ class Evaluator:
         # which currently returns an empty namespace on the host. Use the
         # internal local runner for accurate evaluation.
         exec_result = executor._run_notebook_locally(submission_path)
+        return self._grade_executed(submission_path, exec_result)
+
+    # ------------------------------------------------------------------
+    def _grade_executed(self, submission_path: Path, exec_result: Dict[str, Any]) -> Dict[str, Any]:
+        """Run every question's assertions against an executed student namespace."""
         ns = exec_result.get("namespace", {})
         name = ns.get("name", "Unknown")
         roll = ns.get("roll_number", "Unknown")
@@ -209,20 +561,37 @@ class Evaluator:
 
         comparison_svc = ComparisonService()
 
-        # Build assertion list from solution questions
-        assertions_list = []
-        for question_name, question_data in self.solution.get("questions", {}).items():
-            for assertion_code in question_data.get("tests", []):
-                assertions_list.append(
-                    {
-                        "code": assertion_code,
-                        "question": question_name,
-                        "description": question_data.get("description", ""),
-                    }
+        def grade_question(question_name: str, question_data: Dict[str, Any]):
+            # Private overlay namespace per question over the shared student globals
+            return comparison_svc.run_question(
+                question_name, question_data, ns, timeout=self.per_question_timeout
+            )
+
+        def grade_questions(questions: Dict[str, Dict[str, Any]]) -> List[Dict[str, Any]]:
+            if self.isolation == "fork" and fork_supported():
+                return grade_questions_forked(
+                    questions,
+                    grade_question,
+                    group_size=self.fork_group_size,
+                    timeout=self.per_question_timeout,
+                    memory_limit_mb=self.question_memory_mb,
                 )
+            rows = []
+            for question_name, question_data in questions.items():
+                rows.extend(grade_question(question_name, question_data))
+            return rows
+
+        if self.memo is not None:
+            memo = self.memo
 
-        # Run all assertions
-        results = comparison_svc.run_assertions(assertions_list, ns)
+            def grade_questions(questions, _grade=grade_questions):
+                return memo.grade(questions, ns, _grade)
+
+        questions = self.solution.get("questions", {})
+        untouched = set()
+        if self.skip_unattempted:
+            untouched = untouched_questions(submission_path, questions, self._template_stubs())
+        results = grade_attempted(questions, untouched, grade_questions)
 
         return {
             "student_path": submission_path,
@@ -235,6 +604,66 @@ class Evaluator:
             "results": results,
         }
 
+    # ------------------------------------------------------------------
+    def _prepare_prelude(self, submission_paths: List[Path]):
+        """
+        Choose and warm the shared prelude. Returns (snapshot, sources) where
+        `sources` maps each submission that can start from the warm state to
+        its code cells, or None when no prefix is worth sharing.
+        """
+        if not fork_supported():
+            self.logger.warning("shared_prelude requires fork(); grading without it.")
+            return None
+
+        try:
+            template = build_student_template(self.solution_path)
+            snapshot, sources, prefixes = plan_prelude(template, submission_paths)
+        except Exception as e:
+            self.logger.warning(f"Could not plan shared prelude: {e}")
+            return None
+
+        if snapshot.length == 0:
+            self.logger.info("[Prelude] Submissions share no template cells; skipping.")
+            return None
+
+        eligible = {p: src for p, src in sources.items() if prefixes[p] >= snapshot.length}
+        self.logger.info(
+            f"[Prelude] Executing {snapshot.length} shared template cell(s) once "
+            f"for {len(eligible)}/{len(submission_paths)} submissions."
+        )
+        snapshot.warm()
+        return snapshot, eligible
+
+    # ------------------------------------------------------------------
+    def _grade_from_prelude(self, snapshot, submission_path: Path, sources: List[str]):
+        """Grade one student in a child forked from the warm prelude state."""
+        self.logger.info(f"[Prelude] Grading {submission_path.name} from shared state")
+
+        def _grade_in_child():
+            if self.memo is not None:
+                self.memo.take_added()
+            result = snapshot.run_student(
+                sources, lambda exec_result: self._grade_executed(submission_path, exec_result)
+            )
+            # Live objects cannot cross the pipe; keep only the identity fields
+            ns = result["execution"].get("namespace", {})
+            result["execution"]["namespace"] = {
+                k: str(ns[k]) for k in ("name", "roll_number") if ns.get(k) is not None
+            }
+            memo_entries = self.memo.take_added() if self.memo is not None else None
+            return ExecutionResult.from_dict(result).to_bytes(), memo_entries
+
+        n_questions = len(self.solution.get("questions", {}))
+        ok, value = run_in_fork(
+            _grade_in_child, timeout=120 + self.per_question_timeout * max(n_questions, 1)
+        )
+        if not ok:
+            raise RuntimeError(value)
+        data, memo_entries = value
+        if self.memo is not None:
+            self.memo.merge(memo_entries)
+        return ExecutionResult.from_bytes(data).to_dict()
+
     # ------------------------------------------------------------------
     def to_html(self, path: str | Path):
         """Generate HTML report for graded results."""
@@ -246,6 +675,22 @@ class Evaluator:
         self.logger.info(f"HTML report generated at: {path}")
         return str(path)
 
+    # ------------------------------------------------------------------
+    def to_html_site(self, directory: str | Path, workers: Optional[int] = None):
+        """
+        Generate the report as an index page plus per-student fragments
+        (see `ReportingService.to_html_site`), rendered across `workers`
+        processes (default: `parallel_workers` when above 1, else all CPUs).
+        """
+        if self.report is None:
+            raise RuntimeError("No report available. Run Evaluator.run() first.")
+
+        if workers is None and self.parallel_workers > 1:
+            workers = self.parallel_workers
+        index = self.report.to_html_site(Path(directory), workers=workers)
+        self.logger.info(f"HTML report site generated at: {index}")
+        return str(index)
+
     # ------------------------------------------------------------------
     def summary(self, all_results: List[Dict[str, Any]]) -> Dict[str, Any]:
         """Generate quick text summary statistics."""
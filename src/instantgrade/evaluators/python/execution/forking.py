@@ -0,0 +1,161 @@
+"""
+Fork-after-execute isolation.
+
+The student's notebook is executed once; each question (or group of
+questions) is then graded in a `fork()`ed child that inherits the executed
+namespace as a copy-on-write image. The child sends its result rows back
+through a pipe and exits. A crash, `sys.exit()`, runaway loop or memory
+blow-up in one question only takes down that child — the parent records a
+failure for the affected question and carries on with the next one.
+
+Only available where `os.fork` exists (Linux/macOS); callers should check
+`fork_supported()` and fall back to in-process grading otherwise.
+"""
+
+import os
+import pickle
+import select
+import signal
+import sys
+import time
+import traceback
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from instantgrade.evaluators.python.comparison.comparison_service import question_rows
+
+
+def fork_supported() -> bool:
+    return hasattr(os, "fork")
+
+
+def run_in_fork(
+    fn: Callable[[], Any],
+    timeout: Optional[float] = None,
+    memory_limit_mb: Optional[int] = None,
+) -> Tuple[bool, Any]:
+    """
+    Run `fn()` in a forked child and return (ok, value).
+
+    On success `value` is whatever `fn` returned (it must be picklable).
+    On failure `value` is a human-readable message describing how the child
+    died (exception traceback, sys.exit, signal, timeout).
+    """
+    # Flush buffered output so it is not duplicated by the child
+    sys.stdout.flush()
+    sys.stderr.flush()
+
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+
+    if pid == 0:  # pragma: no cover - runs in the child process
+        os.close(read_fd)
+        status = 0
+        try:
+            if memory_limit_mb:
+                import resource
+
+                limit = int(memory_limit_mb) * 1024 * 1024
+                resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+            payload = (True, fn())
+        except SystemExit as e:
+            payload = (False, f"Student code called sys.exit({e.code!r}) while grading.")
+        except MemoryError:
+            payload = (False, f"Memory limit of {memory_limit_mb} MB exceeded while grading.")
+        except BaseException:
+            payload = (False, "Grading process failed:\n" + traceback.format_exc())
+        try:
+            data = pickle.dumps(payload, protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception:
+            data = pickle.dumps((False, "Grading result could not be serialized."))
+        try:
+            with os.fdopen(write_fd, "wb") as fh:
+                fh.write(data)
+        except BaseException:
+            status = 1
+        # Skip atexit handlers / buffered IO inherited from the parent
+        os._exit(status)
+
+    # ---------------------------- parent ----------------------------
+    os.close(write_fd)
+    chunks: List[bytes] = []
+    timed_out = False
+    deadline = time.monotonic() + timeout if timeout else None
+
+    try:
+        while True:
+            wait = None if deadline is None else max(0.0, deadline - time.monotonic())
+            ready, _, _ = select.select([read_fd], [], [], wait)
+            if not ready:
+                timed_out = True
+                break
+            chunk = os.read(read_fd, 1 << 16)
+            if not chunk:
+                break
+            chunks.append(chunk)
+    finally:
+        os.close(read_fd)
+
+    if timed_out:
+        try:
+            os.kill(pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+
+    _, status = os.waitpid(pid, 0)
+
+    if timed_out:
+        return False, f"Timed out after {timeout}s while grading."
+
+    if chunks:
+        try:
+            return pickle.loads(b"".join(chunks))
+        except Exception:
+            pass
+
+    if os.WIFSIGNALED(status):
+        sig = os.WTERMSIG(status)
+        return False, f"Grading process was killed by signal {sig} ({signal.Signals(sig).name})."
+    return False, f"Grading process exited unexpectedly (status {os.WEXITSTATUS(status)})."
+
+
+def grade_questions_forked(
+    questions: Dict[str, Dict[str, Any]],
+    grade_question: Callable[[str, Dict[str, Any]], List[Dict[str, Any]]],
+    group_size: int = 1,
+    timeout: Optional[float] = None,
+    memory_limit_mb: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Grade `questions` in forked children, `group_size` questions per child.
+
+    `grade_question(name, data)` runs inside the child against the
+    namespace the parent has already built. If a child fails, every
+    assertion of every question in its group is recorded as failed with
+    the reason.
+    """
+    items = list(questions.items())
+    group_size = max(1, int(group_size or 1))
+    all_results: List[Dict[str, Any]] = []
+
+    for start in range(0, len(items), group_size):
+        group = items[start : start + group_size]
+
+        def _grade_group(group=group):
+            rows = []
+            for qname, qdata in group:
+                rows.extend(grade_question(qname, qdata))
+            return rows
+
+        group_timeout = timeout * len(group) if timeout else None
+        ok, value = run_in_fork(
+            _grade_group, timeout=group_timeout, memory_limit_mb=memory_limit_mb
+        )
+
+        if ok:
+            all_results.extend(value)
+            continue
+
+        for qname, qdata in group:
+            all_results.extend(question_rows(qname, qdata, "failed", value, "[question crashed]"))
+
+    return all_results
@@ -0,0 +1,47 @@
+"""
+Per-question namespace isolation.
+
+`OverlayNamespace` is a ChainMap-style view used as the globals of a
+question's context code and assertions: every write lands in the
+question's own (initially empty) layer, while reads fall through to the
+shared student namespace. Nothing is copied per question, and names bound
+by one question's `context_code` are invisible to every other question.
+
+It subclasses `dict` (rather than `collections.ChainMap`) because `exec`
+and `eval` require a real dict for globals; CPython resolves missing names
+through `__missing__` when the globals mapping is a dict subclass.
+"""
+
+from typing import Any, Dict, Iterator
+
+
+class OverlayNamespace(dict):
+    """A private writable layer over a shared, read-through base namespace."""
+
+    __slots__ = ("base",)
+
+    def __init__(self, base: Dict[str, Any]):
+        super().__init__()
+        self.base = base
+
+    def __missing__(self, key: str) -> Any:
+        return self.base[key]
+
+    def __contains__(self, key: object) -> bool:
+        return dict.__contains__(self, key) or key in self.base
+
+    def get(self, key: str, default: Any = None) -> Any:
+        if dict.__contains__(self, key):
+            return dict.__getitem__(self, key)
+        return self.base.get(key, default)
+
+    def layer(self) -> Dict[str, Any]:
+        """Return only the names written by this question."""
+        return dict(self.items())
+
+    def iter_all(self) -> Iterator[str]:
+        """Iterate over every visible name (own layer first, then base)."""
+        yield from dict.keys(self)
+        for key in self.base:
+            if not dict.__contains__(self, key):
+                yield key
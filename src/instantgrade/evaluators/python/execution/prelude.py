@@ -0,0 +1,192 @@
+"""
+Shared-prelude snapshot for local grading.
+
+Every submission starts from the template produced by
+`io_utils.build_student_template`, so most notebooks open with the same
+import / data-loading / setup cells. The snapshot executes that common
+prefix once in the grading process and then `fork()`s one child per
+student from the warm state; the child executes only the cells after the
+prefix and grades the result.
+
+Identity cells (only literal `name = ...` / `roll_number = ...`
+assignments) are expected to differ per student. They still count as part
+of the prefix as long as no other prefix cell reads those names; the
+student's own identity cell is then executed first in the child.
+
+Cells run exactly as in `NotebookExecutor._run_notebook_locally`'s
+in-process pass (same `exec_cell`, dummy `input()` and error records), so
+a notebook gets the same namespace, `errors` and `success` either way. The
+one difference: the snapshot skips the executor's preliminary nbclient
+kernel run, whose output is discarded, so a kernel that cannot start or a
+cell that exceeds the notebook timeout in that kernel is not reported as
+an "[nbclient failure]" here.
+"""
+
+import ast
+from collections import Counter
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple
+
+import nbformat
+
+from instantgrade.evaluators.python.notebook_executor import NotebookExecutor
+
+_IDENTITY_NAMES = {"name", "roll_number"}
+
+
+def code_sources(nb: nbformat.NotebookNode) -> List[str]:
+    """Non-empty code cell sources, in the order the executors run them."""
+    return [
+        cell.get("source", "")
+        for cell in nb.cells
+        if cell.cell_type == "code" and cell.get("source", "").strip()
+    ]
+
+
+def is_identity_cell(src: str) -> bool:
+    """True when the cell only assigns string literals to name / roll_number."""
+    try:
+        tree = ast.parse(src)
+    except SyntaxError:
+        return False
+    if not tree.body:
+        return False
+    for node in tree.body:
+        if not (
+            isinstance(node, ast.Assign)
+            and len(node.targets) == 1
+            and isinstance(node.targets[0], ast.Name)
+            and node.targets[0].id in _IDENTITY_NAMES
+            and isinstance(node.value, ast.Constant)
+        ):
+            return False
+    return True
+
+
+def _reads_identity(src: str) -> bool:
+    try:
+        tree = ast.parse(src)
+    except SyntaxError:
+        return True
+    return any(
+        isinstance(n, ast.Name) and isinstance(n.ctx, ast.Load) and n.id in _IDENTITY_NAMES
+        for n in ast.walk(tree)
+    )
+
+
+class PreludeSnapshot:
+    """The template's code cells, a chosen prefix length and its warm namespace."""
+
+    def __init__(self, template_sources: List[str]):
+        self.template_sources = template_sources
+        self.length = 0
+        self.namespace: Dict[str, Any] = {}
+        self.errors: List[str] = []
+        # Prefix cells that are identity cells (deferred to each student)
+        self._identity_positions = {
+            i for i, src in enumerate(template_sources) if is_identity_cell(src)
+        }
+        self._identity_read = any(
+            _reads_identity(src)
+            for i, src in enumerate(template_sources)
+            if i not in self._identity_positions
+        )
+
+    @classmethod
+    def from_template(cls, template: nbformat.NotebookNode) -> "PreludeSnapshot":
+        return cls(code_sources(template))
+
+    # ------------------------------------------------------------------
+    def matching_prefix(self, student_sources: List[str]) -> int:
+        """Length of the student's prefix of cells byte-identical to the template."""
+        n = 0
+        for tmpl, src in zip(self.template_sources, student_sources):
+            if tmpl == src:
+                n += 1
+            elif (
+                n in self._identity_positions and not self._identity_read and is_identity_cell(src)
+            ):
+                n += 1
+            else:
+                break
+        return n
+
+    def choose_length(self, prefix_lengths: List[int]) -> int:
+        """
+        Pick the prefix length that saves the most cell executions overall:
+        maximise L * (number of students whose matching prefix is >= L).
+        """
+        counts = Counter(prefix_lengths)
+        best, best_saved, at_least = 0, 0, 0
+        for length in sorted(counts, reverse=True):
+            at_least += counts[length]
+            if length * at_least > best_saved:
+                best, best_saved = length, length * at_least
+        self.length = best
+        return best
+
+    # ------------------------------------------------------------------
+    def warm(self) -> None:
+        """Execute the shared prefix once in this process."""
+        self.namespace = {}
+        self.errors = []
+        self.namespace["input"] = NotebookExecutor.dummy_input(self.errors)
+        for i, src in enumerate(self.template_sources[: self.length]):
+            if i in self._identity_positions:
+                continue
+            NotebookExecutor.exec_cell(src, self.namespace, self.errors)
+
+    def student_cells(self, student_sources: List[str]) -> List[str]:
+        """Cells a student still has to run on top of the warm namespace."""
+        deferred = [student_sources[i] for i in sorted(self._identity_positions) if i < self.length]
+        return deferred + student_sources[self.length :]
+
+    def run_student(
+        self,
+        student_sources: List[str],
+        grade: Callable[[Dict[str, Any]], Any],
+    ) -> Any:
+        """
+        Executed inside a forked child: run the student's remaining cells on
+        the (copy-on-write) warm namespace and return `grade(exec_result)`.
+        """
+        ns = self.namespace
+        errors = list(self.errors)
+        ns["input"] = NotebookExecutor.dummy_input(errors)
+        for src in self.student_cells(student_sources):
+            NotebookExecutor.exec_cell(src, ns, errors)
+
+        clean_ns = {k: v for k, v in ns.items() if not k.startswith("__")}
+        return grade(
+            {
+                "namespace": clean_ns,
+                "errors": errors,
+                "traceback": None,
+                "success": len(errors) == 0,
+            }
+        )
+
+
+def plan_prelude(
+    template: nbformat.NotebookNode, submissions: List[Path]
+) -> Tuple[PreludeSnapshot, Dict[Path, List[str]], Dict[Path, int]]:
+    """
+    Read every submission's code cells and choose the shared prefix.
+
+    Returns the snapshot (not yet warmed), each submission's code sources and
+    each submission's matching prefix length. Unreadable notebooks are left
+    out so they fall back to the regular grading path.
+    """
+    snapshot = PreludeSnapshot.from_template(template)
+    sources: Dict[Path, List[str]] = {}
+    prefixes: Dict[Path, int] = {}
+    for path in submissions:
+        try:
+            nb = nbformat.read(path, as_version=4)
+        except Exception:
+            continue
+        sources[path] = code_sources(nb)
+        prefixes[path] = snapshot.matching_prefix(sources[path])
+
+    snapshot.choose_length(list(prefixes.values()))
+    return snapshot, sources, prefixes
@@ -5,6 +5,8 @@ Grader entrypoint that runs entirely inside the Docker container.
 Responsibilities:
 - Load instructor solution notebook: /workspace/solution.ipynb
 - Load student notebook:          /workspace/student.ipynb
+- Statically scan the identity cells first; a notebook that certainly
+  keeps the instructor defaults is rejected without being executed
 - Execute all student cells into a single namespace (with input/os.kill patched)
 - Extract student `name` and `roll_number`:
     * First from the executed namespace
@@ -12,17 +14,24 @@ Responsibilities:
     * If still missing, fall back to instructor defaults
     * If still equal to instructor defaults, treat as “not filled” and emit a fatal result
 - For each question in the solution:
-    * Run `ComparisonService.run_assertions(...)` in that namespace
-- Write /workspace/results.json with:
+    * Run `ComparisonService.run_question(...)` in a per-question overlay of
+      that namespace, or in a forked child when QUESTION_ISOLATION=fork
+    * With SKIP_UNATTEMPTED=1, questions whose function is still the
+      template's `pass` stub (read from TEMPLATE_STUBS if set) are scored
+      "not attempted" without running their assertions
+    * Questions whose function fingerprint is already in the memo at
+      RESULT_MEMO (if set) reuse the stored rows
+- Write /workspace/results.json as a compact `ExecutionResult` envelope:
     {
-      "student": {"name": ..., "roll_number": ...},
-      "results": [ {question, assertion, status, error, score, description}, ... ]
+      "student_path": "student.ipynb", "name": ..., "roll_number": ...,
+      "success": ..., "errors": [...],
+      "results": [ {question, assertion, status, score, error, description}, ... ],
+      "memo_entries": {key: rows}   # new memo entries, when RESULT_MEMO is set
     }
 """
 
 from __future__ import annotations
 
-import ast
 import builtins
 import json
 import os
@@ -43,8 +52,25 @@ from typing import Any, Dict, List, Tuple
 
 import nbformat
 
+from instantgrade.core.models import ExecutionResult
 from instantgrade.evaluators.python.ingestion.solution_ingestion import SolutionIngestion
 from instantgrade.evaluators.python.comparison.comparison_service import ComparisonService
+from instantgrade.evaluators.python.comparison.memo import ResultMemo
+from instantgrade.evaluators.python.ingestion.identity_scan import (
+    MISSING_IDENTITY_MESSAGE,
+    extract_name_roll_from_cells,
+    scan_identity,
+)
+from instantgrade.evaluators.python.ingestion.template_diff import (
+    grade_attempted,
+    untouched_questions,
+)
+from instantgrade.evaluators.python.execution.forking import (
+    fork_supported,
+    grade_questions_forked,
+)
+
+STUDENT_FILE = "student.ipynb"
 
 
 def log(msg: str) -> None:
@@ -127,58 +153,40 @@ def extract_name_roll_from_ns(ns: Dict[str, Any]) -> Tuple[str | None, str | Non
     return None, None
 
 
-def extract_name_roll_from_cells(nb_path: Path) -> Tuple[str | None, str | None]:
-    """
-    Fallback: scan code cells with AST for assignments like:
-
-        name = "Alice"
-        roll_number = "23BDS001"
-
-    Returns (name, roll_number) or (None, None).
-    """
-    try:
-        nb = nbformat.read(nb_path, as_version=4)
-    except Exception:
-        return None, None
-
-    found_name = None
-    found_roll = None
-
-    for idx, cell in enumerate(nb.cells):
-        if cell.cell_type != "code":
-            continue
-        src = cell.get("source", "")
-        if not src.strip():
-            continue
-
-        try:
-            tree = ast.parse(src)
-        except Exception:
-            continue
-
-        for node in tree.body:
-            if isinstance(node, ast.Assign):
-                for tgt in node.targets:
-                    if isinstance(tgt, ast.Name):
-                        if tgt.id == "name" and isinstance(node.value, (ast.Constant, ast.Str)):
-                            # ast.Str for <3.8 compatibility, ast.Constant for newer
-                            val = getattr(node.value, "s", None) or getattr(
-                                node.value, "value", None
-                            )
-                            if isinstance(val, str):
-                                found_name = val
-                                log(f"Found name='{val}' in cell {idx}")
-                        if tgt.id == "roll_number" and isinstance(
-                            node.value, (ast.Constant, ast.Str)
-                        ):
-                            val = getattr(node.value, "s", None) or getattr(
-                                node.value, "value", None
-                            )
-                            if isinstance(val, str):
-                                found_roll = val
-                                log(f"Found roll_number='{val}' in cell {idx}")
-
-    return found_name, found_roll
+def write_results(
+    results_path: Path, result: ExecutionResult, extra: Dict[str, Any] | None = None
+) -> None:
+    """Write the result envelope as compact JSON (plus out-of-band `extra` keys)."""
+    obj = result.to_json_obj()
+    obj.update(extra or {})
+    results_path.write_text(
+        json.dumps(obj, separators=(",", ":"), ensure_ascii=False), encoding="utf-8"
+    )
+
+
+def write_identity_failure(
+    results_path: Path, name: str, roll: str, exec_errors: List[str]
+) -> None:
+    """Write a minimal results.json so the host sees a structured identity error."""
+    result = ExecutionResult(
+        STUDENT_FILE,
+        name=name,
+        roll_number=roll,
+        success=False,
+        errors=exec_errors,
+        results=[
+            {
+                "question": "_identity_check_",
+                "assertion": "[missing student identity]",
+                "status": "failed",
+                "error": MISSING_IDENTITY_MESSAGE,
+                "score": 0,
+                "description": "Student did not customize name/roll_number.",
+            }
+        ],
+        rejected=True,
+    )
+    write_results(results_path, result)
 
 
 # ---------------------------------------------------------------------------
@@ -190,7 +198,7 @@ def main() -> None:
     log("Starting grading...")
 
     solution_path = Path("/workspace/solution.ipynb")
-    student_path = Path("/workspace/student.ipynb")
+    student_path = Path("/workspace") / STUDENT_FILE
     results_path = Path("/workspace/results.json")
 
     # -----------------------------------------------------------------------
@@ -219,6 +227,19 @@ def main() -> None:
     default_roll = sol_meta.get("roll_number", "student roll number")
     log(f"Instructor defaults -> name='{default_name}', roll='{default_roll}'")
 
+    # Cheap static check first: a notebook that certainly keeps the default
+    # identity is rejected without executing any student code.
+    scan = scan_identity(student_path)
+    if scan.is_unpersonalized(default_name, default_roll):
+        log("❌ Fatal: identity cells still hold instructor defaults. Skipping execution.")
+        write_identity_failure(
+            results_path,
+            scan.name or default_name,
+            scan.roll_number or default_roll,
+            [],
+        )
+        return
+
     # -----------------------------------------------------------------------
     # 2. Execute student notebook into a namespace
     # -----------------------------------------------------------------------
@@ -232,6 +253,7 @@ def main() -> None:
     if not name or not roll:
         log("Missing name/roll in namespace, scanning code cells...")
         cell_name, cell_roll = extract_name_roll_from_cells(student_path)
+        log(f"Found in cells -> name={cell_name!r}, roll={cell_roll!r}")
         if cell_name and not name:
             name = cell_name
         if cell_roll and not roll:
@@ -247,29 +269,8 @@ def main() -> None:
 
     # If they still match defaults, treat as not filled and return a single fatal result
     if name == default_name or roll == default_roll:
-        msg = (
-            "Student notebook missing personalized name/roll_number. "
-            "Please define:\n\n"
-            "name = 'Your Name'\n"
-            "roll_number = 'Your Roll Number'\n"
-        )
         log("❌ Fatal: student identity still matches instructor defaults. Skipping assertions.")
-        # Write a minimal results.json so host sees a structured error
-        output = {
-            "student": {"name": name, "roll_number": roll},
-            "results": [
-                {
-                    "question": "_identity_check_",
-                    "assertion": "[missing student identity]",
-                    "status": "failed",
-                    "error": msg,
-                    "score": 0,
-                    "description": "Student did not customize name/roll_number.",
-                }
-            ],
-            "execution_errors": exec_errors,
-        }
-        results_path.write_text(json.dumps(output, indent=2), encoding="utf-8")
+        write_identity_failure(results_path, name, roll, exec_errors)
         return
 
     # -----------------------------------------------------------------------
@@ -284,42 +285,65 @@ def main() -> None:
     except ValueError:
         question_timeout = 20
 
-    for qname, qdata in questions.items():
-        log(f"Evaluating question: {qname}")
-        context_code = qdata.get("context_code", "") or ""
-        assertions = qdata.get("tests", []) or []
-        description = qdata.get("description", "") or ""
+    # QUESTION_ISOLATION: "overlay" (default) grades every question in-process
+    # in its own overlay namespace; "fork" grades each group of
+    # QUESTION_FORK_GROUP questions in a forked child of this process.
+    isolation = os.environ.get("QUESTION_ISOLATION", "overlay").strip().lower()
+    try:
+        fork_group = int(os.environ.get("QUESTION_FORK_GROUP", "1"))
+    except ValueError:
+        fork_group = 1
+    try:
+        memory_limit_mb = int(os.environ.get("QUESTION_MEMORY_MB", "0")) or None
+    except ValueError:
+        memory_limit_mb = None
 
-        try:
-            res = comp.run_assertions(
-                student_namespace=ns,
-                assertions=assertions,
-                question_name=qname,
-                context_code=context_code,
-                timeout=question_timeout,  # accepted (ignored or used) by ComparisonService
+    def grade_question(qname: str, qdata: Dict[str, Any]) -> List[Dict[str, Any]]:
+        log(f"Evaluating question: {qname}")
+        return comp.run_question(qname, qdata, ns, timeout=question_timeout)
+
+    def grade_questions(qs: Dict[str, Dict[str, Any]]) -> List[Dict[str, Any]]:
+        if isolation == "fork" and fork_supported():
+            log(f"Grading questions in forked children (group size {fork_group})")
+            return grade_questions_forked(
+                qs,
+                grade_question,
+                group_size=fork_group,
+                timeout=question_timeout,
+                memory_limit_mb=memory_limit_mb,
             )
-        except Exception:
-            tb = traceback.format_exc()
-            log(f"❌ Error in ComparisonService for question {qname}:")
-            log(tb)
-            res = [
-                {
-                    "question": qname,
-                    "assertion": "[comparison error]",
-                    "status": "failed",
-                    "error": tb,
-                    "score": 0,
-                }
-            ]
-
-        # Attach description to every row
-        for r in res:
-            r["description"] = description
-
-        # Log a short summary of results for this question to aid debugging
+        rows: List[Dict[str, Any]] = []
+        for qname, qdata in qs.items():
+            rows.extend(grade_question(qname, qdata))
+        return rows
+
+    # RESULT_MEMO: snapshot of the host's function-fingerprint memo
+    memo_path = os.environ.get("RESULT_MEMO")
+    memo = ResultMemo(memo_path) if memo_path else None
+    if memo is not None:
+
+        def grade_questions(qs: Dict[str, Dict[str, Any]], _grade=grade_questions):
+            return memo.grade(qs, ns, _grade)
+
+    # SKIP_UNATTEMPTED: questions whose function is still the template's
+    # `pass` stub are scored "not attempted" without running their assertions
+    untouched = set()
+    if os.environ.get("SKIP_UNATTEMPTED", "0") == "1":
+        stubs_path = os.environ.get("TEMPLATE_STUBS")
+        stubs = json.loads(Path(stubs_path).read_text()) if stubs_path else None
+        untouched = untouched_questions(student_path, questions, stubs)
+    if untouched:
+        log(f"Not attempted (template stub unchanged): {sorted(untouched)}")
+    all_results = grade_attempted(questions, untouched, grade_questions)
+    if memo is not None:
+        log(f"Memo: {memo.hits} reused, {memo.misses} graded, {memo.bypassed} bypassed")
+
+    # Log a short summary of results per question to aid debugging
+    for qname in questions:
         try:
+            res = [r for r in all_results if r.get("question") == qname]
             passed = sum(1 for r in res if r.get("score", 0) and float(r.get("score", 0)) > 0)
-            failed = sum(1 for r in res if not (r.get("score", 0) and float(r.get("score", 0)) > 0))
+            failed = len(res) - passed
             log(f"Question {qname}: {len(res)} assertions — passed={passed}, failed={failed}")
             # Also show a sample of first few scores for visibility
             sample_scores = [r.get("score", 0) for r in res[:5]]
@@ -328,19 +352,21 @@ def main() -> None:
             # Don't let logging interfere with grading
             pass
 
-        all_results.extend(res)
-
     # -----------------------------------------------------------------------
     # 5. Write results.json
     # -----------------------------------------------------------------------
-    output = {
-        "student": {"name": name, "roll_number": roll},
-        "results": all_results,
-        "execution_errors": exec_errors,
-    }
+    result = ExecutionResult(
+        STUDENT_FILE,
+        name=name,
+        roll_number=roll,
+        success=not exec_errors,
+        errors=exec_errors,
+        results=all_results,
+    )
+    extra = {"memo_entries": memo.take_added()} if memo is not None else None
 
     try:
-        results_path.write_text(json.dumps(output, indent=2), encoding="utf-8")
+        write_results(results_path, result, extra)
         log(f"results.json written with {len(all_results)} rows.")
     except Exception:
         tb = traceback.format_exc()
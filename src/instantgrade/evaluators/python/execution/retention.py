@@ -0,0 +1,110 @@
+"""
+Namespace retention after a student has been graded.
+
+Grading needs the student's full namespace, but nothing downstream does:
+reporting only reads `name` / `roll_number`. Keeping every namespace in
+`Evaluator.executed` holds every student's DataFrames in memory until the
+run ends, so the namespace is reduced as soon as a student finishes:
+
+  "keep"     leave the namespace untouched (previous behaviour)
+  "drop"     keep only the identity fields
+  "summary"  identity fields verbatim, every other name as its type and
+             size (len / shape)
+  "spill"    pickle every picklable value to `<spill_dir>/<notebook>.pkl`
+             and keep a summary; `load_spilled_namespace` reads it back
+
+Functions defined in a notebook keep their globals alive through a
+reference cycle, so a `gc.collect()` follows every reduction.
+"""
+
+import gc
+import pickle
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+RETENTION_POLICIES = ("keep", "drop", "summary", "spill")
+
+_IDENTITY_NAMES = ("name", "roll_number")
+
+
+def _identity(ns: Dict[str, Any]) -> Dict[str, Any]:
+    # Kept as text whatever the literal (e.g. an int roll number)
+    return {k: str(ns[k]) for k in _IDENTITY_NAMES if ns.get(k) is not None}
+
+
+def describe_value(value: Any) -> Dict[str, Any]:
+    """Type and size of one namespace value, without keeping the value."""
+    cls = type(value)
+    info: Dict[str, Any] = {"type": f"{cls.__module__}.{cls.__qualname__}"}
+    shape = getattr(value, "shape", None)
+    if isinstance(shape, tuple):
+        info["size"] = [int(n) if isinstance(n, int) else str(n) for n in shape]
+    else:
+        try:
+            info["size"] = len(value)
+        except Exception:
+            info["size"] = None
+    return info
+
+
+def summarize_namespace(ns: Dict[str, Any]) -> Dict[str, Any]:
+    """Identity fields verbatim plus a type/size description of every other name."""
+    summary: Dict[str, Any] = _identity(ns)
+    for key, value in ns.items():
+        if key in summary or key.startswith("__"):
+            continue
+        summary[key] = describe_value(value)
+    return summary
+
+
+def spill_namespace(ns: Dict[str, Any], path: Path) -> int:
+    """Pickle every picklable value of `ns` to `path`; returns how many were written."""
+    payload: Dict[str, bytes] = {}
+    for key, value in ns.items():
+        if key.startswith("__"):
+            continue
+        try:
+            payload[key] = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception:
+            # Functions/classes defined in the notebook, open handles, ...
+            continue
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "wb") as fh:
+        pickle.dump(payload, fh, protocol=pickle.HIGHEST_PROTOCOL)
+    return len(payload)
+
+
+def load_spilled_namespace(path: str | Path) -> Dict[str, Any]:
+    """Load a namespace written by the "spill" policy (trusted files only)."""
+    with open(path, "rb") as fh:
+        payload = pickle.load(fh)
+    return {key: pickle.loads(data) for key, data in payload.items()}
+
+
+def apply_retention(
+    result: Dict[str, Any], policy: str = "summary", spill_dir: Optional[Path] = None
+) -> Dict[str, Any]:
+    """Reduce `result["execution"]["namespace"]` in place according to `policy`."""
+    if policy not in RETENTION_POLICIES:
+        raise ValueError(f"Unknown namespace retention policy: {policy!r}")
+    execution = result.get("execution")
+    if policy == "keep" or not isinstance(execution, dict) or "namespace" not in execution:
+        return result
+
+    ns = execution.get("namespace") or {}
+    if policy == "drop":
+        execution["namespace"] = _identity(ns)
+    else:
+        if policy == "spill" and ns:
+            stem = Path(str(result.get("student_path", "student"))).stem
+            target = Path(spill_dir or ".") / f"{stem}.pkl"
+            try:
+                spill_namespace(ns, target)
+                execution["namespace_file"] = str(target)
+            except OSError:
+                pass
+        execution["namespace"] = summarize_namespace(ns)
+
+    del ns
+    gc.collect()
+    return result
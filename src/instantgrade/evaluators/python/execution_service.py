@@ -1,10 +1,17 @@
 from pathlib import Path
 import os
 import shutil
-import copy
-import traceback
 from instantgrade.evaluators.python.notebook_executor import NotebookExecutor
 from instantgrade.evaluators.python.comparison.comparison_service import ComparisonService
+from instantgrade.evaluators.python.ingestion.identity_scan import scan_identity
+from instantgrade.evaluators.python.ingestion.template_diff import (
+    grade_attempted,
+    untouched_questions,
+)
+from instantgrade.evaluators.python.execution.forking import (
+    fork_supported,
+    grade_questions_forked,
+)
 from instantgrade.utils.logger import setup_logger
 
 
@@ -16,11 +23,41 @@ class ExecutionService:
     - Detect environment (Docker or local).
     - Dispatch execution to the appropriate backend.
     - Handle notebooks, Excel files, and future formats uniformly.
+
+    `isolation` selects how questions are separated when running locally:
+    "overlay" (default) grades each question in-process in its own overlay
+    namespace; "fork" grades each group of `fork_group_size` questions in a
+    forked child so a crash or sys.exit() only affects that group.
+    `timeout` bounds the notebook run; `per_question_timeout` and
+    `question_memory_mb` bound each question (and each forked child).
+    An optional `ResultMemo` lets identical function implementations reuse
+    earlier question results. With `skip_unattempted`, questions whose
+    function is still the template stub (`template_stubs`, or the stubs
+    rebuilt from the solution) are scored "not attempted" without grading.
     """
 
-    def __init__(self, timeout: int = 60, debug: bool = False, logger=None):
+    def __init__(
+        self,
+        timeout: int = 60,
+        debug: bool = False,
+        logger=None,
+        isolation: str = "overlay",
+        fork_group_size: int = 1,
+        memo=None,
+        per_question_timeout: int = 20,
+        question_memory_mb=None,
+        skip_unattempted: bool = False,
+        template_stubs=None,
+    ):
         self.timeout = timeout
+        self.per_question_timeout = per_question_timeout
+        self.question_memory_mb = question_memory_mb
         self.debug = debug
+        self.isolation = isolation
+        self.fork_group_size = fork_group_size
+        self.memo = memo
+        self.skip_unattempted = skip_unattempted
+        self.template_stubs = template_stubs
         self.logger = logger or setup_logger(level="normal")
 
         # Decide environment automatically
@@ -53,7 +90,15 @@ class ExecutionService:
                 )
 
                 executor = ExecutionServiceDocker(
-                    timeout=self.timeout, debug=self.debug, logger=self.logger
+                    per_question_timeout=self.per_question_timeout,
+                    question_memory_mb=self.question_memory_mb,
+                    debug=self.debug,
+                    logger=self.logger,
+                    isolation=self.isolation,
+                    fork_group_size=self.fork_group_size,
+                    memo=self.memo,
+                    skip_unattempted=self.skip_unattempted,
+                    template_stubs=self.template_stubs,
                 )
                 return executor.execute_student(solution, submission_path)
             else:
@@ -71,6 +116,26 @@ class ExecutionService:
         Run a Jupyter notebook directly (no Docker) and evaluate all assertions.
         """
         self.logger.info(f"[ExecutionService] Running locally: {submission_path.name}")
+        meta = solution.get("metadata", {}) or {}
+        default_name = solution.get("default_name", meta.get("name"))
+        default_roll = solution.get("default_roll_number", meta.get("roll_number"))
+
+        # --- Static identity check before executing anything ---
+        scan = scan_identity(submission_path)
+        if scan.is_unpersonalized(default_name, default_roll):
+            msg = (
+                f"Skipping {submission_path.name}: missing or default name/roll_number "
+                f"(name={scan.name}, roll={scan.roll_number}); notebook not executed"
+            )
+            self.logger.warning(msg)
+            return {
+                "student_path": submission_path,
+                "execution": {"namespace": {}, "errors": [], "success": False},
+                "results": [],
+                "skipped": True,
+                "error": msg,
+            }
+
         notebook_exec = NotebookExecutor(timeout=self.timeout)
         student_exec = notebook_exec.run_notebook(submission_path)
         base_ns = student_exec.get("namespace", {})
@@ -78,8 +143,6 @@ class ExecutionService:
         # --- Safety Check for Required Variables ---
         student_name = base_ns.get("name", None)
         roll_number = base_ns.get("roll_number", None)
-        default_name = solution.get("default_name", None)
-        default_roll = solution.get("default_roll_number", None)
 
         if (student_name in [None, "", default_name]) or (roll_number in [None, "", default_roll]):
             msg = (
@@ -96,39 +159,40 @@ class ExecutionService:
             }
 
         comparator = ComparisonService()
-        all_results = []
-
-        for qname, qdata in solution.get("questions", {}).items():
-            ctx_code = qdata.get("context_code", "")
-            assertions = qdata.get("tests", [])
-            description = qdata.get("description", "")
 
+        def grade_question(qname: str, qdata: dict) -> list:
             if self.debug:
-                print(f"[LocalExecution] Evaluating {qname} ({len(assertions)} assertions)")
-
-            q_ns = copy.copy(base_ns)
-            try:
-                q_results = comparator.run_assertions(
-                    student_namespace=q_ns,
-                    assertions=assertions,
-                    question_name=qname,
-                    context_code=ctx_code,
+                n_tests = len(qdata.get("tests", []))
+                print(f"[LocalExecution] Evaluating {qname} ({n_tests} assertions)")
+            # Private writable layer per question; reads resolve to base_ns
+            return comparator.run_question(qname, qdata, base_ns, timeout=self.per_question_timeout)
+
+        def grade_questions(questions: dict) -> list:
+            if self.isolation == "fork" and fork_supported():
+                return grade_questions_forked(
+                    questions,
+                    grade_question,
+                    group_size=self.fork_group_size,
+                    timeout=self.per_question_timeout,
+                    memory_limit_mb=self.question_memory_mb,
                 )
-            except Exception:
-                tb = traceback.format_exc()
-                q_results = [
-                    {
-                        "question": qname,
-                        "assertion": "[internal error]",
-                        "status": "failed",
-                        "error": tb,
-                        "score": 0,
-                    }
-                ]
-
-            for r in q_results:
-                r["description"] = description
-            all_results.extend(q_results)
+            rows = []
+            for qname, qdata in questions.items():
+                rows.extend(grade_question(qname, qdata))
+            return rows
+
+        if self.memo is not None:
+            memo = self.memo
+
+            def grade_questions(questions: dict, _grade=grade_questions) -> list:
+                return memo.grade(questions, base_ns, _grade)
+
+        # Questions still left as the template's `pass` stub are not graded
+        questions = solution.get("questions", {})
+        untouched = set()
+        if self.skip_unattempted:
+            untouched = untouched_questions(submission_path, questions, self.template_stubs)
+        all_results = grade_attempted(questions, untouched, grade_questions)
 
         # Construct unified result dict (same as Docker output)
         return {
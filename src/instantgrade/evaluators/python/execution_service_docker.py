@@ -7,6 +7,7 @@ from pathlib import Path
 from typing import Any, Dict, Optional
 import importlib.util
 
+from instantgrade.core.models import ExecutionResult
 from instantgrade.utils.logger import setup_logger
 
 
@@ -19,6 +20,15 @@ class ExecutionServiceDocker:
       - student's .ipynb
       - grader.py
     Docker performs ingestion, execution, and writes results.json.
+
+    When a `ResultMemo` is given, a snapshot of it is copied into each
+    student's workspace (never mounted, so the container cannot write to the
+    host memo) and the entries the grader adds are merged back from
+    results.json.
+
+    With `skip_unattempted`, the grader scores questions whose function is
+    still the template stub as "not attempted" (SKIP_UNATTEMPTED); the
+    instructor's `template_stubs`, when given, are copied in as stubs.json.
     """
 
     def __init__(
@@ -26,6 +36,7 @@ class ExecutionServiceDocker:
         docker_image: str = "instantgrade:latest",
         base_image: str = "python:3.11-slim",
         per_question_timeout: int = 20,
+        question_memory_mb: Optional[int] = None,
         per_student_timeout: int = 1800,
         memory_limit: str = "1g",
         cpu_limit: str = "1.0",
@@ -33,10 +44,16 @@ class ExecutionServiceDocker:
         network_mode: str = "none",
         debug: bool = False,
         logger=None,
+        isolation: str = "overlay",
+        fork_group_size: int = 1,
+        memo=None,
+        skip_unattempted: bool = False,
+        template_stubs: Optional[Dict[str, str]] = None,
     ):
         self.docker_image = docker_image
         self.base_image = base_image
         self.per_question_timeout = per_question_timeout
+        self.question_memory_mb = question_memory_mb
         self.per_student_timeout = per_student_timeout
         self.memory_limit = memory_limit
         self.cpu_limit = cpu_limit
@@ -44,6 +61,14 @@ class ExecutionServiceDocker:
         self.network_mode = network_mode
         self.debug = debug
         self.logger = logger or setup_logger(level="normal")
+        # Question isolation inside the container ("overlay" or "fork"),
+        # forwarded to grader.py via QUESTION_ISOLATION / QUESTION_FORK_GROUP;
+        # question_memory_mb caps each forked child via QUESTION_MEMORY_MB
+        self.isolation = isolation
+        self.fork_group_size = fork_group_size
+        self.memo = memo
+        self.skip_unattempted = skip_unattempted
+        self.template_stubs = template_stubs
 
     # ------------------------------------------------------------------
     def execute_student(self, solution_path: Path, submission_path: Path) -> Dict[str, Any]:
@@ -65,6 +90,18 @@ class ExecutionServiceDocker:
             grader_path = self._get_grader_source()
             shutil.copy(grader_path, tmpdir_path / "grader.py")
 
+            memo_env = []
+            if self.memo is not None:
+                self.memo.save(tmpdir_path / "memo.json")
+                memo_env = ["-e", "RESULT_MEMO=/workspace/memo.json"]
+            if self.question_memory_mb:
+                memo_env += ["-e", f"QUESTION_MEMORY_MB={int(self.question_memory_mb)}"]
+            if self.skip_unattempted:
+                memo_env += ["-e", "SKIP_UNATTEMPTED=1"]
+                if self.template_stubs is not None:
+                    (tmpdir_path / "stubs.json").write_text(json.dumps(self.template_stubs))
+                    memo_env += ["-e", "TEMPLATE_STUBS=/workspace/stubs.json"]
+
             # Build docker command
             cmd = [
                 "docker",
@@ -80,6 +117,11 @@ class ExecutionServiceDocker:
                 self.network_mode,
                 "-e",
                 f"QUESTION_TIMEOUT={self.per_question_timeout}",
+                "-e",
+                f"QUESTION_ISOLATION={self.isolation}",
+                "-e",
+                f"QUESTION_FORK_GROUP={self.fork_group_size}",
+                *memo_env,
                 "-v",
                 f"{tmpdir_path}:/workspace",
                 "-w",
@@ -143,9 +185,10 @@ class ExecutionServiceDocker:
                 self.logger.warning(msg)
                 return self._make_error_result(submission_path, msg, total_elapsed, full_stdout)
 
-            # Parse results.json
+            # Parse results.json (an ExecutionResult envelope)
             try:
                 graded = json.loads(results_file.read_text(encoding="utf-8"))
+                result = ExecutionResult.from_json_obj(graded)
             except Exception as e:
                 self.logger.exception(
                     f"Failed to parse results.json for {submission_path.name}: {e}"
@@ -154,9 +197,16 @@ class ExecutionServiceDocker:
                     submission_path, f"Invalid results.json: {e}", total_elapsed, full_stdout
                 )
 
+            if self.memo is not None:
+                self.memo.merge(graded.get("memo_entries"))
+
+            result.student_path = str(submission_path)
+            result.elapsed = total_elapsed
+            result.stdout = full_stdout
+
             # Emit host-side log summary of graded results for debugging
             try:
-                results_list = graded.get("results", []) or []
+                results_list = result.results
                 cnt = len(results_list)
                 scores = [r.get("score", 0) for r in results_list]
                 passed = sum(1 for s in scores if s and float(s) > 0)
@@ -168,18 +218,7 @@ class ExecutionServiceDocker:
             except Exception:
                 pass
 
-            return {
-                "student_path": submission_path,
-                "execution": {
-                    "success": True,
-                    "errors": [],
-                    "docker_stdout": full_stdout,
-                    "docker_stderr": "",
-                    "elapsed": total_elapsed,
-                    "student_meta": graded.get("student", {}),
-                },
-                "results": graded.get("results", []),
-            }
+            return result.to_dict()
 
     # ------------------------------------------------------------------
     def ensure_docker_image_exists(self, force_rebuild: bool = False):
@@ -335,15 +374,12 @@ WORKDIR /workspace
         elapsed: float,
         stdout: str = "",
     ) -> dict:
-        return {
-            "student_path": submission_path,
-            "execution": {
-                "success": False,
-                "errors": [message],
-                "docker_stdout": stdout,
-                "docker_stderr": "",
-                "elapsed": elapsed,
-                "student_meta": {"name": "Unknown", "roll_number": "N/A"},
-            },
-            "results": [],
-        }
+        return ExecutionResult(
+            submission_path,
+            name="Unknown",
+            roll_number="N/A",
+            success=False,
+            errors=[message],
+            elapsed=elapsed,
+            stdout=stdout,
+        ).to_dict()
@@ -0,0 +1,190 @@
+"""
+Static identity pre-scan.
+
+Reads each submission's code cells with `ast` (nothing is executed) to find
+the student's `name` / `roll_number` assignments. A notebook whose identity
+is certainly still the instructor's default is rejected before any
+interpreter or sandbox is started for it.
+
+The scan is only certain when every binding of `name` / `roll_number` is a
+top-level literal assignment and nothing else could rebind them (`exec`,
+`globals()`, star imports, loops, function calls, ...). Anything dynamic is
+left to the post-execution check in the grading backends.
+"""
+
+import ast
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import nbformat
+
+_IDENTITY_NAMES = ("name", "roll_number")
+_DYNAMIC_CALLS = {"exec", "eval", "globals", "setattr", "vars", "__import__"}
+
+MISSING_IDENTITY_MESSAGE = (
+    "Student notebook missing personalized name/roll_number. "
+    "Please define:\n\n"
+    "name = 'Your Name'\n"
+    "roll_number = 'Your Roll Number'\n"
+)
+
+
+class IdentityScan:
+    """Result of statically scanning one notebook for its identity."""
+
+    __slots__ = ("path", "name", "roll_number", "dynamic", "readable")
+
+    def __init__(
+        self,
+        path: Path,
+        name: Optional[str] = None,
+        roll_number: Optional[str] = None,
+        dynamic: bool = False,
+        readable: bool = True,
+    ):
+        self.path = path
+        self.name = name
+        self.roll_number = roll_number
+        self.dynamic = dynamic
+        self.readable = readable
+
+    def is_unpersonalized(self, default_name: Optional[str], default_roll: Optional[str]) -> bool:
+        """
+        True only when the notebook certainly keeps (or never sets) the
+        default identity, mirroring the grader's fallback to the defaults.
+        """
+        if not self.readable or self.dynamic:
+            return False
+        name = self.name or default_name
+        roll = self.roll_number or default_roll
+        return name == default_name or roll == default_roll
+
+
+def extract_name_roll_from_cells(nb_path: Path) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Scan code cells with AST for assignments like:
+
+        name = "Alice"
+        roll_number = "23BDS001"
+
+    Returns (name, roll_number) or (None, None); the last assignment wins.
+    """
+    scan = scan_identity(nb_path)
+    return scan.name, scan.roll_number
+
+
+def scan_identity(nb_path: Path) -> IdentityScan:
+    """Statically scan one notebook; never raises."""
+    nb_path = Path(nb_path)
+    try:
+        nb = nbformat.read(nb_path, as_version=4)
+    except Exception:
+        return IdentityScan(nb_path, readable=False)
+
+    found: Dict[str, Optional[str]] = {"name": None, "roll_number": None}
+    dynamic = False
+
+    for cell in nb.cells:
+        if cell.cell_type != "code":
+            continue
+        src = cell.get("source", "")
+        if not src.strip():
+            continue
+        try:
+            tree = ast.parse(src)
+        except SyntaxError:
+            # IPython magics / shell escapes: cannot rule out a rebinding
+            if any(n in src for n in _IDENTITY_NAMES):
+                dynamic = True
+            continue
+
+        literal_targets = set()
+        for node in tree.body:
+            if (
+                isinstance(node, ast.Assign)
+                and len(node.targets) == 1
+                and isinstance(node.targets[0], ast.Name)
+                and node.targets[0].id in _IDENTITY_NAMES
+            ):
+                value = node.value
+                if isinstance(value, ast.Constant) and isinstance(value.value, str):
+                    found[node.targets[0].id] = value.value
+                    literal_targets.add(id(node.targets[0]))
+                else:
+                    dynamic = True
+
+        for node in ast.walk(tree):
+            if (
+                isinstance(node, ast.Name)
+                and isinstance(node.ctx, (ast.Store, ast.Del))
+                and node.id in _IDENTITY_NAMES
+                and id(node) not in literal_targets
+            ):
+                dynamic = True
+            elif isinstance(node, (ast.Global, ast.Nonlocal)) and any(
+                n in _IDENTITY_NAMES for n in node.names
+            ):
+                dynamic = True
+            elif isinstance(node, ast.ImportFrom) and any(
+                a.name == "*" or (a.asname or a.name) in _IDENTITY_NAMES for a in node.names
+            ):
+                dynamic = True
+            elif isinstance(node, ast.Import) and any(
+                (a.asname or a.name) in _IDENTITY_NAMES for a in node.names
+            ):
+                dynamic = True
+            elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                if node.name in _IDENTITY_NAMES:
+                    dynamic = True
+            elif (
+                isinstance(node, ast.Call)
+                and isinstance(node.func, ast.Name)
+                and node.func.id in _DYNAMIC_CALLS
+            ):
+                dynamic = True
+
+    return IdentityScan(nb_path, found["name"], found["roll_number"], dynamic)
+
+
+def prescan_submissions(paths: List[Path], workers: int = 1) -> List[IdentityScan]:
+    """
+    Scan every submission, in parallel across `workers` processes when
+    more than one is requested. Results keep the order of `paths`.
+    """
+    paths = [Path(p) for p in paths]
+    if workers and workers > 1 and len(paths) > 1:
+        try:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                chunk = max(1, len(paths) // (workers * 4))
+                return list(pool.map(scan_identity, paths, chunksize=chunk))
+        except (OSError, RuntimeError):
+            # No process pool available (restricted sandboxes); scan inline
+            pass
+    return [scan_identity(p) for p in paths]
+
+
+def rejected_result(scan: IdentityScan, default_name: str, default_roll: str) -> Dict:
+    """Result dict for a notebook rejected by the pre-scan (same shape as graded ones)."""
+    return {
+        "student_path": scan.path,
+        "execution": {
+            "success": False,
+            "errors": [MISSING_IDENTITY_MESSAGE],
+            "student_meta": {
+                "name": scan.name or default_name,
+                "roll_number": scan.roll_number or default_roll,
+            },
+        },
+        "results": [
+            {
+                "question": "_identity_check_",
+                "assertion": "[missing student identity]",
+                "status": "failed",
+                "error": MISSING_IDENTITY_MESSAGE,
+                "score": 0,
+                "description": "Student did not customize name/roll_number.",
+            }
+        ],
+        "rejected": True,
+    }
@@ -1,8 +1,15 @@
 import nbformat
 import ast
+import logging
 from pathlib import Path
 from collections import OrderedDict
 from instantgrade.utils.io_utils import safe_load_notebook
+from instantgrade.evaluators.python.comparison.differential import (
+    build_arg_specs,
+    parse_directive,
+)
+
+logger = logging.getLogger("instantgrade")
 
 
 class SolutionIngestion:
@@ -27,6 +34,9 @@ class SolutionIngestion:
 
         total_assertions = 0
         total_questions = 0
+        # Solution code a question's reference runs on top of: setup cells
+        # (imports, helpers, data) and the functions of earlier questions
+        setup_sources = []
 
         i = 0
         while i < len(nb.cells):
@@ -37,6 +47,7 @@ class SolutionIngestion:
                 description = cell.source.strip().split("\n", 1)[-1].strip()
 
                 func_name, func_src, context_code, assert_lines = None, None, "", []
+                differential = None
 
                 # Step 2: Next cell (function definition)
                 if i + 1 < len(nb.cells):
@@ -54,6 +65,8 @@ class SolutionIngestion:
                             stripped = line.strip()
                             if stripped.startswith("assert "):
                                 assert_lines.append(stripped)
+                            elif parse_directive(stripped) is not None:
+                                differential = parse_directive(stripped)
                             else:
                                 setup_lines.append(line)
                         context_code = "\n".join(setup_lines)
@@ -63,15 +76,35 @@ class SolutionIngestion:
                         "description": description,
                         "function": func_src,
                         "context_code": context_code,
+                        "reference_setup": list(setup_sources),
                         "tests": assert_lines,
                         "assert_count": len(assert_lines),
                     }
+                    setup_sources.append(func_src)
                     total_questions += 1
                     total_assertions += len(assert_lines)
 
+                    # Optional differential testing: counts as one extra
+                    # (fractionally scored) assertion for the question.
+                    if differential is not None:
+                        arg_specs = build_arg_specs(func_src, func_name, assert_lines)
+                        if arg_specs is not None:
+                            differential["arg_specs"] = arg_specs
+                            questions[func_name]["differential"] = differential
+                            total_assertions += 1
+                        else:
+                            logger.warning(
+                                f"Differential testing disabled for question '{func_name}': "
+                                f"could not infer argument types of {func_name}(); annotate "
+                                "its parameters or add literal sample calls to its assertions."
+                            )
+
                 i += 3
                 continue
 
+            if cell.cell_type == "code" and cell.source.strip():
+                setup_sources.append(cell.source)
+
             # Extract metadata (instructor info)
             if cell.cell_type == "code" and "name" in cell.source and "roll_number" in cell.source:
                 try:
@@ -0,0 +1,156 @@
+"""
+Submission de-duplication.
+
+Large classes contain many notebooks whose code is identical: resubmissions,
+copies and untouched templates. Each notebook's code cells are normalized
+(outputs, execution counts and metadata are never read; formatting and
+comments are removed by round-tripping through the AST) and hashed.
+Submissions with the same hash are graded once and the results are fanned
+out to every member of the group.
+
+Literal `name = ...` / `roll_number = ...` assignments are left out of the
+hash so identical work submitted by different students still groups; the
+identity of every submission is taken from its own assignments. When any
+code reads those names the assignments stay in the hash, so only truly
+identical notebooks group.
+"""
+
+import ast
+import copy
+import hashlib
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import nbformat
+
+_IDENTITY_NAMES = ("name", "roll_number")
+
+
+class SubmissionFingerprint:
+    """Normalized code hash plus the literal identity found in the notebook."""
+
+    __slots__ = ("path", "digest", "name", "roll_number")
+
+    def __init__(self, path: Path, digest: str, name: Optional[str], roll_number: Optional[str]):
+        self.path = path
+        self.digest = digest
+        self.name = name
+        self.roll_number = roll_number
+
+
+def _identity_assignment(node: ast.stmt) -> Optional[Tuple[str, Any]]:
+    if (
+        isinstance(node, ast.Assign)
+        and len(node.targets) == 1
+        and isinstance(node.targets[0], ast.Name)
+        and node.targets[0].id in _IDENTITY_NAMES
+        and isinstance(node.value, ast.Constant)
+    ):
+        return node.targets[0].id, node.value.value
+    return None
+
+
+def fingerprint_notebook(path: Path) -> Optional[SubmissionFingerprint]:
+    """Hash the normalized code cells of `path`; None if it cannot be read."""
+    try:
+        nb = nbformat.read(path, as_version=4)
+    except Exception:
+        return None
+
+    trees: List[Any] = []
+    identity: Dict[str, Any] = {}
+    reads_identity = False
+
+    for cell in nb.cells:
+        if cell.cell_type != "code":
+            continue
+        src = cell.get("source", "")
+        if not src.strip():
+            continue
+        try:
+            tree = ast.parse(src)
+        except SyntaxError:
+            # Keep unparsable cells verbatim (modulo trailing whitespace)
+            trees.append("\n".join(line.rstrip() for line in src.strip().splitlines()))
+            continue
+        for node in tree.body:
+            found = _identity_assignment(node)
+            if found:
+                identity[found[0]] = found[1]
+        reads_identity = reads_identity or any(
+            isinstance(n, ast.Name) and isinstance(n.ctx, ast.Load) and n.id in _IDENTITY_NAMES
+            for n in ast.walk(tree)
+        )
+        trees.append(tree)
+
+    h = hashlib.sha256()
+    for tree in trees:
+        if isinstance(tree, str):
+            h.update(tree.encode("utf-8"))
+        else:
+            body = tree.body
+            if not reads_identity:
+                body = [n for n in body if _identity_assignment(n) is None]
+            h.update(ast.dump(ast.Module(body=body, type_ignores=[])).encode("utf-8"))
+        h.update(b"\0")
+
+    name, roll = identity.get("name"), identity.get("roll_number")
+    return SubmissionFingerprint(
+        path,
+        h.hexdigest(),
+        None if name is None else str(name),
+        None if roll is None else str(roll),
+    )
+
+
+def group_submissions(
+    paths: List[Path], default_identity: Tuple[Optional[str], Optional[str]] = (None, None)
+) -> Tuple[List[Path], Dict[Path, List[SubmissionFingerprint]]]:
+    """
+    Group submissions by normalized code.
+
+    Returns (representatives, duplicates) where `representatives` keeps
+    discovery order and `duplicates[rep]` lists the fingerprints of the
+    other submissions that will reuse `rep`'s results. Notebooks still
+    carrying the instructor's default identity never share a group with
+    personalized ones.
+    """
+    first_by_key: Dict[Tuple[str, bool], Path] = {}
+    representatives: List[Path] = []
+    duplicates: Dict[Path, List[SubmissionFingerprint]] = {}
+
+    for path in paths:
+        fp = fingerprint_notebook(path)
+        if fp is None:
+            representatives.append(path)
+            continue
+        defaulted = fp.name == default_identity[0] or fp.roll_number == default_identity[1]
+        key = (fp.digest, defaulted)
+        rep = first_by_key.get(key)
+        if rep is None:
+            first_by_key[key] = path
+            representatives.append(path)
+        else:
+            duplicates.setdefault(rep, []).append(fp)
+
+    return representatives, duplicates
+
+
+def fan_out(result: Dict[str, Any], fp: SubmissionFingerprint) -> Dict[str, Any]:
+    """Copy a representative's result for a duplicate submission."""
+    execution = dict(result.get("execution", {}))
+    meta = dict(execution.get("student_meta", {}) or {})
+    if fp.name:
+        meta["name"] = fp.name
+    if fp.roll_number:
+        meta["roll_number"] = fp.roll_number
+    execution["student_meta"] = meta
+    # The namespace belongs to the representative's run
+    execution.pop("namespace", None)
+
+    dup = dict(result)
+    dup["student_path"] = fp.path
+    dup["execution"] = execution
+    dup["results"] = copy.deepcopy(result.get("results", []))
+    dup["duplicate_of"] = str(result.get("student_path", ""))
+    return dup
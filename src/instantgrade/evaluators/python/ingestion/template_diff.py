@@ -0,0 +1,144 @@
+"""
+Template-diff detection of unattempted questions.
+
+Students receive every graded function as a `pass` stub
+(`io_utils.build_student_template` keeps the signature and replaces the
+body). The stub for a question can therefore be rebuilt from the
+solution's function source alone. A submission whose final top-level
+definition of that function is still AST-identical to the stub (formatting
+and comments are ignored) has not attempted the question: it is scored
+zero with status "not attempted" and none of its assertions are run.
+"""
+
+import ast
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set
+
+import nbformat
+
+from instantgrade.evaluators.python.comparison.comparison_service import question_rows
+
+NOT_ATTEMPTED = "not attempted"
+NOT_ATTEMPTED_MESSAGE = (
+    "Not attempted: the function is still the unmodified template stub, "
+    "so its assertions were not run."
+)
+
+_FUNCTION_DEFS = (ast.FunctionDef, ast.AsyncFunctionDef)
+
+
+def _stub_dump(node: ast.AST) -> str:
+    stub = ast.FunctionDef(
+        name=node.name,
+        args=node.args,
+        body=[ast.Pass()],
+        decorator_list=node.decorator_list,
+        returns=node.returns,
+        type_comment=None,
+    )
+    return ast.dump(stub)
+
+
+def template_stubs(questions: Dict[str, Dict[str, Any]]) -> Dict[str, str]:
+    """Stub fingerprint of every question's function, as distributed to students."""
+    stubs: Dict[str, str] = {}
+    for qname, qdata in questions.items():
+        try:
+            tree = ast.parse(qdata.get("function") or "")
+        except SyntaxError:
+            continue
+        for node in tree.body:
+            if isinstance(node, _FUNCTION_DEFS) and node.name == qname:
+                stubs[qname] = _stub_dump(node)
+    return stubs
+
+
+def _notebook_sources(notebook: Any) -> List[str]:
+    if isinstance(notebook, (str, Path)):
+        notebook = nbformat.read(notebook, as_version=4)
+    return [
+        cell.get("source", "")
+        for cell in notebook.cells
+        if cell.cell_type == "code" and cell.get("source", "").strip()
+    ]
+
+
+def untouched_questions(
+    sources: Iterable[str] | str | Path | nbformat.NotebookNode,
+    questions: Dict[str, Dict[str, Any]],
+    stubs: Optional[Dict[str, str]] = None,
+) -> Set[str]:
+    """
+    Questions whose function the student left as the template stub.
+
+    `sources` is the submission's list of code cell sources, a notebook, or
+    a path to one. Unreadable notebooks report nothing as untouched.
+    """
+    if stubs is None:
+        stubs = template_stubs(questions)
+    if not stubs:
+        return set()
+    try:
+        if not isinstance(sources, (list, tuple)):
+            sources = _notebook_sources(sources)
+    except Exception:
+        return set()
+
+    # Last top-level binding of each question name wins, as at runtime
+    final: Dict[str, Optional[str]] = {}
+    for src in sources:
+        try:
+            tree = ast.parse(src)
+        except SyntaxError:
+            # Cannot tell what the cell binds; treat mentioned questions as attempted
+            for qname in stubs:
+                if qname in src:
+                    final[qname] = None
+            continue
+        for node in tree.body:
+            if isinstance(node, _FUNCTION_DEFS) and node.name in stubs:
+                final[node.name] = _stub_dump(node) if _is_stub_body(node) else None
+            else:
+                for sub in ast.walk(node):
+                    if isinstance(sub, ast.Name) and isinstance(sub.ctx, ast.Store):
+                        if sub.id in stubs:
+                            final[sub.id] = None
+
+    return {q for q, dump in final.items() if dump is not None and dump == stubs[q]}
+
+
+def _is_stub_body(node: ast.AST) -> bool:
+    return len(node.body) == 1 and isinstance(node.body[0], ast.Pass)
+
+
+def not_attempted_rows(question_name: str, question_data: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """One zero-score row per assertion (and differential batch) of the question."""
+    return question_rows(question_name, question_data, NOT_ATTEMPTED, NOT_ATTEMPTED_MESSAGE)
+
+
+def grade_attempted(
+    questions: Dict[str, Dict[str, Any]],
+    untouched: Set[str],
+    grade_questions: Callable[[Dict[str, Dict[str, Any]]], List[Dict[str, Any]]],
+) -> List[Dict[str, Any]]:
+    """
+    Grade only the attempted questions with `grade_questions(subset)` and
+    fill in "not attempted" rows for the rest, keeping question order.
+    """
+    if not untouched:
+        return grade_questions(questions)
+
+    attempted = {q: d for q, d in questions.items() if q not in untouched}
+    by_question: Dict[str, List[Dict[str, Any]]] = {}
+    for row in grade_questions(attempted) if attempted else []:
+        by_question.setdefault(row.get("question"), []).append(row)
+
+    results: List[Dict[str, Any]] = []
+    for qname, qdata in questions.items():
+        if qname in untouched:
+            results.extend(not_attempted_rows(qname, qdata))
+        else:
+            results.extend(by_question.pop(qname, []))
+    for rows in by_question.values():
+        results.extend(rows)
+    return results
@@ -59,12 +59,7 @@ class NotebookExecutor:
         namespace: dict[str, Any] = {}
 
         # Dummy input() override to prevent blocking
-        def dummy_input(prompt=None):
-            msg = "[Warning] input() called during evaluation — ignored."
-            errors.append(msg)
-            return ""
-
-        namespace["input"] = dummy_input
+        namespace["input"] = self.dummy_input(errors)
 
         # Execute all cells safely using nbclient first (for reproducibility)
         try:
@@ -79,6 +74,11 @@ class NotebookExecutor:
             tb_text = traceback.format_exc()
             errors.append(f"[nbclient failure] {str(e)}")
             executed_nb = nb
+            # nbclient keeps the exception on a finished Future; drop its
+            # traceback so it does not pin this frame (and `namespace`) alive.
+            e.__traceback__ = None
+            if e.__context__ is not None:
+                e.__context__.__traceback__ = None
 
         # Sequential execution to rebuild namespace
         for cell in executed_nb.cells:
@@ -87,18 +87,7 @@ class NotebookExecutor:
             src = cell.get("source", "")
             if not src.strip():
                 continue
-            try:
-                # Execute code blocks directly in-process so function
-                # definitions remain available in the returned namespace.
-                # Note: this removes per-cell timeout protection for local
-                # runs; if you need strict timeouts, consider a different
-                # execution strategy (threads or sandboxed processes).
-                code_obj = compile(src, f"<student_cell>", "exec")
-                exec(code_obj, namespace)
-            except Exception as e:
-                # Capture the traceback text for reporting
-                tb = traceback.format_exc()
-                errors.append(f"In cell: {src[:80]} -> {tb}")
+            self.exec_cell(src, namespace, errors)
 
         clean_ns = {k: v for k, v in namespace.items() if not k.startswith("__")}
         return {
@@ -108,6 +97,34 @@ class NotebookExecutor:
             "success": len(errors) == 0,
         }
 
+    # ------------------------------------------------------------------
+    @staticmethod
+    def dummy_input(errors: list[str]):
+        """An input() replacement that records a warning instead of blocking."""
+
+        def dummy_input(prompt=None):
+            msg = "[Warning] input() called during evaluation — ignored."
+            errors.append(msg)
+            return ""
+
+        return dummy_input
+
+    @staticmethod
+    def exec_cell(src: str, namespace: dict[str, Any], errors: list[str]) -> None:
+        """Execute one code cell in `namespace`, recording a failure in `errors`."""
+        try:
+            # Execute code blocks directly in-process so function
+            # definitions remain available in the returned namespace.
+            # Note: this removes per-cell timeout protection for local
+            # runs; if you need strict timeouts, consider a different
+            # execution strategy (threads or sandboxed processes).
+            code_obj = compile(src, "<student_cell>", "exec")
+            exec(code_obj, namespace)
+        except Exception:
+            # Capture the traceback text for reporting
+            tb = traceback.format_exc()
+            errors.append(f"In cell: {src[:80]} -> {tb}")
+
     # ======================================================================
     # Host (non-container) Docker execution
     # ======================================================================
@@ -13,293 +13,137 @@ Features:
  - Preserves error escaping and preformatted error display
 """
 
+import base64
+import gzip
 import html as html_lib
+import json
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
 from io import StringIO
 from pathlib import Path
-from typing import List, Dict, Optional, Tuple
+from typing import Any, Callable, Iterable, List, Dict, Optional, Tuple, Union
 
+import numpy as np
 import pandas as pd
 
-
-class ReportingService:
-    def __init__(
-        self,
-        executed_results: Optional[List[Dict]] = None,
-        solution: Optional[Dict] = None,
-        debug: bool = False,
-        logger=None,
-        total_assertions: int = 0,
-        best_n: Optional[int] = None,
-        scaled_range: Optional[Tuple[float, float]] = None,
-    ):
-        self.debug = debug
-        self.solution = solution or {}
-        self.executed_results = executed_results or []
-        self.logger = logger
-        self.total_assertions = total_assertions or 1
-
-        # Optional Best-N & scaling
-        # If best_n is None or <= 0 -> disable Best-N logic
-        self.best_n = int(best_n) if best_n and int(best_n) > 0 else None
-
-        # scaling is enabled only when scaled_range is provided as a tuple (min, max)
-        if scaled_range and isinstance(scaled_range, (list, tuple)) and len(scaled_range) == 2:
-            self.scaled_range = (float(scaled_range[0]), float(scaled_range[1]))
-            self.scaled_min, self.scaled_max = float(scaled_range[0]), float(scaled_range[1])
-        else:
-            self.scaled_range = None
-            self.scaled_min = None
-            self.scaled_max = None
-
-        # DataFrames
-        self.df: pd.DataFrame = pd.DataFrame()
-        self.attempt_scores_df: pd.DataFrame = pd.DataFrame()
-        self.student_best_df: pd.DataFrame = pd.DataFrame()
-
-        # Build DF immediately
-        self.df = self.dataframe(self.executed_results)
-
-        if self.logger:
-            try:
-                self.logger.info(f"[Reporting] Processed {len(self.df)} result rows.")
-            except Exception:
-                pass
-
-    # -------------------------------------------------------------------------
-    def dataframe(self, executed_results: Optional[List[Dict]] = None) -> pd.DataFrame:
-        executed_results = (
-            executed_results if executed_results is not None else self.executed_results
-        )
-        all_rows = []
-
-        for item in executed_results or []:
-            student_path = Path(item.get("student_path", ""))
-            results = item.get("results", [])
-            ns = item.get("execution", {}).get("namespace", {})
-            meta = item.get("execution", {}).get("student_meta", {})
-
-            student = meta.get("name") or ns.get("name") or student_path.stem or "unknown"
-            roll = meta.get("roll_number") or ns.get("roll_number") or "N/A"
-
-            for r in results:
-                all_rows.append(
-                    {
-                        "file": str(student_path),
-                        "student": student,
-                        "roll_number": roll,
-                        "question": r.get("question"),
-                        "assertion": r.get("assertion"),
-                        "status": r.get("status"),
-                        "score": r.get("score", 0),
-                        "error": r.get("error"),
-                        "description": r.get("description", ""),
-                    }
-                )
-
-        df = pd.DataFrame(all_rows)
-
-        if df.empty:
-            # Ensure structures are defined but empty
-            self.df = df
-            self.attempt_scores_df = pd.DataFrame()
-            self.student_best_df = pd.DataFrame()
-            if self.debug:
-                print("[ReportingService] dataframe: produced empty DataFrame.")
-            return df
-
-        # Normalize columns and compute percents
-        df["max_score"] = 1
-        df["total_possible"] = self.total_assertions
-        df["score"] = df["score"].fillna(0).astype(float)
-        df["percentage"] = (df["score"] / df["max_score"]) * 100
-
-        # Per-question totals per attempt (attempt identified by file + student + roll)
-        q_totals = (
-            df.groupby(["file", "student", "roll_number", "question"], dropna=False)
-            .agg(q_score=("score", "sum"))
-            .reset_index()
-        )
-
-        # If Best-N is enabled, compute best-N totals per attempt and scaling (if enabled)
-        if self.best_n:
-            q_totals_sorted = q_totals.sort_values(
-                ["file", "student", "roll_number", "q_score"], ascending=[True, True, True, False]
-            )
-
-            best_n_attempt = (
-                q_totals_sorted.groupby(["file", "student", "roll_number"], sort=False)
-                .head(self.best_n)
-                .groupby(["file", "student", "roll_number"], sort=False)
-                .agg(best_n_total=("q_score", "sum"))
-                .reset_index()
-            )
-
-            best_n_attempt["best_n_total"] = best_n_attempt["best_n_total"].fillna(0).astype(float)
-
-            # Scale mapping (only if scaled_range provided)
-            if self.scaled_range and not best_n_attempt.empty:
-                min_raw = float(best_n_attempt["best_n_total"].min())
-                max_raw = float(best_n_attempt["best_n_total"].max())
-                if min_raw == max_raw:
-                    best_n_attempt["scaled"] = float(self.scaled_min)
-                else:
-                    span = self.scaled_max - self.scaled_min
-                    best_n_attempt["scaled"] = self.scaled_min + (
-                        best_n_attempt["best_n_total"] - min_raw
-                    ) * span / (max_raw - min_raw)
-            else:
-                # scaling disabled -> set scaled to NaN (or 0 for merges)
-                best_n_attempt["scaled"] = float(0.0)
-
-        else:
-            # Best-N disabled -> empty DataFrame but with expected columns for merging
-            best_n_attempt = pd.DataFrame(
-                columns=["file", "student", "roll_number", "best_n_total", "scaled"]
+from instantgrade.core.models import ExecutionResult
+from instantgrade.reporting.results_store import ResultsStore
+from instantgrade.reporting.score_matrix import (
+    FRAME_COLUMNS,
+    NO_ERROR,
+    QuestionTotals,
+    QuestionTotalsBuilder,
+    ScoreMatrix,
+    ScoreMatrixBuilder,
+)
+
+# Write buffer of the streamed HTML report
+HTML_CHUNK_SIZE = 1 << 16
+# Attempts per unit of work when rendering report-site fragments
+FRAGMENT_BATCH_SIZE = 32
+# Lower bounds (percent of total marks) of the score bands in the student index
+SCORE_BANDS = (0, 20, 40, 60, 80)
+
+# Columns of the per-attempt table of the Arrow / Parquet exports
+ATTEMPT_COLUMNS = (
+    "file",
+    "student",
+    "roll_number",
+    "total_score",
+    "percentage",
+    "best_n_total",
+    "scaled",
+)
+
+
+def _legacy_results(executed_results) -> List[Dict]:
+    """Accept `ExecutionResult` envelopes alongside legacy result dicts."""
+    return [r.to_dict() if isinstance(r, ExecutionResult) else r for r in executed_results or []]
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow
+    except ImportError as e:
+        raise ImportError(
+            "pyarrow is required for Arrow / Parquet export: "
+            "install with 'pip install instantgrade[parquet]'"
+        ) from e
+    return pyarrow
+
+
+def _escape_error_html(err) -> str:
+    """Escape an error text for HTML display, newlines as <br>."""
+    if err is None:
+        return ""
+    return html_lib.escape(str(err)).replace("\n", "<br>")
+
+
+def _write_question_blocks(out, questions: Iterable[Tuple], error_ids: bool) -> None:
+    """
+    Write one attempt's collapsible question blocks. `questions` yields
+    `(qid, question, description, rows)` and each row is
+    `(assertion, status, score, error, error_id)`. With `error_ids` error
+    boxes only carry the id into the page's error table.
+    """
+    for qid, q, desc, rows in questions:
+        out.write(f"<div class='question-block'>")
+        out.write(f"<div class='question-header' data-qid='{qid}'>")
+        out.write(f"<h4>Question: {html_lib.escape(str(q))}</h4>")
+        out.write(f"<div class='collapse-indicator'>+</div>")
+        out.write("</div>")  # header
+        out.write(f"<div class='question-details' id='{qid}'>")
+        if desc:
+            out.write(
+                f"<div class='muted' style='margin-bottom:8px;'>Description: {html_lib.escape(str(desc))}</div>"
             )
 
-        # Save attempt-level scores (used in summary)
-        self.attempt_scores_df = best_n_attempt.copy()
-
-        # Merge attempt-level data back into rows for rendering per-attempt
-        # Always perform merge but fill missing values sensibly
-        df = df.merge(
-            best_n_attempt[["file", "student", "roll_number", "best_n_total", "scaled"]],
-            on=["file", "student", "roll_number"],
-            how="left",
+        out.write(
+            "<table><thead><tr><th style='width:55%'>Assertion</th><th style='width:10%'>Status</th><th style='width:8%'>Score</th><th>Error</th></tr></thead><tbody>"
         )
 
-        # If best_n disabled, set best_n_total to 0 (or keep NaN -> we later check)
-        # Ensure numeric types without triggering future pandas downcasting warnings.
-        # Use to_numeric(..., errors='coerce') to convert object columns to numeric,
-        # then fillna and cast to float.
-        df["best_n_total"] = pd.to_numeric(df["best_n_total"], errors="coerce").fillna(0.0).astype(float)
-        # Scaled may be disabled; fill with 0 to avoid rendering 'nan' when not used
-        df["scaled"] = pd.to_numeric(df["scaled"], errors="coerce").fillna(0.0).astype(float)
-
-        # Student-level best across attempts (only meaningful when best_n is enabled)
-        if not self.attempt_scores_df.empty and self.best_n:
-            try:
-                idx = self.attempt_scores_df.groupby(["student", "roll_number"])[
-                    "best_n_total"
-                ].idxmax()
-                student_best = self.attempt_scores_df.loc[idx].reset_index(drop=True)
-                student_best = student_best.rename(
-                    columns={"best_n_total": "best_n_best", "scaled": "best_scaled"}
-                )
-            except Exception:
-                student_best = pd.DataFrame(
-                    columns=["student", "roll_number", "best_n_best", "best_scaled"]
-                )
-        else:
-            student_best = pd.DataFrame(
-                columns=["student", "roll_number", "best_n_best", "best_scaled"]
-            )
-
-        self.student_best_df = student_best
-        self.df = df
-        return df
-
-    # -------------------------------------------------------------------------
-    def to_csv(self, path: str) -> Path:
-        if self.df is None or self.df.empty:
-            raise RuntimeError("Report not built yet or empty.")
-        path = Path(path)
-        path.parent.mkdir(parents=True, exist_ok=True)
-        self.df.to_csv(path, index=False)
-        return path
-
-    # -------------------------------------------------------------------------
-    def _escape_error_html(self, err) -> str:
-        """
-        Safely escape and convert newlines to <br> for HTML display.
-        """
-        if err is None:
-            return ""
-        return html_lib.escape(str(err)).replace("\n", "<br>")
-
-    # -------------------------------------------------------------------------
-    def to_html(self, path: str) -> Path:
-        if self.df is None:
-            raise RuntimeError("Report not built yet.")
-        path = Path(path)
-        path.parent.mkdir(parents=True, exist_ok=True)
-
-        df = self.df.copy()
-        # If no rows were produced (e.g., Docker grading failed) or required
-        # grouping columns are missing, emit a minimal HTML report instead of
-        # raising KeyError. This keeps calling code (notebooks) robust when
-        # execution produced no results.
-        required = {"file", "student", "roll_number"}
-        if df.empty or not required.issubset(set(df.columns)):
-            # write a tiny HTML page explaining there are no results
-            path.parent.mkdir(parents=True, exist_ok=True)
-            with open(path, "w", encoding="utf-8") as fh:
-                fh.write(
-                    """<!doctype html><html><head><meta charset='utf-8'><title>No Results</title></head><body>"
-                    "<h1>No grading results</h1><p>No result rows were produced by the grader."
-                    " Check the execution logs for errors (Docker build/run or grader output).</p>"
-                    "</body></html>"""
-                )
-            return path
-        # Defensive: ensure commonly-used columns exist so rendering never KeyErrors
-        for _col, _default in (
-            ("assertion", ""),
-            ("description", ""),
-            ("status", "unknown"),
-            ("score", 0.0),
-            ("best_n_total", 0.0),
-            ("scaled", 0.0),
-        ):
-            if _col not in df.columns:
-                df[_col] = _default
-
-        # Exclude rows that represent missing identity (keeps selects clean)
-        df_summary = df[df["assertion"] != "[missing student identity]"].copy()
-        grouped = df.groupby(["file", "student", "roll_number"], sort=False)
-
-        # Build a student-level summary table (used for the Summary modal)
-        # If Best-N enabled -> rely on self.student_best_df (Highest Best-N)
-        # If Best-N disabled -> compute raw total marks per student across attempts
-        if self.best_n and (not self.student_best_df.empty):
-            # use student_best_df with columns: student, roll_number, best_n_best, best_scaled
-            summary_df = self.student_best_df.copy()
-            summary_df["display_metric"] = summary_df["best_n_best"].astype(float)
-            summary_df["scaled_display"] = summary_df.get("best_scaled", 0.0).astype(float)
-            # sort ascending by Highest Best-N per user's request
-            summary_df = summary_df.sort_values("display_metric", ascending=True)
-            summary_rows = summary_df.to_dict("records")
-        else:
-            # Compute per-attempt totals correctly (not summed across attempts)
-            attempt_totals = (
-                df_summary.groupby(["file", "student", "roll_number", "question"], sort=False)
-                .agg(q_score=("score", "sum"))
-                .reset_index()
+        for assertion, status, score, error, error_id in rows:
+            row_class = "passed" if status == "passed" else "failed"
+            assertion_text = html_lib.escape(str(assertion))
+            status_text = html_lib.escape(str(status))
+            err_html = ""
+            if error_ids:
+                # Filled from the page's error table when the question opens
+                if error_id >= 0:
+                    err_html = f"<div class='error-box' data-err='{int(error_id)}'></div>"
+            elif error:
+                err_html = f"<div class='error-box'>{_escape_error_html(error)}</div>"
+            out.write(
+                f"<tr class='{row_class}'>"
+                f"<td>{assertion_text}</td>"
+                f"<td>{status_text}</td>"
+                f"<td>{score}</td>"
+                f"<td>{err_html}</td>"
+                f"</tr>"
             )
 
-            # Sum scores per attempt (file)
-            attempt_totals = (
-                attempt_totals.groupby(["file", "student", "roll_number"], sort=False)
-                .agg(total_score=("q_score", "sum"))
-                .reset_index()
-            )
+        out.write("</tbody></table>")
+        out.write("</div>")  # end question-details
+        out.write("</div>")  # end question-block
 
-            # Now pick the BEST attempt per student
-            best_attempts = (
-                attempt_totals.sort_values("total_score", ascending=False)
-                .groupby(["student", "roll_number"], sort=False)
-                .head(1)
-                .reset_index(drop=True)
-            )
 
-            # For summary, use this as display_metric
-            best_attempts["display_metric"] = best_attempts["total_score"].astype(float)
-            summary_rows = best_attempts.to_dict("records")
+def _write_fragments(directory: Path, batch: List[Tuple[int, List[Tuple]]]) -> int:
+    """
+    Write `students/<n>.js` for each `(n, questions)` of `batch` (see
+    `_write_question_blocks`). Runs in report-site worker processes.
+    """
+    for n, questions in batch:
+        fragment = StringIO()
+        _write_question_blocks(fragment, questions, error_ids=False)
+        payload = json.dumps(fragment.getvalue(), ensure_ascii=False)
+        with open(directory / "students" / f"{n}.js", "w", encoding="utf8") as fh:
+            fh.write(f"reportFragment({n}, {payload});\n")
+    return len(batch)
 
-        html_out = StringIO()
 
-        # Header, styles, scripts
-        html_out.write(
-            """<!doctype html>
+# Document head shared by all report pages: styles plus the dark mode and
+# summary scripts. Each page adds its own scripts and closes the <script>.
+_PAGE_HEAD = """<!doctype html>
 <html>
 <head>
 <meta charset="UTF-8">
@@ -394,7 +238,20 @@ class ReportingService:
             if(localStorage.getItem('dark') === '1') document.body.classList.add('dark');
         } catch(e){}
     }
-    function filterReports() {
+    function showSummary() {
+        document.getElementById("overlay").style.display = "block";
+        document.getElementById("summaryModal").style.display = "block";
+    }
+    function closeSummary() {
+        document.getElementById("overlay").style.display = "none";
+        document.getElementById("summaryModal").style.display = "none";
+    }
+"""
+
+
+# Filtering and sorting over the student blocks present in the page (report
+# site and compact report, whose blocks are all in the DOM).
+_DOM_FILTER_SCRIPT = """    function filterReports() {
         const studentVal = document.getElementById("studentSelect").value;
         const rollVal = document.getElementById("rollSelect").value;
         const fileVal = document.getElementById("fileSelect").value;
@@ -437,75 +294,1316 @@ class ReportingService:
         });
         blocks.forEach(b => container.appendChild(b));
     }
-    function showSummary() {
-        document.getElementById("overlay").style.display = "block";
-        document.getElementById("summaryModal").style.display = "block";
+"""
+
+# Renderer of `to_html_compact`: decodes the embedded payload and builds the
+# student blocks with the same markup as the single-page report.
+_COMPACT_SCRIPT = """    let report = null;
+    function esc(value) {
+        const map = {"&": "&amp;", "<": "&lt;", ">": "&gt;", '"': "&quot;", "'": "&#x27;"};
+        return String(value).replace(/[&<>"']/g, c => map[c]);
     }
-    function closeSummary() {
-        document.getElementById("overlay").style.display = "none";
-        document.getElementById("summaryModal").style.display = "none";
+    // Python's float formatting for the common cases (1 -> "1.0")
+    function num(x) {
+        return Number.isInteger(x) ? x.toFixed(1) : String(x);
+    }
+    function round2(x) {
+        return Math.round(x * 100) / 100;
+    }
+    async function loadReport() {
+        const raw = atob(document.getElementById("reportData").textContent);
+        const bytes = Uint8Array.from(raw, c => c.charCodeAt(0));
+        const stream = new Blob([bytes]).stream().pipeThrough(new DecompressionStream("gzip"));
+        return JSON.parse(await new Response(stream).text());
+    }
+    function renderStudent(n) {
+        const [file, student, roll, layout] = report.attempts[n];
+        const settings = report.settings;
+        const shortFile = file.split(/[\\\\/]/).pop();
+        const total = report.totals[n];
+        const possible = settings.total_possible;
+        const pct = possible ? round2(total / possible * 100) : 0;
+        let h = `<div class="student-block panel" data-name="${esc(student)}" data-roll="${esc(roll)}" ` +
+            `data-file="${esc(shortFile)}" data-total="${num(total)}">` +
+            `<div class='student-meta'><div><h3>${esc(student)}</h3><div class='muted'>Roll: ${esc(roll)}</div></div>` +
+            `<div style='margin-left:auto; display:flex; gap:8px; align-items:center;'>` +
+            `<div class='summary-pill'>File: ${esc(shortFile)}</div>` +
+            `<div class='summary-pill'>Total: ${num(total)}/${possible} (${num(pct)}%)</div>`;
+        if(settings.best_n) h += `<div class='summary-pill'>Best ${settings.best_n}: ${num(report.best_n_total[n])}</div>`;
+        if(settings.scaled) h += `<div class='summary-pill'>Scaled: ${num(round2(report.scaled[n]))}</div>`;
+        h += `</div></div><button class='btn ghost' onclick='toggleStudent(${n})'>Details</button>` +
+            `<div class='student-details' id='s${n}'></div></div>`;
+        return h;
+    }
+    function renderQuestions(n) {
+        const layout = report.layouts[report.attempts[n][3]];
+        const width = report.columns.length;
+        const offset = report.offsets[n];
+        // Rows grouped by question, questions in first-seen order
+        const groups = new Map();
+        layout.forEach((col, r) => {
+            const q = report.columns[col][0];
+            if(!groups.has(q)) groups.set(q, []);
+            groups.get(q).push([col, r]);
+        });
+        let h = "";
+        let k = 0;
+        for(const [q, rows] of groups) {
+            const qid = `q${n}_${k++}`;
+            const desc = report.descriptions[report.columns[rows[0][0]][1]];
+            h += `<div class='question-block'><div class='question-header' data-qid='${qid}' onclick='toggleDetails({currentTarget: this}, "${qid}")'>` +
+                `<h4>Question: ${esc(report.questions[q])}</h4><div class='collapse-indicator'>+</div></div>` +
+                `<div class='question-details' id='${qid}'>`;
+            if(desc) h += `<div class='muted' style='margin-bottom:8px;'>Description: ${esc(desc)}</div>`;
+            h += "<table><thead><tr><th style='width:55%'>Assertion</th><th style='width:10%'>Status</th><th style='width:8%'>Score</th><th>Error</th></tr></thead><tbody>";
+            for(const [col, r] of rows) {
+                const status = report.statuses[report.status[n * width + col]];
+                const err = report.error_codes[offset + r];
+                const errHtml = err >= 0
+                    ? `<div class='error-box'>${esc(report.errors[err]).replace(/\\n/g, "<br>")}</div>` : "";
+                h += `<tr class='${status === "passed" ? "passed" : "failed"}'><td>${esc(report.columns[col][2])}</td>` +
+                    `<td>${esc(status)}</td><td>${num(report.scores[n * width + col])}</td><td>${errHtml}</td></tr>`;
+            }
+            h += "</tbody></table></div></div>";
+        }
+        return h;
     }
     function toggleDetails(evt, qid) {
         const details = document.getElementById(qid);
         if(!details) return;
-        if(details.style.display === "block") {
-            details.style.display = "none";
-            evt.currentTarget.querySelector(".collapse-indicator").innerText = "+";
+        const open = details.style.display !== "block";
+        details.style.display = open ? "block" : "none";
+        evt.currentTarget.querySelector(".collapse-indicator").innerText = open ? "−" : "+";
+    }
+    function toggleStudent(n) {
+        const box = document.getElementById("s" + n);
+        if(!box.dataset.rendered) {
+            box.dataset.rendered = "1";
+            box.innerHTML = renderQuestions(n);
         } else {
-            details.style.display = "block";
-            evt.currentTarget.querySelector(".collapse-indicator").innerText = "−";
+            box.style.display = box.style.display === "none" ? "block" : "none";
         }
     }
-    window.addEventListener('DOMContentLoaded', (event) => {
+    window.addEventListener('DOMContentLoaded', async (event) => {
         initDarkModeFromStorage();
-        document.querySelectorAll('.question-header').forEach((hdr) => {
-            hdr.addEventListener('click', function(e) {
-                const qid = this.getAttribute('data-qid');
-                toggleDetails({ currentTarget: this }, qid);
-            });
+        report = await loadReport();
+        report.offsets = [];
+        let offset = 0;
+        report.attempts.forEach(a => {
+            report.offsets.push(offset);
+            offset += report.layouts[a[3]].length;
         });
+        document.getElementById("reportContainer").innerHTML =
+            report.attempts.map((a, n) => renderStudent(n)).join("");
     });
-</script>
-</head>
-<body>
-<h1>Evaluator Report</h1>
+"""
 
-<div class="controls panel">
-    <label for="sortSelect">Sort by:</label>
-    <select id="sortSelect" onchange="sortStudents()">
-        <option value="marks">Total Marks (High → Low)</option>
-        <option value="name">Student Name (A → Z)</option>
-        <option value="roll">Roll Number (A → Z)</option>
-        <option value="file">File Name (A → Z)</option>
-    </select>
 
-    <label for="studentSelect">Student:</label>
-    <select id="studentSelect" onchange="filterReports()">
-        <option value="">-- All Students --</option>
-"""
-        )
+class ReportingService:
+    def __init__(
+        self,
+        executed_results: Optional[List[Dict]] = None,
+        solution: Optional[Dict] = None,
+        debug: bool = False,
+        logger=None,
+        total_assertions: int = 0,
+        best_n: Optional[int] = None,
+        scaled_range: Optional[Tuple[float, float]] = None,
+        executions_saved: Optional[int] = None,
+        summary_only: bool = False,
+    ):
+        self.debug = debug
+        self.solution = solution or {}
+        self.logger = logger
+        # Summary-only reports keep per-question totals instead of the
+        # per-assertion rows (see `to_summary_csv` / `to_summary_html`)
+        self.summary_only = bool(summary_only)
+        # Report frames are built on first use (see `dataframe`)
+        self.executed_results = executed_results
+        self.total_assertions = total_assertions or 1
 
-        # populate select options
-        for student in sorted(df_summary["student"].dropna().unique()):
-            html_out.write(
-                f"<option value='{html_lib.escape(student)}'>{html_lib.escape(student)}</option>"
-            )
-        html_out.write("</select>")
+        # Optional Best-N & scaling
+        # If best_n is None or <= 0 -> disable Best-N logic
+        self.best_n = int(best_n) if best_n and int(best_n) > 0 else None
 
-        html_out.write(
-            """
-    <label for="rollSelect">Roll:</label>
+        # scaling is enabled only when scaled_range is provided as a tuple (min, max)
+        if scaled_range and isinstance(scaled_range, (list, tuple)) and len(scaled_range) == 2:
+            self.scaled_range = (float(scaled_range[0]), float(scaled_range[1]))
+            self.scaled_min, self.scaled_max = float(scaled_range[0]), float(scaled_range[1])
+        else:
+            self.scaled_range = None
+            self.scaled_min = None
+            self.scaled_max = None
+
+        # Duplicate submissions that reused another submission's results.
+        # Counted from the results themselves (and from results added
+        # later) unless the evaluator says so.
+        self._count_duplicates = executions_saved is None
+        if executions_saved is None:
+            executions_saved = sum(
+                1 for r in self.executed_results if isinstance(r, dict) and r.get("duplicate_of")
+            )
+        self.executions_saved = int(executions_saved)
+
+    # -------------------------------------------------------------------------
+    @property
+    def executed_results(self) -> List[Dict]:
+        return self._executed_results
+
+    @executed_results.setter
+    def executed_results(self, executed_results) -> None:
+        self._executed_results = _legacy_results(executed_results)
+        self._builder = None
+        self.invalidate()
+
+    def _new_builder(self, executed_results: List[Dict]):
+        """A score matrix (or, summary-only, question totals) builder holding `executed_results`."""
+        builder = QuestionTotalsBuilder() if self.summary_only else ScoreMatrixBuilder()
+        for item in executed_results:
+            builder.add(item)
+        return builder
+
+    # -------------------------------------------------------------------------
+    def invalidate(self) -> None:
+        """
+        Drop the built frames and cached tables so the next access rebuilds
+        them. Called when results are added; call it (or `dataframe()`)
+        after changing `best_n`, `scaled_range` or `total_assertions` on a
+        built report. Cached tables alone follow those settings anyway.
+        """
+        self._matrix = None
+        self._df: Optional[pd.DataFrame] = None
+        self._attempt_scores_df: Optional[pd.DataFrame] = None
+        self._student_best_df: Optional[pd.DataFrame] = None
+        self._cache: Dict[str, Any] = {}
+
+    def _cached(self, key: str, build):
+        """`build()`, computed once per built report and Best-N / scaling settings."""
+        settings = (self.best_n, self.scaled_min, self.scaled_max, self.total_assertions)
+        if self._cache.get("settings") != settings:
+            self._cache = {"settings": settings}
+        if key not in self._cache:
+            self._cache[key] = build()
+        return self._cache[key]
+
+    # -------------------------------------------------------------------------
+    @property
+    def matrix(self) -> ScoreMatrix:
+        """Attempt × assertion score matrix, built on first use."""
+        if self.summary_only:
+            raise RuntimeError(
+                "Summary-only report has no per-assertion results; "
+                "use to_summary_csv() or to_summary_html()."
+            )
+        return self._scores()
+
+    def _scores(self) -> Union[ScoreMatrix, QuestionTotals]:
+        """
+        `matrix`, or the `QuestionTotals` of a summary-only report; both
+        give the attempts, question totals, Best-N and class statistics.
+        """
+        if self._matrix is None:
+            if self._builder is None:
+                self._builder = self._new_builder(self._executed_results)
+            self._matrix = self._builder.build()
+        return self._matrix
+
+    @property
+    def df(self) -> pd.DataFrame:
+        """One row per assertion (see `dataframe`), built on first use."""
+        if self._df is None:
+            self.dataframe()
+        return self._df
+
+    @df.setter
+    def df(self, df: pd.DataFrame) -> None:
+        self._df = df
+        self._cache.clear()
+
+    @property
+    def attempt_scores_df(self) -> pd.DataFrame:
+        if self._attempt_scores_df is None:
+            self.dataframe()
+        return self._attempt_scores_df
+
+    @attempt_scores_df.setter
+    def attempt_scores_df(self, df: pd.DataFrame) -> None:
+        self._attempt_scores_df = df
+
+    @property
+    def student_best_df(self) -> pd.DataFrame:
+        if self._student_best_df is None:
+            self.dataframe()
+        return self._student_best_df
+
+    @student_best_df.setter
+    def student_best_df(self, df: pd.DataFrame) -> None:
+        self._student_best_df = df
+
+    # -------------------------------------------------------------------------
+    def dataframe(self, executed_results: Optional[List[Dict]] = None) -> pd.DataFrame:
+        """
+        Build the report frames from `executed_results`, or from the
+        results collected so far (see `add_result`). Called on first
+        access of `df`, `attempt_scores_df` or `student_best_df`.
+        """
+        if executed_results is not None:
+            self._builder = self._new_builder(_legacy_results(executed_results))
+            self.invalidate()
+        # Tables derived from the previous frames are stale once they are rebuilt
+        self._cache.clear()
+        df = self._build_frames()
+        if self.logger:
+            try:
+                self.logger.info(f"[Reporting] Processed {len(df)} result rows.")
+            except Exception:
+                pass
+        return df
+
+    def _build_frames(self) -> pd.DataFrame:
+        # Scores are reduced on the attempt × assertion matrix; the long
+        # format frame below is only needed for rendering and CSV export.
+        matrix = self.matrix
+        df = matrix.to_frame()
+
+        if df.empty:
+            # Ensure structures are defined but empty
+            self.df = df
+            self.attempt_scores_df = pd.DataFrame()
+            self.student_best_df = pd.DataFrame()
+            if self.debug:
+                print("[ReportingService] dataframe: produced empty DataFrame.")
+            return df
+
+        # Id of the row's error in the run's error table (-1 = no error)
+        df["error_id"] = matrix.error_codes
+
+        # Normalize columns and compute percents
+        df["max_score"] = 1
+        df["total_possible"] = self.total_assertions
+        df["percentage"] = (df["score"] / df["max_score"]) * 100
+
+        files, students, rolls = (list(col) for col in zip(*matrix.attempts))
+        counts = matrix.row_counts()
+
+        # If Best-N is enabled, compute best-N totals per attempt and scaling (if enabled)
+        if self.best_n:
+            best_n_totals = matrix.best_n_totals(self.best_n)
+            if self.scaled_range:
+                scaled = matrix.scale(best_n_totals, self.scaled_min, self.scaled_max)
+            else:
+                # scaling disabled -> 0 so the column never renders 'nan'
+                scaled = np.zeros(len(best_n_totals))
+
+            best_n_attempt = (
+                pd.DataFrame(
+                    {
+                        "file": files,
+                        "student": students,
+                        "roll_number": rolls,
+                        "best_n_total": best_n_totals,
+                        "scaled": scaled,
+                    }
+                )
+                .sort_values(["file", "student", "roll_number"], kind="stable")
+                .reset_index(drop=True)
+            )
+            df["best_n_total"] = np.repeat(best_n_totals, counts)
+            df["scaled"] = np.repeat(scaled, counts)
+        else:
+            # Best-N disabled -> empty DataFrame but with expected columns
+            best_n_attempt = pd.DataFrame(
+                columns=["file", "student", "roll_number", "best_n_total", "scaled"]
+            )
+            df["best_n_total"] = 0.0
+            df["scaled"] = 0.0
+
+        # Save attempt-level scores (used in summary)
+        self.attempt_scores_df = best_n_attempt.copy()
+
+        # Student-level best across attempts (only meaningful when best_n is enabled)
+        if not self.attempt_scores_df.empty and self.best_n:
+            try:
+                idx = self.attempt_scores_df.groupby(["student", "roll_number"])[
+                    "best_n_total"
+                ].idxmax()
+                student_best = self.attempt_scores_df.loc[idx].reset_index(drop=True)
+                student_best = student_best.rename(
+                    columns={"best_n_total": "best_n_best", "scaled": "best_scaled"}
+                )
+            except Exception:
+                student_best = pd.DataFrame(
+                    columns=["student", "roll_number", "best_n_best", "best_scaled"]
+                )
+        else:
+            student_best = pd.DataFrame(
+                columns=["student", "roll_number", "best_n_best", "best_scaled"]
+            )
+
+        self.student_best_df = student_best
+        self.df = df
+        return df
+
+    # -------------------------------------------------------------------------
+    def add_result(self, result) -> None:
+        """
+        Add one graded result (legacy dict or `ExecutionResult`) as it
+        arrives. Only the new result's rows are processed; totals, Best-N,
+        student bests and class statistics are re-reduced on the score
+        matrix the next time a view (`df`, `to_html`, `to_csv`,
+        `class_stats`, ...) is used, so any of them can be regenerated
+        after every result. Summary-only reports fold the result into the
+        question totals and do not keep it in `executed_results`.
+        """
+        item = _legacy_results([result])[0]
+        if self._count_duplicates and isinstance(item, dict) and item.get("duplicate_of"):
+            self.executions_saved += 1
+        if self.summary_only:
+            # Only the question totals are kept, not the result rows
+            if self._builder is None:
+                self._builder = self._new_builder(self._executed_results)
+            self._builder.add(item)
+        else:
+            self._executed_results.append(item)
+            if self._builder is not None:
+                self._builder.add(item)
+        self.invalidate()
+
+    # -------------------------------------------------------------------------
+    def class_stats(self) -> Dict:
+        """
+        Class statistics from the score matrix (see `ScoreMatrix.class_stats`);
+        summary-only reports have no per-assertion pass rates.
+        """
+        scores = self._scores()
+        if scores.empty:
+            return {"attempts": 0}
+        return dict(self._cached("class_stats", scores.class_stats))
+
+    # -------------------------------------------------------------------------
+    @property
+    def error_table(self) -> List[str]:
+        """Distinct error texts of this report; `df["error_id"]` indexes into it."""
+        return [] if self.summary_only else self.matrix.error_table
+
+    # -------------------------------------------------------------------------
+    @property
+    def summary_df(self) -> pd.DataFrame:
+        """
+        One row per graded attempt: identity, the total of every question,
+        `total_score` and `percentage`, plus `best_n_total` and `scaled`
+        when Best-N is enabled. Computed from question totals only, so it
+        never builds the per-assertion frame.
+        """
+        return self._cached("summary_df", self._build_summary_df)
+
+    def _build_summary_df(self) -> pd.DataFrame:
+        scores = self._scores()
+        if scores.empty:
+            return pd.DataFrame(columns=["file", "student", "roll_number", "total_score"])
+        files, students, rolls = (list(col) for col in zip(*scores.attempts))
+        totals = scores.totals()
+        columns = {"file": files, "student": students, "roll_number": rolls}
+        columns.update(zip(scores.questions, scores.question_totals().T))
+        columns["total_score"] = totals
+        columns["percentage"] = totals / self.total_assertions * 100
+        if self.best_n:
+            best_n_totals = scores.best_n_totals(self.best_n)
+            columns["best_n_total"] = best_n_totals
+            columns["scaled"] = (
+                scores.scale(best_n_totals, self.scaled_min, self.scaled_max)
+                if self.scaled_range
+                else np.zeros(len(best_n_totals))
+            )
+        return pd.DataFrame(columns)
+
+    def _summary_rows(self) -> List[Dict]:
+        """Best attempt per student from `summary_df`, as the Summary table lists them."""
+        attempts = self.summary_df
+        if attempts.empty:
+            return []
+        metric = "best_n_total" if self.best_n else "total_score"
+        best = (
+            attempts.sort_values(metric, ascending=False, kind="stable")
+            .groupby(["student", "roll_number"], sort=False)
+            .head(1)
+        )
+        rows = pd.DataFrame(
+            {
+                "student": best["student"],
+                "roll_number": best["roll_number"],
+                "display_metric": best[metric].astype(float),
+            }
+        )
+        if self.best_n:
+            rows["best_n_best"] = best["best_n_total"]
+            rows["best_scaled"] = best["scaled"]
+            # Same order as the full report's Summary: ascending Best-N
+            rows = rows.sort_values("display_metric", kind="stable")
+        return rows.to_dict("records")
+
+    def to_summary_csv(self, path: str) -> Path:
+        """Write `summary_df` (one row per attempt with per-question totals) to `path`."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.summary_df.to_csv(path, index=False)
+        return path
+
+    def to_summary_html(self, path: str) -> Path:
+        """
+        Write a summary page: per-question class statistics and each
+        student's best attempt, without the per-assertion details.
+        """
+        path = Path(path)
+        if self._scores().empty:
+            return self._write_no_results(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w", encoding="utf8", buffering=HTML_CHUNK_SIZE) as html_out:
+            html_out.write(_PAGE_HEAD)
+            html_out.write(
+                """    window.addEventListener('DOMContentLoaded', (event) => {
+        initDarkModeFromStorage();
+    });
+</script>
+</head>
+<body>
+<h1>Evaluator Summary</h1>
+"""
+            )
+            self._write_question_stats(html_out)
+            html_out.write("<div class='panel'><h2>Students</h2><table>")
+            self._write_summary_table(html_out, self._summary_rows())
+            html_out.write("</tbody></table></div>\n</body>\n</html>\n")
+        return path
+
+    # -------------------------------------------------------------------------
+    def to_csv(self, path: str, error_table: bool = True) -> Path:
+        """
+        Write the result rows to `path`. With `error_table` (default) each
+        distinct error text is written once to `<stem>_errors.csv`
+        (`error_id,error`) and rows carry only its `error_id`; otherwise
+        rows carry the full error text inline.
+        """
+        if self.df is None or self.df.empty:
+            raise RuntimeError("Report not built yet or empty.")
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if not error_table or "error_id" not in self.df.columns:
+            self.df.drop(columns=["error_id"], errors="ignore").to_csv(path, index=False)
+            return path
+
+        rows = self.df.drop(columns=["error"])
+        rows["error_id"] = rows["error_id"].where(rows["error_id"] >= 0).astype("Int64")
+        rows.to_csv(path, index=False)
+        pd.DataFrame(
+            {"error_id": range(len(self.error_table)), "error": self.error_table}
+        ).to_csv(path.with_name(f"{path.stem}_errors.csv"), index=False)
+        return path
+
+    # -------------------------------------------------------------------------
+    def to_arrow(self, table: str = "results"):
+        """
+        One of the report's tables as a `pyarrow.Table`:
+
+        - "results": one row per assertion (`FRAME_COLUMNS`),
+        - "attempts": one row per graded file with its totals,
+        - "students": one row per student with their best attempt.
+
+        Repeated strings (question, assertion, error text, ...) come out
+        dictionary-encoded. Needs pyarrow (`pip install instantgrade[parquet]`).
+        """
+        pa = _require_pyarrow()
+        frames = self._export_frames()
+        if table not in frames:
+            raise ValueError(f"Unknown table {table!r}; expected one of {sorted(frames)}")
+        return pa.Table.from_pandas(frames[table], preserve_index=False)
+
+    # -------------------------------------------------------------------------
+    def to_parquet(
+        self,
+        directory: str,
+        partition_by: Optional[List[str]] = None,
+        compression: str = "zstd",
+    ) -> Path:
+        """
+        Write `results`, `attempts` and `students` (see `to_arrow`) as
+        Parquet files under `directory`, dictionary-encoded and compressed.
+        With `partition_by` (results columns, e.g. `["question"]`) the
+        results become a hive-partitioned dataset directory `results/`
+        instead of `results.parquet`, so readers can load only the
+        partitions and columns they need.
+        """
+        pa = _require_pyarrow()
+        import pyarrow.parquet as pq
+
+        if self.df is None or self.df.empty:
+            raise RuntimeError("Report not built yet or empty.")
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+
+        for name, frame in self._export_frames().items():
+            table = pa.Table.from_pandas(frame, preserve_index=False)
+            if name == "results" and partition_by:
+                pq.write_to_dataset(
+                    table,
+                    root_path=str(directory / name),
+                    partition_cols=list(partition_by),
+                    compression=compression,
+                )
+            else:
+                pq.write_table(table, directory / f"{name}.parquet", compression=compression)
+        return directory
+
+    # -------------------------------------------------------------------------
+    def to_sqlite(self, path: str, name: Optional[str] = None, meta: Optional[Dict] = None) -> int:
+        """
+        Append this report's results as a new run to the SQLite results
+        store at `path` (see `ResultsStore`) and return the run id. Best-N
+        and scaling settings are recorded with the run.
+        """
+        if self.summary_only:
+            raise RuntimeError(
+                "Summary-only report keeps no result rows; "
+                "store them as they are graded with Evaluator(results_db=...)."
+            )
+        with ResultsStore(path) as store:
+            return store.add_run(self.executed_results, name=name, meta=self.run_meta(meta))
+
+    def run_meta(self, meta: Optional[Dict] = None) -> Dict:
+        """Best-N and scaling settings stored with a run, plus `meta`."""
+        return {
+            "best_n": self.best_n,
+            "scaled_range": self.scaled_range,
+            "total_assertions": self.total_assertions,
+            **(meta or {}),
+        }
+
+    # -------------------------------------------------------------------------
+    def _export_frames(self) -> Dict[str, pd.DataFrame]:
+        """The `results`, `attempts` and `students` tables of the exports."""
+        return self._cached("export_frames", self._build_export_frames)
+
+    def _build_export_frames(self) -> Dict[str, pd.DataFrame]:
+        if self.matrix is None or self.matrix.empty:
+            results = pd.DataFrame(columns=list(FRAME_COLUMNS))
+            attempts = pd.DataFrame(columns=list(ATTEMPT_COLUMNS))
+        else:
+            results = self.df[list(FRAME_COLUMNS)].copy()
+            # Identities may be numbers in notebooks; Arrow wants one type
+            results["roll_number"] = results["roll_number"].astype(str).astype("category")
+
+            starts = np.concatenate(([0], np.cumsum(self.matrix.row_counts())[:-1]))
+            files, students, rolls = (list(col) for col in zip(*self.matrix.attempts))
+            totals = self.matrix.totals()
+            attempts = pd.DataFrame(
+                {
+                    "file": files,
+                    "student": students,
+                    "roll_number": [str(r) for r in rolls],
+                    "total_score": totals,
+                    "percentage": totals / self.total_assertions * 100,
+                    "best_n_total": self.df["best_n_total"].to_numpy()[starts],
+                    "scaled": self.df["scaled"].to_numpy()[starts],
+                },
+                columns=list(ATTEMPT_COLUMNS),
+            )
+
+        students = (
+            attempts.groupby(["student", "roll_number"], sort=False, observed=True)
+            .agg(
+                attempts=("file", "size"),
+                best_total=("total_score", "max"),
+                best_n_best=("best_n_total", "max"),
+                best_scaled=("scaled", "max"),
+            )
+            .reset_index()
+        )
+        return {"results": results, "attempts": attempts, "students": students}
+
+    # -------------------------------------------------------------------------
+    def _escape_error_html(self, err) -> str:
+        """
+        Safely escape and convert newlines to <br> for HTML display.
+        """
+        return _escape_error_html(err)
+
+    # -------------------------------------------------------------------------
+    def to_html(self, path: str) -> Path:
+        if self.summary_only:
+            # No per-assertion rows to render; write the summary page instead
+            return self.to_summary_html(path)
+        if self.df is None:
+            raise RuntimeError("Report not built yet.")
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        frames = self._report_frames()
+        if frames is None:
+            return self._write_no_results(path)
+        df, df_summary, summary_rows = frames
+
+        # Stream the page to disk student by student instead of building it in memory
+        with open(path, "w", encoding="utf8", buffering=HTML_CHUNK_SIZE) as html_out:
+            self._write_html(html_out, df, df_summary, summary_rows)
+        return path
+
+    # -------------------------------------------------------------------------
+    def to_html_compact(self, path: str) -> Path:
+        """
+        Write a data-driven report: the page embeds one gzip-compressed,
+        base64-encoded JSON payload (`ScoreMatrix.to_payload` plus attempt
+        totals) and a small script renders the student blocks from it in
+        the browser, each student's question tables when they are first
+        opened. Needs a browser with `DecompressionStream` (all current
+        ones). Filters, sorting and the Summary modal work as in `to_html`.
+        """
+        if self.df is None:
+            raise RuntimeError("Report not built yet.")
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        frames = self._report_frames()
+        if frames is None or self.matrix is None or self.matrix.empty:
+            return self._write_no_results(path)
+        df, df_summary, summary_rows = frames
+
+        payload = self.matrix.to_payload()
+        # Per-attempt values, read from each attempt's first row
+        starts = np.concatenate(([0], np.cumsum(self.matrix.row_counts())[:-1]))
+        payload["totals"] = self.matrix.totals().tolist()
+        payload["best_n_total"] = df["best_n_total"].to_numpy()[starts].tolist()
+        payload["scaled"] = df["scaled"].to_numpy()[starts].tolist()
+        payload["settings"] = {
+            "total_possible": self.total_assertions,
+            "best_n": self.best_n,
+            "scaled": bool(self.scaled_range),
+        }
+        data = json.dumps(payload, ensure_ascii=False, separators=(",", ":"))
+        encoded = base64.b64encode(gzip.compress(data.encode("utf8"), mtime=0)).decode("ascii")
+
+        with open(path, "w", encoding="utf8", buffering=HTML_CHUNK_SIZE) as html_out:
+            html_out.write(_PAGE_HEAD)
+            html_out.write(_DOM_FILTER_SCRIPT)
+            html_out.write(_COMPACT_SCRIPT)
+            html_out.write(
+                """</script>
+</head>
+<body>
+<h1>Evaluator Report</h1>
+"""
+            )
+            self._write_controls(html_out, df, df_summary)
+            html_out.write('<div id="reportContainer"></div>\n')
+            html_out.write(
+                f'<script type="application/octet-stream" id="reportData">{encoded}</script>\n'
+            )
+            self._write_summary(html_out, summary_rows)
+            html_out.write(
+                """
+</body>
+</html>
+"""
+            )
+        return path
+
+    # -------------------------------------------------------------------------
+    def to_html_site(self, directory: str, workers: Optional[int] = None) -> Path:
+        """
+        Write the report as a small site under `directory` for classes too
+        large for one page. `index.html` holds the filters, per-question
+        statistics, the Summary modal and one collapsed block per attempt;
+        each attempt's question tables go to `students/<n>.js`, loaded only
+        when its block is opened. Fragments are scripts rather than HTML
+        files so the site also works from `file://`, where fetch() is
+        blocked. They are rendered across `workers` processes (default: one
+        per CPU). Returns the path of `index.html`.
+        """
+        if self.df is None:
+            raise RuntimeError("Report not built yet.")
+        directory = Path(directory)
+        students = directory / "students"
+        students.mkdir(parents=True, exist_ok=True)
+        # Fragments of a previous, larger report would otherwise linger
+        for stale in students.glob("*.js"):
+            stale.unlink()
+        index = directory / "index.html"
+
+        frames = self._report_frames()
+        if frames is None:
+            return self._write_no_results(index)
+        df, df_summary, summary_rows = frames
+
+        workers = workers or os.cpu_count() or 1
+        with open(index, "w", encoding="utf8", buffering=HTML_CHUNK_SIZE) as html_out:
+            self._write_site_index(html_out, df, df_summary, summary_rows)
+        self._render_fragments(directory, lambda: self._fragment_batches(df), workers)
+        return index
+
+    # -------------------------------------------------------------------------
+    def _fragment_batches(self, df: pd.DataFrame, size: int = FRAGMENT_BATCH_SIZE):
+        """Batches of `(n, questions)` for `_write_fragments`, attempt by attempt."""
+        assertions = df["assertion"].to_numpy()
+        statuses = df["status"].to_numpy()
+        scores = df["score"].to_numpy(np.float64)
+        # Fragments carry their error texts inline (missing ones as None)
+        errors = df["error"].to_numpy(dtype=object, na_value=None)
+        descriptions = df["description"].to_numpy()
+
+        batch = []
+        for n, (_, _, _, _, _, questions) in enumerate(self._attempt_groups(df)):
+            batch.append(
+                (
+                    n,
+                    [
+                        (
+                            f"q{n}_{k}",
+                            q,
+                            descriptions[rows[0]],
+                            list(
+                                zip(
+                                    assertions[rows].tolist(),
+                                    statuses[rows].tolist(),
+                                    scores[rows].tolist(),
+                                    errors[rows].tolist(),
+                                    [NO_ERROR] * len(rows),
+                                )
+                            ),
+                        )
+                        for k, (q, rows) in enumerate(questions)
+                    ],
+                )
+            )
+            if len(batch) >= size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    # -------------------------------------------------------------------------
+    def _render_fragments(
+        self, directory: Path, make_batches: Callable[[], Iterable], workers: int
+    ) -> None:
+        """
+        Write all fragments, across `workers` processes when more than one
+        is requested. At most two batches per worker are in flight, so
+        memory does not grow with class size.
+        """
+        if workers > 1:
+            try:
+                with ProcessPoolExecutor(max_workers=workers) as pool:
+                    pending = set()
+                    for batch in make_batches():
+                        if len(pending) >= 2 * workers:
+                            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                            for future in done:
+                                future.result()
+                        pending.add(pool.submit(_write_fragments, directory, batch))
+                    for future in pending:
+                        future.result()
+                return
+            except (OSError, RuntimeError):
+                # No process pool available (restricted sandboxes); render inline
+                pass
+        for batch in make_batches():
+            _write_fragments(directory, batch)
+
+    # -------------------------------------------------------------------------
+    def _write_site_index(self, html_out, df: pd.DataFrame, df_summary, summary_rows) -> None:
+        """Write the report site's index page (student blocks without their questions)."""
+        html_out.write(_PAGE_HEAD)
+        html_out.write(_DOM_FILTER_SCRIPT)
+        html_out.write(
+            """    function toggleDetails(evt, qid) {
+        const details = document.getElementById(qid);
+        if(!details) return;
+        if(details.style.display === "block") {
+            details.style.display = "none";
+            evt.currentTarget.querySelector(".collapse-indicator").innerText = "+";
+        } else {
+            details.style.display = "block";
+            evt.currentTarget.querySelector(".collapse-indicator").innerText = "−";
+        }
+    }
+    function toggleStudent(n) {
+        const box = document.getElementById("s" + n);
+        if(!box.dataset.requested) {
+            box.dataset.requested = "1";
+            const script = document.createElement("script");
+            script.src = box.dataset.src;
+            document.head.appendChild(script);
+        } else {
+            box.style.display = box.style.display === "none" ? "block" : "none";
+        }
+    }
+    // Called by students/<n>.js once the fragment has loaded
+    function reportFragment(n, html) {
+        const box = document.getElementById("s" + n);
+        box.innerHTML = html;
+        box.querySelectorAll('.question-header').forEach((hdr) => {
+            hdr.addEventListener('click', function(e) {
+                const qid = this.getAttribute('data-qid');
+                toggleDetails({ currentTarget: this }, qid);
+            });
+        });
+    }
+    window.addEventListener('DOMContentLoaded', (event) => {
+        initDarkModeFromStorage();
+    });
+</script>
+</head>
+<body>
+<h1>Evaluator Report</h1>
+"""
+        )
+        self._write_controls(html_out, df, df_summary)
+        self._write_question_stats(html_out)
+        html_out.write('<div id="reportContainer">\n')
+
+        best_n_totals = df["best_n_total"].to_numpy()
+        scaled_values = df["scaled"].to_numpy()
+        for n, (file, student, roll_number, first, total_score, _) in enumerate(
+            self._attempt_groups(df)
+        ):
+            self._write_student_meta(
+                html_out,
+                file,
+                student,
+                roll_number,
+                total_score,
+                float(best_n_totals[first]),
+                float(scaled_values[first]),
+            )
+            html_out.write(
+                f"<button class='btn ghost' onclick='toggleStudent({n})'>Details</button>"
+                f"<div class='student-details' id='s{n}' data-src='students/{n}.js'></div>"
+            )
+            html_out.write("</div>")  # end student-block
+
+        html_out.write(
+            """
+</div> <!-- reportContainer -->
+"""
+        )
+        self._write_summary(html_out, summary_rows)
+        html_out.write(
+            """
+</body>
+</html>
+"""
+        )
+
+    # -------------------------------------------------------------------------
+    def _write_question_stats(self, out) -> None:
+        """Per-question class statistics panel of the report site's index."""
+        scores = self._scores()
+        if scores.empty:
+            return
+        stats = self._cached("question_stats", scores.question_stats)
+        out.write(
+            "<div class='panel'><h2>Questions</h2><table><thead><tr><th>Question</th>"
+            "<th>Assertions</th><th>Mean score</th><th>Mean %</th><th>Full marks</th>"
+            "</tr></thead><tbody>"
+        )
+        for q, n_assertions, mean, percent, full in stats.itertuples(index=False):
+            out.write(
+                f"<tr><td>{html_lib.escape(str(q))}</td><td>{n_assertions}</td>"
+                f"<td>{round(mean, 2)}</td><td>{round(percent, 2)}</td><td>{full}</td></tr>"
+            )
+        out.write("</tbody></table></div>\n")
+
+    # -------------------------------------------------------------------------
+    def _write_no_results(self, path: Path) -> Path:
+        # write a tiny HTML page explaining there are no results
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as fh:
+            fh.write(
+                """<!doctype html><html><head><meta charset='utf-8'><title>No Results</title></head><body>"
+                    "<h1>No grading results</h1><p>No result rows were produced by the grader."
+                    " Check the execution logs for errors (Docker build/run or grader output).</p>"
+                    "</body></html>"""
+            )
+        return path
+
+    # -------------------------------------------------------------------------
+    def _report_frames(self):
+        """
+        `(df, df_summary, summary_rows)` the report pages render from, or
+        None when there are no result rows to report.
+        """
+        return self._cached("report_frames", self._build_report_frames)
+
+    def _build_report_frames(self):
+        df = self.df
+        # If no rows were produced (e.g., Docker grading failed) or required
+        # grouping columns are missing, emit a minimal HTML report instead of
+        # raising KeyError. This keeps calling code (notebooks) robust when
+        # execution produced no results.
+        required = {"file", "student", "roll_number"}
+        if df.empty or not required.issubset(set(df.columns)):
+            return None
+        # Defensive: ensure commonly-used columns exist so rendering never KeyErrors
+        missing = {
+            _col: _default
+            for _col, _default in (
+                ("assertion", ""),
+                ("description", ""),
+                ("status", "unknown"),
+                ("score", 0.0),
+                ("error", None),
+                ("best_n_total", 0.0),
+                ("scaled", 0.0),
+            )
+            if _col not in df.columns
+        }
+        if missing:
+            df = df.assign(**missing)
+
+        # Exclude rows that represent missing identity (keeps selects clean)
+        df_summary = df.loc[
+            df["assertion"] != "[missing student identity]",
+            ["file", "student", "roll_number", "question", "score"],
+        ]
+
+        # Build a student-level summary table (used for the Summary modal)
+        # If Best-N enabled -> rely on self.student_best_df (Highest Best-N)
+        # If Best-N disabled -> compute raw total marks per student across attempts
+        if self.best_n and (not self.student_best_df.empty):
+            # use student_best_df with columns: student, roll_number, best_n_best, best_scaled
+            summary_df = self.student_best_df.copy()
+            summary_df["display_metric"] = summary_df["best_n_best"].astype(float)
+            summary_df["scaled_display"] = summary_df.get("best_scaled", 0.0).astype(float)
+            # sort ascending by Highest Best-N per user's request
+            summary_df = summary_df.sort_values("display_metric", ascending=True)
+            summary_rows = summary_df.to_dict("records")
+        else:
+            # Compute per-attempt totals correctly (not summed across attempts)
+            attempt_totals = (
+                df_summary.groupby(
+                    ["file", "student", "roll_number", "question"], sort=False, observed=True
+                )
+                .agg(q_score=("score", "sum"))
+                .reset_index()
+            )
+
+            # Sum scores per attempt (file)
+            attempt_totals = (
+                attempt_totals.groupby(["file", "student", "roll_number"], sort=False, observed=True)
+                .agg(total_score=("q_score", "sum"))
+                .reset_index()
+            )
+
+            # Now pick the BEST attempt per student
+            best_attempts = (
+                attempt_totals.sort_values("total_score", ascending=False)
+                .groupby(["student", "roll_number"], sort=False, observed=True)
+                .head(1)
+                .reset_index(drop=True)
+            )
+
+            # For summary, use this as display_metric
+            best_attempts["display_metric"] = best_attempts["total_score"].astype(float)
+            summary_rows = best_attempts.to_dict("records")
+
+        return df, df_summary, summary_rows
+
+    # -------------------------------------------------------------------------
+    def _attempt_groups(self, df: pd.DataFrame):
+        """
+        Yield `(file, student, roll_number, first_row, total_score, questions)`
+        per attempt, in the order `df.groupby([...], sort=False)` would give,
+        where `questions` lists `(question, row_positions)` in first-seen
+        order. Rows without a question are left out of `questions` (as
+        groupby drops them); row positions index `df` positionally.
+        """
+        keys = ["file", "student", "roll_number"]
+        attempt = (
+            df.groupby(keys, sort=False, observed=True).ngroup().fillna(-1).to_numpy(np.int64)
+        )
+        pair = (
+            df.groupby(keys + ["question"], sort=False, observed=True)
+            .ngroup()
+            .fillna(-1)
+            .to_numpy(np.int64)
+        )
+        # Per-question sums exactly as groupby computes them
+        q_sums = df["score"].groupby(pair).sum()
+        q_sums = q_sums.reindex(np.arange(pair.max() + 1 if len(pair) else 0)).to_numpy()
+
+        positions = np.flatnonzero(attempt >= 0)
+        positions = positions[np.lexsort((pair[positions], attempt[positions]))]
+        files = df["file"].to_numpy()
+        students = df["student"].to_numpy()
+        rolls = df["roll_number"].to_numpy()
+        questions = df["question"].to_numpy()
+
+        bounds = np.flatnonzero(np.diff(attempt[positions])) + 1
+        for rows in np.split(positions, bounds) if len(positions) else []:
+            first = int(rows.min())
+            codes = pair[rows]
+            rows, codes = rows[codes >= 0], codes[codes >= 0]
+            q_bounds = np.flatnonzero(np.diff(codes)) + 1
+            groups = np.split(rows, q_bounds) if len(rows) else []
+            unique_codes = codes[np.r_[0, q_bounds]] if len(rows) else codes
+            yield (
+                files[first],
+                students[first],
+                rolls[first],
+                first,
+                float(q_sums[unique_codes].sum()),
+                [(questions[g[0]], g) for g in groups],
+            )
+
+    # -------------------------------------------------------------------------
+    def _write_html(self, html_out, df: pd.DataFrame, df_summary, summary_rows) -> None:
+        """Write the report page to `html_out`, one student block at a time."""
+        # Header, styles, scripts
+        html_out.write(_PAGE_HEAD)
+        html_out.write(
+            """    let errorTable = null;
+    function fillErrors(root) {
+        if(errorTable === null) {
+            const el = document.getElementById("errorTable");
+            errorTable = el ? JSON.parse(el.textContent) : [];
+        }
+        root.querySelectorAll(".error-box[data-err]").forEach(box => {
+            box.innerHTML = errorTable[+box.dataset.err];
+            box.removeAttribute("data-err");
+        });
+    }
+    // Student blocks wait in <template id="t<n>"> elements; only the matches of
+    // the current filters are instantiated, a window at a time as the list
+    // is scrolled, and filtering / sorting work on the student index alone.
+    const WINDOW = 50;
+    let studentIndex = null;
+    let order = [];
+    let matches = [];
+    let rendered = 0;
+    function loadIndex() {
+        studentIndex = JSON.parse(document.getElementById("studentIndex").textContent);
+        studentIndex.text = studentIndex.name.map((name, n) =>
+            [name, studentIndex.roll[n], studentIndex.file[n]].join(" ").toLowerCase());
+        order = studentIndex.name.map((name, n) => n);
+    }
+    function renderMore() {
+        const end = Math.min(rendered + WINDOW, matches.length);
+        const blocks = document.createDocumentFragment();
+        for(; rendered < end; rendered++) {
+            blocks.appendChild(document.getElementById("t" + matches[rendered]).content.cloneNode(true));
+        }
+        document.getElementById("reportContainer").appendChild(blocks);
+        const more = document.getElementById("showMore");
+        more.style.display = rendered < matches.length ? "block" : "none";
+        more.innerText = `Show more (${matches.length - rendered} remaining)`;
+        if(rendered < matches.length && more.getBoundingClientRect().top < window.innerHeight) {
+            requestAnimationFrame(renderMore);
+        }
+    }
+    function filterReports() {
+        const studentVal = document.getElementById("studentSelect").value;
+        const rollVal = document.getElementById("rollSelect").value;
+        const fileVal = document.getElementById("fileSelect").value;
+        const bandVal = document.getElementById("bandSelect").value;
+        const searchVal = document.getElementById("searchInput").value.toLowerCase();
+        const idx = studentIndex;
+        matches = order.filter(n =>
+            (studentVal === "" || idx.name[n] === studentVal) &&
+            (rollVal === "" || idx.roll[n] === rollVal) &&
+            (fileVal === "" || idx.file[n] === fileVal) &&
+            (bandVal === "" || idx.band[n] === +bandVal) &&
+            (searchVal === "" || idx.text[n].indexOf(searchVal) !== -1)
+        );
+        rendered = 0;
+        document.getElementById("reportContainer").replaceChildren();
+        renderMore();
+    }
+    function sortStudents() {
+        const sortType = document.getElementById("sortSelect").value;
+        const idx = studentIndex;
+        const keys = {name: idx.name, roll: idx.roll, file: idx.file}[sortType];
+        order = idx.name.map((name, n) => n);
+        if(sortType === "marks") {
+            order.sort((a, b) => idx.total[b] - idx.total[a]);
+        } else if(keys) {
+            order.sort((a, b) => keys[a].toLowerCase().localeCompare(keys[b].toLowerCase()));
+        }
+        filterReports();
+    }
+    function toggleDetails(evt, qid) {
+        const details = document.getElementById(qid);
+        if(!details) return;
+        if(details.style.display === "block") {
+            details.style.display = "none";
+            evt.currentTarget.querySelector(".collapse-indicator").innerText = "+";
+        } else {
+            fillErrors(details);
+            details.style.display = "block";
+            evt.currentTarget.querySelector(".collapse-indicator").innerText = "−";
+        }
+    }
+    window.addEventListener('DOMContentLoaded', (event) => {
+        initDarkModeFromStorage();
+        // Blocks come and go, so question headers are handled by delegation
+        document.getElementById("reportContainer").addEventListener('click', function(e) {
+            const hdr = e.target.closest('.question-header');
+            if(hdr) toggleDetails({ currentTarget: hdr }, hdr.getAttribute('data-qid'));
+        });
+        new IntersectionObserver((entries) => {
+            if(entries[0].isIntersecting && rendered < matches.length) renderMore();
+        }).observe(document.getElementById("showMore"));
+        loadIndex();
+        filterReports();
+    });
+</script>
+</head>
+<body>
+<h1>Evaluator Report</h1>
+"""
+        )
+        self._write_controls(html_out, df, df_summary, indexed=True)
+        html_out.write('<div id="reportContainer"></div>\n')
+        html_out.write(
+            '<button id="showMore" class="btn ghost" onclick="renderMore()" '
+            'style="display:none;">Show more</button>\n'
+        )
+
+        # --- student blocks per attempt ---
+        error_ids = "error_id" in df.columns and self.matrix is not None
+        assertions = df["assertion"].to_numpy()
+        statuses = df["status"].to_numpy()
+        scores = df["score"].to_numpy(np.float64)
+        errors = df["error"].to_numpy()
+        codes = df["error_id"].to_numpy() if error_ids else np.full(len(df), NO_ERROR)
+        descriptions = df["description"].to_numpy()
+        best_n_totals = df["best_n_total"].to_numpy()
+        scaled_values = df["scaled"].to_numpy()
+
+        index: Dict[str, List] = {"name": [], "roll": [], "file": [], "total": [], "band": []}
+        for n, (file, student, roll_number, first, total_score, questions) in enumerate(
+            self._attempt_groups(df)
+        ):
+            # total per attempt (per file), not accumulated across all attempts
+            best_n_val = float(best_n_totals[first])
+            scaled_val = float(scaled_values[first])
+            index["name"].append(student)
+            index["roll"].append(str(roll_number))
+            index["file"].append(Path(file).name if file else "")
+            index["total"].append(total_score)
+            index["band"].append(self._score_band(total_score))
+
+            html_out.write(f"<template id='t{n}'>")
+            self._write_student_meta(
+                html_out, file, student, roll_number, total_score, best_n_val, scaled_val
+            )
+
+            _write_question_blocks(
+                html_out,
+                (
+                    (
+                        f"q_{abs(hash((file, student, roll_number, str(q))))}",
+                        q,
+                        descriptions[rows[0]],
+                        zip(
+                            assertions[rows], statuses[rows], scores[rows], errors[rows], codes[rows]
+                        ),
+                    )
+                    for q, rows in questions
+                ),
+                error_ids,
+            )
+
+            html_out.write("</div>")  # end student-block
+            html_out.write("</template>\n")
+
+        index_json = json.dumps(index, ensure_ascii=False).replace("</", "<\\/")
+        html_out.write(f'<script type="application/json" id="studentIndex">{index_json}</script>\n')
+
+        # --- error table: every distinct error once, rows reference it by id ---
+        if error_ids:
+            errors_json = json.dumps(
+                [self._escape_error_html(e) for e in self.error_table], ensure_ascii=False
+            ).replace("</", "<\\/")
+            html_out.write(
+                f'<script type="application/json" id="errorTable">{errors_json}</script>\n'
+            )
+
+        self._write_summary(html_out, summary_rows)
+        html_out.write(
+            """
+<script>
+    // small helper to expand all question details if needed
+    function expandAll() {
+        fillErrors(document);
+        document.querySelectorAll('.question-details').forEach(d => d.style.display = 'block');
+        document.querySelectorAll('.collapse-indicator').forEach(i => i.innerText = '−');
+    }
+    function collapseAll() {
+        document.querySelectorAll('.question-details').forEach(d => d.style.display = 'none');
+        document.querySelectorAll('.collapse-indicator').forEach(i => i.innerText = '+');
+    }
+</script>
+
+</body>
+</html>
+"""
+        )
+
+    # -------------------------------------------------------------------------
+    def _score_band(self, total_score: float) -> int:
+        """Index into SCORE_BANDS of an attempt total."""
+        percentage = total_score / self.total_assertions * 100 if self.total_assertions else 0.0
+        bands = np.searchsorted(SCORE_BANDS, percentage, side="right") - 1
+        return int(min(max(bands, 0), len(SCORE_BANDS) - 1))
+
+    # -------------------------------------------------------------------------
+    def _write_controls(self, out, df: pd.DataFrame, df_summary, indexed: bool = False) -> None:
+        """
+        Intro line and the filter/sort controls. `indexed` pages filter on
+        the student index (name, roll, file, score band) rather than on the
+        rendered text, and get a score band filter.
+        """
+        if self.executions_saved:
+            out.write(
+                f"<p class='muted'>Duplicate submissions: {self.executions_saved} "
+                "execution(s) saved by reusing results of identical code.</p>\n"
+            )
+        out.write(
+            """
+<div class="controls panel">
+    <label for="sortSelect">Sort by:</label>
+    <select id="sortSelect" onchange="sortStudents()">
+        <option value="marks">Total Marks (High → Low)</option>
+        <option value="name">Student Name (A → Z)</option>
+        <option value="roll">Roll Number (A → Z)</option>
+        <option value="file">File Name (A → Z)</option>
+    </select>
+
+    <label for="studentSelect">Student:</label>
+    <select id="studentSelect" onchange="filterReports()">
+        <option value="">-- All Students --</option>
+"""
+        )
+
+        # populate select options
+        for student in sorted(df_summary["student"].dropna().unique()):
+            out.write(
+                f"<option value='{html_lib.escape(student)}'>{html_lib.escape(student)}</option>"
+            )
+        out.write("</select>")
+
+        out.write(
+            """
+    <label for="rollSelect">Roll:</label>
     <select id="rollSelect" onchange="filterReports()">
         <option value="">-- All Rolls --</option>
 """
         )
         for roll in sorted(df_summary["roll_number"].dropna().astype(str).unique()):
-            html_out.write(
+            out.write(
                 f"<option value='{html_lib.escape(str(roll))}'>{html_lib.escape(str(roll))}</option>"
             )
-        html_out.write("</select>")
+        out.write("</select>")
 
-        html_out.write(
+        out.write(
             """
     <label for="fileSelect">File:</label>
     <select id="fileSelect" onchange="filterReports()">
@@ -515,14 +1613,29 @@ class ReportingService:
         # file names
         unique_files = sorted({Path(f).name for f in df["file"].unique()})
         for file in unique_files:
-            html_out.write(
+            out.write(
                 f"<option value='{html_lib.escape(file)}'>{html_lib.escape(file)}</option>"
             )
-        html_out.write("</select>")
-
-        html_out.write(
-            """
-    <input id="searchInput" type="search" placeholder="Search inside reports..." oninput="filterReports()" style="min-width:200px;">
+        out.write("</select>")
+
+        placeholder = "Search inside reports..."
+        if indexed:
+            placeholder = "Search name, roll or file..."
+            out.write(
+                """
+    <label for="bandSelect">Score:</label>
+    <select id="bandSelect" onchange="filterReports()">
+        <option value="">-- All Scores --</option>
+"""
+            )
+            for band, low in enumerate(SCORE_BANDS):
+                high = SCORE_BANDS[band + 1] if band + 1 < len(SCORE_BANDS) else 100
+                out.write(f"<option value='{band}'>{low}–{high}%</option>")
+            out.write("</select>")
+
+        out.write(
+            f"""
+    <input id="searchInput" type="search" placeholder="{placeholder}" oninput="filterReports()" style="min-width:200px;">
     <div class="spacer"></div>
     <div class="toggle">
         <button class="btn" onclick="showSummary()">Show Summary</button>
@@ -535,96 +1648,51 @@ class ReportingService:
         <button class="btn ghost" onclick="toggleDarkMode()">Toggle Dark</button>
     </div>
 </div>
-<div id="reportContainer">
 """
         )
 
-        # --- student blocks per attempt ---
-        for (file, student, roll_number), g in grouped:
-            # FIX: calculate total per attempt (per file), not accumulated across all attempts
-            total_score = float(g.groupby("question", sort=False)["score"].sum().sum())
-
-            total_possible = self.total_assertions
-            percentage = round((total_score / total_possible) * 100, 2) if total_possible else 0.0
-            best_n_val = float(g["best_n_total"].iloc[0]) if "best_n_total" in g.columns else 0.0
-            scaled_val = float(g["scaled"].iloc[0]) if "scaled" in g.columns else 0.0
-
-            short_file = Path(file).name if file else ""
-
-            html_out.write(
-                f'<div class="student-block panel" data-name="{html_lib.escape(student)}" '
-                f'data-roll="{html_lib.escape(str(roll_number))}" data-file="{html_lib.escape(short_file)}" '
-                f'data-total="{total_score}">'
-            )
-
-            html_out.write(
-                f"<div class='student-meta'><div><h3>{html_lib.escape(student)}</h3><div class='muted'>Roll: {html_lib.escape(str(roll_number))}</div></div>"
-            )
-            html_out.write(
-                f"<div style='margin-left:auto; display:flex; gap:8px; align-items:center;'>"
-            )
-            html_out.write(f"<div class='summary-pill'>File: {html_lib.escape(short_file)}</div>")
-            html_out.write(
-                f"<div class='summary-pill'>Total: {total_score}/{total_possible} ({percentage}%)</div>"
-            )
-
-            # Conditionally show Best-N and Scaled pills
-            if self.best_n:
-                html_out.write(f"<div class='summary-pill'>Best {self.best_n}: {best_n_val}</div>")
-
-            if self.scaled_range:
-                # scaled_val may be 0 if scaling disabled or not computable; show rounded
-                html_out.write(f"<div class='summary-pill'>Scaled: {round(scaled_val,2)}</div>")
-
-            html_out.write("</div></div>")  # end student-meta
-
-            # group per question
-            for q, subdf in g.groupby("question", sort=False):
-                qid = f"q_{abs(hash((file, student, roll_number, str(q))))}"
-                html_out.write(f"<div class='question-block'>")
-                html_out.write(f"<div class='question-header' data-qid='{qid}'>")
-                html_out.write(f"<h4>Question: {html_lib.escape(str(q))}</h4>")
-                html_out.write(f"<div class='collapse-indicator'>+</div>")
-                html_out.write("</div>")  # header
-                html_out.write(f"<div class='question-details' id='{qid}'>")
-                desc = subdf["description"].iloc[0] if "description" in subdf.columns else ""
-                if desc:
-                    html_out.write(
-                        f"<div class='muted' style='margin-bottom:8px;'>Description: {html_lib.escape(str(desc))}</div>"
-                    )
+    # -------------------------------------------------------------------------
+    def _write_student_meta(
+        self, out, file, student, roll_number, total_score, best_n_val, scaled_val
+    ) -> None:
+        """Open an attempt's student block and write its header pills."""
+        total_possible = self.total_assertions
+        percentage = round((total_score / total_possible) * 100, 2) if total_possible else 0.0
+        short_file = Path(file).name if file else ""
+
+        out.write(
+            f'<div class="student-block panel" data-name="{html_lib.escape(student)}" '
+            f'data-roll="{html_lib.escape(str(roll_number))}" data-file="{html_lib.escape(short_file)}" '
+            f'data-total="{total_score}">'
+        )
 
-                html_out.write(
-                    "<table><thead><tr><th style='width:55%'>Assertion</th><th style='width:10%'>Status</th><th style='width:8%'>Score</th><th>Error</th></tr></thead><tbody>"
-                )
+        out.write(
+            f"<div class='student-meta'><div><h3>{html_lib.escape(student)}</h3><div class='muted'>Roll: {html_lib.escape(str(roll_number))}</div></div>"
+        )
+        out.write(
+            f"<div style='margin-left:auto; display:flex; gap:8px; align-items:center;'>"
+        )
+        out.write(f"<div class='summary-pill'>File: {html_lib.escape(short_file)}</div>")
+        out.write(
+            f"<div class='summary-pill'>Total: {total_score}/{total_possible} ({percentage}%)</div>"
+        )
 
-                for _, row in subdf.iterrows():
-                    row_class = "passed" if row["status"] == "passed" else "failed"
-                    assertion_text = html_lib.escape(str(row["assertion"]))
-                    status_text = html_lib.escape(str(row["status"]))
-                    score_text = row["score"]
-                    err_html = ""
-                    if row.get("error"):
-                        err_html = f"<div class='error-box'>{self._escape_error_html(row.get('error'))}</div>"
-                    html_out.write(
-                        f"<tr class='{row_class}'>"
-                        f"<td>{assertion_text}</td>"
-                        f"<td>{status_text}</td>"
-                        f"<td>{score_text}</td>"
-                        f"<td>{err_html}</td>"
-                        f"</tr>"
-                    )
+        # Conditionally show Best-N and Scaled pills
+        if self.best_n:
+            out.write(f"<div class='summary-pill'>Best {self.best_n}: {best_n_val}</div>")
 
-                html_out.write("</tbody></table>")
-                html_out.write("</div>")  # end question-details
-                html_out.write("</div>")  # end question-block
+        if self.scaled_range:
+            # scaled_val may be 0 if scaling disabled or not computable; show rounded
+            out.write(f"<div class='summary-pill'>Scaled: {round(scaled_val,2)}</div>")
 
-            html_out.write("</div>")  # end student-block
+        out.write("</div></div>")  # end student-meta
 
+    # -------------------------------------------------------------------------
+    def _write_summary(self, out, summary_rows) -> None:
+        """The Summary modal: one row per student from `summary_rows`."""
         # --- summary modal content ---
-        html_out.write(
-            """
-</div> <!-- reportContainer -->
-<div id="overlay" onclick="closeSummary()"></div>
+        out.write(
+            """<div id="overlay" onclick="closeSummary()"></div>
 <div id="summaryModal" class="summary-modal">
     <div style="display:flex; justify-content:space-between; align-items:center;">
         <h2>Student Summary</h2>
@@ -632,69 +1700,53 @@ class ReportingService:
     </div>
     <div style="margin-top:12px;">
         <table style="width:100%;">
+"""
+        )
+        self._write_summary_table(out, summary_rows)
+        out.write(
+            """
+            </tbody>
+        </table>
+    </div>
+</div>
 """
         )
 
+    def _write_summary_table(self, out, summary_rows) -> None:
+        """Header and rows of the student summary table, up to its open `<tbody>`."""
         # Build summary table header conditionally
-        html_out.write("<thead><tr><th>Student</th><th>Roll Number</th>")
+        out.write("<thead><tr><th>Student</th><th>Roll Number</th>")
         if self.best_n:
-            html_out.write("<th>Highest Best-N</th><th>Best out of</th>")
+            out.write("<th>Highest Best-N</th><th>Best out of</th>")
         if self.scaled_range:
-            html_out.write("<th>Scaled Score</th>")
+            out.write("<th>Scaled Score</th>")
         if not self.best_n:
-            html_out.write("<th>Marks Obtained</th><th>Out of</th>")
+            out.write("<th>Marks Obtained</th><th>Out of</th>")
 
-        html_out.write("</tr></thead><tbody>")
+        out.write("</tr></thead><tbody>")
 
         # Now write rows from summary_rows
         if summary_rows:
             for row in summary_rows:
                 student = html_lib.escape(str(row.get("student", row.get("student", ""))))
                 roll = html_lib.escape(str(row.get("roll_number", row.get("roll_number", ""))))
-                html_out.write(f"<tr><td>{student}</td><td>{roll}</td>")
+                out.write(f"<tr><td>{student}</td><td>{roll}</td>")
                 if self.best_n:
                     best_n_best = float(row.get("best_n_best", row.get("display_metric", 0.0)))
                     out_of = min(self.best_n, self.total_assertions)
-                    html_out.write(f"<td>{best_n_best}</td><td>{out_of}</td>")
+                    out.write(f"<td>{best_n_best}</td><td>{out_of}</td>")
                 if self.scaled_range:
                     # display scaled from either student_best_df or 0
                     scaled_val = float(row.get("best_scaled", row.get("scaled_display", 0.0)))
-                    html_out.write(f"<td>{round(scaled_val,2)}</td>")
+                    out.write(f"<td>{round(scaled_val,2)}</td>")
                 if not self.best_n:
                     total_marks = float(row.get("display_metric", 0.0))
                     total_possible = self.total_assertions
-                    html_out.write(f"<td>{total_marks}</td><td>{total_possible}</td>")
+                    out.write(f"<td>{total_marks}</td><td>{total_possible}</td>")
 
-                html_out.write("</tr>")
+                out.write("</tr>")
         else:
-            html_out.write("<tr><td colspan='5'>No student summaries available.</td></tr>")
-
-        html_out.write(
-            """
-            </tbody>
-        </table>
-    </div>
-</div>
-
-<script>
-    // small helper to expand all question details if needed
-    function expandAll() {
-        document.querySelectorAll('.question-details').forEach(d => d.style.display = 'block');
-        document.querySelectorAll('.collapse-indicator').forEach(i => i.innerText = '−');
-    }
-    function collapseAll() {
-        document.querySelectorAll('.question-details').forEach(d => d.style.display = 'none');
-        document.querySelectorAll('.collapse-indicator').forEach(i => i.innerText = '+');
-    }
-</script>
-
-</body>
-</html>
-"""
-        )
-
-        path.write_text(html_out.getvalue(), encoding="utf8")
-        return path
+            out.write("<tr><td colspan='5'>No student summaries available.</td></tr>")
 
 
 # -------------------------------------------------------------------------
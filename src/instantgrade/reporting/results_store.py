@@ -0,0 +1,349 @@
+"""
+Grading results of many runs in one SQLite database.
+
+Every run (one grading of a class) gets a row in `runs`; its graded files
+go to `attempts`, the summed score of each attempt's question to
+`question_scores` and every assertion outcome to `outcomes`. Question
+names are shared across runs through `questions`, so comparing semesters,
+spotting regressions after a solution change or pulling one student's
+history are indexed queries:
+
+    with ResultsStore("results.db") as store:
+        run = store.add_run(report.executed_results, name="2025 fall")
+        store.student_history("Ann")
+        store.regressions(before=run - 1, after=run)
+
+The database runs in WAL mode, so reports can be queried while a run is
+being written, and rows are inserted in batches of `batch_size` with
+`executemany` inside one transaction per batch.
+"""
+
+import json
+import sqlite3
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+import pandas as pd
+
+from instantgrade.core.models import ExecutionResult
+from instantgrade.reporting.score_matrix import attempt_identity, row_values
+
+STORE_VERSION = 1
+
+# Result rows buffered before they are written
+RESULTS_BATCH_SIZE = 5000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id INTEGER PRIMARY KEY,
+    name TEXT,
+    created_at TEXT NOT NULL,
+    meta TEXT
+);
+CREATE TABLE IF NOT EXISTS questions (
+    question_id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS attempts (
+    attempt_id INTEGER PRIMARY KEY,
+    run_id INTEGER NOT NULL REFERENCES runs(run_id),
+    file TEXT,
+    student TEXT,
+    roll_number TEXT,
+    total_score REAL NOT NULL,
+    assertions INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS question_scores (
+    attempt_id INTEGER NOT NULL REFERENCES attempts(attempt_id),
+    run_id INTEGER NOT NULL,
+    student TEXT,
+    question_id INTEGER NOT NULL REFERENCES questions(question_id),
+    score REAL NOT NULL,
+    assertions INTEGER NOT NULL,
+    PRIMARY KEY (attempt_id, question_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS outcomes (
+    attempt_id INTEGER NOT NULL REFERENCES attempts(attempt_id),
+    position INTEGER NOT NULL,
+    question_id INTEGER NOT NULL REFERENCES questions(question_id),
+    assertion TEXT,
+    status TEXT,
+    score REAL NOT NULL,
+    error TEXT,
+    PRIMARY KEY (attempt_id, position)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS attempts_student_run ON attempts (student, run_id);
+CREATE INDEX IF NOT EXISTS attempts_run ON attempts (run_id);
+CREATE INDEX IF NOT EXISTS scores_student ON question_scores (student, question_id, run_id);
+CREATE INDEX IF NOT EXISTS scores_question ON question_scores (question_id, run_id);
+"""
+
+
+def _text(value: Any) -> Optional[str]:
+    return None if value is None else str(value)
+
+
+def _score(value: Any) -> float:
+    try:
+        score = float(value if value is not None else 0)
+    except (TypeError, ValueError):
+        return 0.0
+    return 0.0 if score != score else score
+
+
+class ResultsStore:
+    """Runs, attempts, question scores and assertion outcomes in SQLite."""
+
+    def __init__(self, path: str | Path, batch_size: int = RESULTS_BATCH_SIZE):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.batch_size = max(1, int(batch_size))
+        self.conn = sqlite3.connect(str(self.path))
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        # WAL keeps committed batches durable across crashes at this level
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("PRAGMA foreign_keys=ON")
+        version = self.conn.execute("PRAGMA user_version").fetchone()[0]
+        if version not in (0, STORE_VERSION):
+            self.conn.close()
+            raise ValueError(
+                f"{self.path} is a version {version} results store; expected {STORE_VERSION}"
+            )
+        with self.conn:
+            self.conn.executescript(_SCHEMA)
+            self.conn.execute(f"PRAGMA user_version={STORE_VERSION}")
+
+        self._question_ids: Dict[str, int] = dict(
+            (name, qid)
+            for qid, name in self.conn.execute("SELECT question_id, name FROM questions")
+        )
+        # Buffered rows refer to attempts by their index in `_attempts`;
+        # ids are assigned when the batch is written
+        self._attempts: List[tuple] = []
+        self._question_scores: List[tuple] = []
+        self._outcomes: List[tuple] = []
+
+    # ------------------------------------------------------------------
+    def __enter__(self) -> "ResultsStore":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        # A failed run keeps only the batches already written
+        self.close(flush=exc_type is None)
+
+    def close(self, flush: bool = True) -> None:
+        """Write any buffered rows (unless `flush` is False) and close the database."""
+        if self.conn is None:
+            return
+        if flush:
+            self.flush()
+        else:
+            self.conn.rollback()
+            self._attempts, self._question_scores, self._outcomes = [], [], []
+        self.conn.close()
+        self.conn = None
+
+    # ------------------------------------------------------------------
+    # Writing
+    # ------------------------------------------------------------------
+    def start_run(self, name: Optional[str] = None, meta: Optional[Dict[str, Any]] = None) -> int:
+        """Register a new run and return its id."""
+        with self.conn:
+            cursor = self.conn.execute(
+                "INSERT INTO runs (name, created_at, meta) VALUES (?, ?, ?)",
+                (
+                    name,
+                    datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                    json.dumps(meta, default=str) if meta else None,
+                ),
+            )
+        return cursor.lastrowid
+
+    def add_result(self, run_id: int, result) -> bool:
+        """
+        Buffer one graded result (legacy dict or `ExecutionResult`) of
+        `run_id`; False when it has no rows (left out, as in reports).
+        Buffers are written once `batch_size` rows have accumulated.
+        """
+        item = result.to_dict() if isinstance(result, ExecutionResult) else result
+        rows = item.get("results", []) or []
+        if not rows:
+            return False
+        file, student, roll = attempt_identity(item)
+        attempt_id = len(self._attempts)
+
+        scores: Dict[int, List[float]] = {}
+        for position, row in enumerate(rows):
+            question, assertion, status, score, error, _ = row_values(row)
+            qid = self._question_id("" if question is None else str(question))
+            score = _score(score)
+            self._outcomes.append(
+                (attempt_id, position, qid, _text(assertion), _text(status), score, _text(error))
+            )
+            totals = scores.setdefault(qid, [0.0, 0])
+            totals[0] += score
+            totals[1] += 1
+        self._question_scores.extend(
+            (attempt_id, run_id, student, qid, total, n) for qid, (total, n) in scores.items()
+        )
+        self._attempts.append(
+            (
+                attempt_id,
+                run_id,
+                file,
+                student,
+                str(roll),
+                sum(total for total, _ in scores.values()),
+                len(rows),
+            )
+        )
+        if len(self._outcomes) >= self.batch_size:
+            self.flush()
+        return True
+
+    def add_run(
+        self,
+        executed_results: Iterable,
+        name: Optional[str] = None,
+        meta: Optional[Dict[str, Any]] = None,
+    ) -> int:
+        """Store `executed_results` as a new run and return its id."""
+        run_id = self.start_run(name, meta)
+        for result in executed_results or []:
+            self.add_result(run_id, result)
+        self.flush()
+        return run_id
+
+    def flush(self) -> None:
+        """Write the buffered rows in one transaction."""
+        if not self._attempts:
+            return
+
+        def shifted(rows: List[tuple]):
+            return ((first + row[0],) + row[1:] for row in rows)
+
+        with self.conn:
+            # Taken before reading the next id, so concurrent writers queue
+            self.conn.execute("BEGIN IMMEDIATE")
+            first = self.conn.execute(
+                "SELECT COALESCE(MAX(attempt_id), 0) + 1 FROM attempts"
+            ).fetchone()[0]
+            self.conn.executemany(
+                "INSERT INTO attempts VALUES (?, ?, ?, ?, ?, ?, ?)", shifted(self._attempts)
+            )
+            self.conn.executemany(
+                "INSERT INTO question_scores VALUES (?, ?, ?, ?, ?, ?)",
+                shifted(self._question_scores),
+            )
+            self.conn.executemany(
+                "INSERT INTO outcomes VALUES (?, ?, ?, ?, ?, ?, ?)", shifted(self._outcomes)
+            )
+        self._attempts, self._question_scores, self._outcomes = [], [], []
+
+    def _question_id(self, name: str) -> int:
+        qid = self._question_ids.get(name)
+        if qid is None:
+            with self.conn:
+                self.conn.execute("INSERT OR IGNORE INTO questions (name) VALUES (?)", (name,))
+            qid = self.conn.execute(
+                "SELECT question_id FROM questions WHERE name = ?", (name,)
+            ).fetchone()[0]
+            self._question_ids[name] = qid
+        return qid
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+    def query(self, sql: str, params=()) -> pd.DataFrame:
+        """Run `sql` (with `?` or `:name` `params`) against the store, buffered rows included."""
+        self.flush()
+        return pd.read_sql_query(sql, self.conn, params=params)
+
+    def runs(self) -> pd.DataFrame:
+        """One row per run with its number of attempts and mean total."""
+        return self.query("""
+            SELECT r.run_id, r.name, r.created_at, r.meta,
+                   COUNT(a.attempt_id) AS attempts, AVG(a.total_score) AS mean_total
+            FROM runs r LEFT JOIN attempts a ON a.run_id = r.run_id
+            GROUP BY r.run_id ORDER BY r.run_id
+            """)
+
+    def student_history(
+        self,
+        student: str,
+        question: Optional[str] = None,
+        roll_number: Optional[str] = None,
+    ) -> pd.DataFrame:
+        """
+        Every attempt of `student` across runs, oldest run first: the
+        attempt's totals, or with `question` that question's score. Pass
+        `roll_number` to tell apart students who share a name.
+        """
+        params = {"student": student, "roll": roll_number, "question": question}
+        if question is None:
+            return self.query(
+                """
+                SELECT a.run_id, r.name AS run, a.file, a.student, a.roll_number,
+                       a.total_score, a.assertions
+                FROM attempts a JOIN runs r ON r.run_id = a.run_id
+                WHERE a.student = :student AND (:roll IS NULL OR a.roll_number = :roll)
+                ORDER BY a.run_id, a.attempt_id
+                """,
+                params,
+            )
+        return self.query(
+            """
+            SELECT s.run_id, r.name AS run, a.file, s.student, a.roll_number,
+                   q.name AS question, s.score, s.assertions
+            FROM question_scores s
+            JOIN questions q ON q.question_id = s.question_id
+            JOIN attempts a ON a.attempt_id = s.attempt_id
+            JOIN runs r ON r.run_id = s.run_id
+            WHERE s.student = :student AND (:roll IS NULL OR a.roll_number = :roll)
+                AND q.name = :question
+            ORDER BY s.run_id, s.attempt_id
+            """,
+            params,
+        )
+
+    def compare_runs(self, before: int, after: int) -> pd.DataFrame:
+        """Per question: mean score and attempts in run `before` and `after`, and the change."""
+        return self.query(
+            """
+            SELECT q.name AS question,
+                   AVG(CASE WHEN s.run_id = :before THEN s.score END) AS mean_before,
+                   AVG(CASE WHEN s.run_id = :after THEN s.score END) AS mean_after,
+                   SUM(s.run_id = :before) AS attempts_before,
+                   SUM(s.run_id = :after) AS attempts_after
+            FROM question_scores s JOIN questions q ON q.question_id = s.question_id
+            WHERE s.run_id IN (:before, :after)
+            GROUP BY s.question_id ORDER BY s.question_id
+            """,
+            {"before": before, "after": after},
+        ).assign(change=lambda df: df["mean_after"] - df["mean_before"])
+
+    def regressions(self, before: int, after: int) -> pd.DataFrame:
+        """
+        Students (by name and roll number) whose best score on a question
+        dropped from run `before` to `after`.
+        """
+        return self.query(
+            """
+            WITH best AS (
+                SELECT s.run_id, s.student, a.roll_number, s.question_id, MAX(s.score) AS score
+                FROM question_scores s JOIN attempts a ON a.attempt_id = s.attempt_id
+                WHERE s.run_id IN (:before, :after)
+                GROUP BY s.run_id, s.student, a.roll_number, s.question_id
+            )
+            SELECT b.student, b.roll_number, q.name AS question,
+                   b.score AS score_before, a.score AS score_after
+            FROM best b
+            JOIN best a ON a.student = b.student AND a.roll_number IS b.roll_number
+                AND a.question_id = b.question_id
+            JOIN questions q ON q.question_id = b.question_id
+            WHERE b.run_id = :before AND a.run_id = :after AND a.score < b.score
+            ORDER BY b.student, b.roll_number, b.question_id
+            """,
+            {"before": before, "after": after},
+        )
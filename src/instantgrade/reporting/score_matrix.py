@@ -0,0 +1,557 @@
+"""
+Student × assertion score matrix.
+
+Every graded attempt (one submission file) is a row and every distinct
+assertion a column. Scores live in one dense NumPy array, `uint8` when all
+scores are whole numbers in 0..255 (pass/fail assertions) and `float64`
+otherwise (fractional differential scores), with a parallel `uint8` status
+code matrix (`STATUS_ABSENT` where an attempt has no row for an assertion).
+
+Columns are grouped by question, so per-question totals are a single
+`np.add.reduceat` and attempt totals, Best-N, scaling and class statistics
+are reductions over that. Each distinct error text is stored once in
+`error_table` and rows refer to it by id (`error_codes`). The long-format
+rows (one per result row, in the original order) are only materialized by
+`to_frame()`.
+
+`QuestionTotals` is the attempts × questions counterpart for summary-only
+reports: scores are folded into per-question totals as results arrive and
+no assertion columns are kept.
+"""
+
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from instantgrade.core.models import AssertionRecord
+
+STATUS_ABSENT = 0
+NO_ERROR = -1
+
+FRAME_COLUMNS = (
+    "file",
+    "student",
+    "roll_number",
+    "question",
+    "assertion",
+    "status",
+    "score",
+    "error",
+    "description",
+)
+
+
+def attempt_identity(item: Dict[str, Any]) -> Tuple[str, str, str]:
+    """(file, student, roll_number) of one legacy result dict, as reporting shows it."""
+    student_path = Path(item.get("student_path", ""))
+    ns = item.get("execution", {}).get("namespace", {}) or {}
+    meta = item.get("execution", {}).get("student_meta", {}) or {}
+    student = meta.get("name") or ns.get("name") or student_path.stem or "unknown"
+    roll = meta.get("roll_number") or ns.get("roll_number") or "N/A"
+    return str(student_path), student, roll
+
+
+def row_values(row: Any) -> Tuple:
+    """A result row's values in `ROW_FIELDS` order."""
+    if isinstance(row, AssertionRecord):
+        return row.as_tuple()
+    return (
+        row.get("question"),
+        row.get("assertion"),
+        row.get("status"),
+        row.get("score", 0),
+        row.get("error"),
+        row.get("description", ""),
+    )
+
+
+def _score_value(value: Any) -> float:
+    try:
+        score = float(value if value is not None else 0)
+    except (TypeError, ValueError):
+        return 0.0
+    return 0.0 if score != score else score
+
+
+def _scores_array(score: Tuple) -> np.ndarray:
+    """A row group's scores as float64, with missing or invalid scores as 0."""
+    try:
+        scores = np.asarray(score, dtype=np.float64)
+    except (TypeError, ValueError):
+        scores = np.fromiter(map(_score_value, score), np.float64, len(score))
+    scores[np.isnan(scores)] = 0.0
+    return scores
+
+
+def _best_n_totals(q_totals: np.ndarray, n: int) -> np.ndarray:
+    """Sum of each row's `n` highest question totals."""
+    if q_totals.shape[1] == 0:
+        return np.zeros(q_totals.shape[0])
+    if n < q_totals.shape[1]:
+        # Only the n largest are needed, not a full sort
+        q_totals = np.partition(q_totals, q_totals.shape[1] - n, axis=1)[:, -n:]
+    # Summed largest first, so fractional totals round the same every time
+    return np.sort(q_totals, axis=1)[:, ::-1].sum(axis=1)
+
+
+def _categorical(values: List[Any], index: np.ndarray) -> pd.Categorical:
+    """
+    `values[index]` as a categorical over the distinct `values`. Missing
+    values (None/NaN) and an index of -1 (e.g. NO_ERROR) come out missing.
+    """
+    codes, uniques = pd.factorize(np.asarray(values + [None], dtype=object))
+    return pd.Categorical.from_codes(codes[index], uniques)
+
+
+class ScoreMatrix:
+    """Dense scores and status codes for a set of graded attempts."""
+
+    def __init__(
+        self,
+        attempts: List[Tuple[str, str, str]],
+        columns: List[Tuple[Any, Any, Any]],
+        scores: np.ndarray,
+        status: np.ndarray,
+        statuses: List[Any],
+        order: List[np.ndarray],
+        error_codes: np.ndarray,
+        error_table: List[str],
+    ):
+        self.attempts = attempts
+        # (question, assertion, description) per column, grouped by question
+        self.columns = columns
+        self.scores = scores
+        self.status = status
+        # statuses[code] is the status string for a code (index 0 unused)
+        self.statuses = statuses
+        # Column indices of each attempt's rows, in their original order
+        self.order = order
+        # Error id of every result row (attempt after attempt, in `order`)
+        # into the run's table of distinct error texts; NO_ERROR when none
+        self.error_codes = error_codes
+        self.error_table = error_table
+
+        questions: List[Any] = []
+        starts: List[int] = []
+        for j, (question, _, _) in enumerate(columns):
+            if not questions or questions[-1] != question:
+                questions.append(question)
+                starts.append(j)
+        self.questions = questions
+        self._starts = np.asarray(starts, dtype=np.intp)
+
+    # ------------------------------------------------------------------
+    @classmethod
+    def from_results(cls, executed_results: Iterable[Dict[str, Any]]) -> "ScoreMatrix":
+        """Build from legacy result dicts; attempts without rows are left out."""
+        builder = ScoreMatrixBuilder()
+        for item in executed_results or []:
+            builder.add(item)
+        return builder.build()
+
+    # ------------------------------------------------------------------
+    # Reductions
+    # ------------------------------------------------------------------
+    @property
+    def empty(self) -> bool:
+        return not self.attempts
+
+    def question_totals(self) -> np.ndarray:
+        """attempts × questions matrix of summed scores (float64)."""
+        if self.scores.size == 0:
+            return np.zeros((len(self.attempts), len(self.questions)))
+        return np.add.reduceat(self.scores, self._starts, axis=1, dtype=np.float64)
+
+    def totals(self) -> np.ndarray:
+        """Total score per attempt (float64)."""
+        return self.scores.sum(axis=1, dtype=np.float64)
+
+    def best_n_totals(self, n: int) -> np.ndarray:
+        """Sum of each attempt's `n` highest question totals."""
+        return _best_n_totals(self.question_totals(), n)
+
+    @staticmethod
+    def scale(values: np.ndarray, low: float, high: float) -> np.ndarray:
+        """Min-max map `values` onto [low, high]; all equal maps to `low`."""
+        values = np.asarray(values, dtype=np.float64)
+        if values.size == 0:
+            return values
+        min_raw, max_raw = float(values.min()), float(values.max())
+        if min_raw == max_raw:
+            return np.full(values.shape, float(low))
+        return low + (values - min_raw) * (high - low) / (max_raw - min_raw)
+
+    def status_code(self, status: Any) -> Optional[int]:
+        try:
+            return self.statuses.index(status, 1)
+        except ValueError:
+            return None
+
+    def class_stats(self) -> Dict[str, Any]:
+        """Class-wide statistics of attempt totals and per-question / per-assertion rates."""
+        totals = self.totals()
+        q_totals = self.question_totals()
+        passed = self.status_code("passed")
+        present = self.status != STATUS_ABSENT
+        n_present = present.sum(axis=0)
+        if passed is None:
+            pass_rate = np.zeros(len(self.columns))
+        else:
+            n_passed = (self.status == passed).sum(axis=0)
+            pass_rate = np.divide(
+                n_passed, n_present, out=np.zeros(len(self.columns)), where=n_present > 0
+            )
+        stats: Dict[str, Any] = {"attempts": len(self.attempts)}
+        if totals.size:
+            stats.update(
+                mean=float(totals.mean()),
+                median=float(np.median(totals)),
+                std=float(totals.std()),
+                min=float(totals.min()),
+                max=float(totals.max()),
+            )
+        stats["question_mean"] = dict(
+            zip(self.questions, q_totals.mean(axis=0).tolist() if totals.size else [])
+        )
+        stats["assertion_pass_rate"] = pass_rate
+        return stats
+
+    def question_stats(self) -> pd.DataFrame:
+        """
+        One row per question: its number of assertions, the mean question
+        total and mean percentage over attempts, and how many attempts
+        scored every assertion.
+        """
+        q_totals = self.question_totals()
+        n_assertions = np.diff(np.append(self._starts, len(self.columns)))
+        mean = q_totals.mean(axis=0) if len(self.attempts) else np.zeros(len(self.questions))
+        return pd.DataFrame(
+            {
+                "question": self.questions,
+                "assertions": n_assertions,
+                "mean": mean,
+                "percent": mean / np.maximum(n_assertions, 1) * 100,
+                "full_marks": (q_totals >= n_assertions).sum(axis=0),
+            }
+        )
+
+    # ------------------------------------------------------------------
+    # Long format
+    # ------------------------------------------------------------------
+    def to_payload(self) -> Dict[str, Any]:
+        """
+        Plain-typed, dictionary-encoded form for embedding in a report:
+        distinct questions, descriptions and error texts are listed once,
+        `columns` are `[question_id, description_id, assertion]`, each
+        attempt refers to one of the distinct column `layouts` (its rows'
+        column ids in order), `scores` / `status` are the row-major matrices
+        and `error_codes` the per-row error ids (NO_ERROR when none).
+        """
+        questions = {q: i for i, q in enumerate(self.questions)}
+        descriptions: Dict[Any, int] = {}
+        columns = [
+            [questions[q], descriptions.setdefault(d, len(descriptions)), a]
+            for q, a, d in self.columns
+        ]
+        layout_ids: Dict[int, int] = {}
+        layouts: List[List[int]] = []
+        attempts = []
+        for (file, student, roll), cols in zip(self.attempts, self.order):
+            layout = layout_ids.get(id(cols))
+            if layout is None:
+                layout = layout_ids[id(cols)] = len(layouts)
+                layouts.append(cols.tolist())
+            attempts.append([file, student, roll, layout])
+        return {
+            "questions": self.questions,
+            "descriptions": list(descriptions),
+            "columns": columns,
+            "statuses": self.statuses,
+            "errors": self.error_table,
+            "layouts": layouts,
+            "attempts": attempts,
+            "scores": self.scores.ravel().tolist(),
+            "status": self.status.ravel().tolist(),
+            "error_codes": self.error_codes.tolist(),
+        }
+
+    # ------------------------------------------------------------------
+    def row_counts(self) -> np.ndarray:
+        return np.fromiter((len(cols) for cols in self.order), dtype=np.intp, count=len(self.order))
+
+    def to_frame(self) -> pd.DataFrame:
+        """
+        One row per result row, in the original order, with `FRAME_COLUMNS`.
+        The repeated string columns are categoricals built straight from
+        this matrix's codes; `score` is float64 whatever the matrix dtype,
+        so CSV output and score sorting match the row-based frame.
+        """
+        if self.empty:
+            return pd.DataFrame()
+        counts = self.row_counts()
+        rows = np.repeat(np.arange(len(self.attempts)), counts)
+        cols = np.concatenate(self.order) if self.order else np.zeros(0, dtype=np.int32)
+
+        col_q, col_a, col_d = ([c[k] for c in self.columns] for k in range(3))
+        files, students, rolls = ([a[k] for a in self.attempts] for k in range(3))
+        return pd.DataFrame(
+            {
+                "file": _categorical(files, rows),
+                "student": _categorical(students, rows),
+                "roll_number": _categorical(rolls, rows),
+                "question": _categorical(col_q, cols),
+                "assertion": _categorical(col_a, cols),
+                "status": _categorical(self.statuses, self.status[rows, cols]),
+                "score": self.scores[rows, cols].astype(np.float64),
+                "error": _categorical(self.error_table, self.error_codes),
+                "description": _categorical(col_d, cols),
+            },
+            columns=list(FRAME_COLUMNS),
+        )
+
+
+class ScoreMatrixBuilder:
+    """
+    Accumulates graded attempts one at a time. `add()` does all the
+    per-row work for an attempt once (column layout, scores, status and
+    error codes); `build()` snapshots a `ScoreMatrix` of everything added
+    so far with array operations only, so it is cheap to call repeatedly
+    while results keep arriving.
+    """
+
+    def __init__(self):
+        self.attempts: List[Tuple[str, str, str]] = []
+        self._order: List[np.ndarray] = []
+        self._scores: List[np.ndarray] = []
+        self._status: List[np.ndarray] = []
+        self._errors: List[np.ndarray] = []
+        # Provisional column ids in discovery order; most attempts share the
+        # same sequence of assertions, so each distinct layout is resolved once.
+        self._column_ids: Dict[Tuple, int] = {}
+        self._layouts: Dict[Tuple, np.ndarray] = {}
+        # Status codes in first-seen order (0 is STATUS_ABSENT)
+        self._status_ids: Dict[Any, int] = {}
+        self._error_ids: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.attempts)
+
+    def add(self, item: Dict[str, Any]) -> bool:
+        """Add one legacy result dict; False when it has no rows (left out)."""
+        rows = item.get("results", []) or []
+        if not rows:
+            return False
+        q, a, status, score, error, desc = zip(*map(row_values, rows))
+
+        status_ids = self._status_ids
+        codes = np.fromiter(
+            (status_ids.setdefault(s, len(status_ids) + 1) for s in status),
+            np.int32,
+            len(status),
+        )
+        if len(status_ids) > np.iinfo(np.uint8).max:
+            raise ValueError("Too many distinct result statuses for the status matrix")
+        scores = _scores_array(score)
+        error_ids = self._error_ids
+        errors = np.fromiter(
+            (NO_ERROR if e is None else error_ids.setdefault(e, len(error_ids)) for e in error),
+            np.int32,
+            len(error),
+        )
+
+        layout = (q, a, desc)
+        cols = self._layouts.get(layout)
+        if cols is None:
+            seen: Dict[Tuple, int] = {}
+            ids = []
+            for key in zip(q, a, desc):
+                n = seen.get(key, 0)
+                seen[key] = n + 1
+                ids.append(self._column_ids.setdefault(key + (n,), len(self._column_ids)))
+            cols = self._layouts[layout] = np.asarray(ids, dtype=np.int32)
+
+        self.attempts.append(attempt_identity(item))
+        self._order.append(cols)
+        self._scores.append(scores)
+        self._status.append(codes)
+        self._errors.append(errors)
+        return True
+
+    def build(self) -> ScoreMatrix:
+        """A `ScoreMatrix` of the attempts added so far."""
+        # Regroup columns by question (first-seen order), keeping discovery
+        # order within a question
+        keys = list(self._column_ids)
+        first_seen: Dict[Any, int] = {}
+        for key in keys:
+            first_seen.setdefault(key[0], len(first_seen))
+        grouped = sorted(range(len(keys)), key=lambda j: (first_seen[keys[j][0]], j))
+        remap = np.empty(len(keys), dtype=np.int32)
+        remap[grouped] = np.arange(len(keys), dtype=np.int32)
+        remapped: Dict[int, np.ndarray] = {}
+        order = [remapped.setdefault(id(cols), remap[cols]) for cols in self._order]
+        columns = [keys[j][:3] for j in grouped]
+
+        def flat(parts: List[np.ndarray], dtype) -> np.ndarray:
+            return np.concatenate(parts) if parts else np.zeros(0, dtype=dtype)
+
+        scores = flat(self._scores, np.float64)
+        whole = bool(np.all((scores >= 0) & (scores <= 255) & (scores == np.floor(scores))))
+        codes = flat(self._status, np.int32).astype(np.uint8)
+
+        shape = (len(self.attempts), len(columns))
+        counts = np.fromiter(map(len, order), np.intp, len(order))
+        rows_idx = np.repeat(np.arange(len(self.attempts)), counts)
+        cols_idx = flat(order, np.int32)
+        score_matrix = np.zeros(shape, dtype=np.uint8 if whole else np.float64)
+        score_matrix[rows_idx, cols_idx] = scores
+        status_matrix = np.zeros(shape, dtype=np.uint8)
+        status_matrix[rows_idx, cols_idx] = codes
+
+        return ScoreMatrix(
+            list(self.attempts),
+            columns,
+            score_matrix,
+            status_matrix,
+            [None] + list(self._status_ids),
+            order,
+            flat(self._errors, np.int32),
+            list(self._error_ids),
+        )
+
+
+class QuestionTotals:
+    """
+    Per-question score totals of graded attempts, without the assertion
+    rows: an attempts × questions `float64` matrix with the same attempts,
+    questions and reductions as the `ScoreMatrix` of the same results.
+    """
+
+    def __init__(
+        self,
+        attempts: List[Tuple[str, str, str]],
+        questions: List[Any],
+        q_totals: np.ndarray,
+        n_assertions: np.ndarray,
+    ):
+        self.attempts = attempts
+        self.questions = questions
+        self.q_totals = q_totals
+        # Distinct assertions seen per question
+        self.n_assertions = n_assertions
+
+    @classmethod
+    def from_results(cls, executed_results: Iterable[Dict[str, Any]]) -> "QuestionTotals":
+        """Build from legacy result dicts; attempts without rows are left out."""
+        builder = QuestionTotalsBuilder()
+        for item in executed_results or []:
+            builder.add(item)
+        return builder.build()
+
+    @property
+    def empty(self) -> bool:
+        return not self.attempts
+
+    def question_totals(self) -> np.ndarray:
+        return self.q_totals
+
+    def totals(self) -> np.ndarray:
+        return self.q_totals.sum(axis=1)
+
+    def best_n_totals(self, n: int) -> np.ndarray:
+        return _best_n_totals(self.q_totals, n)
+
+    scale = staticmethod(ScoreMatrix.scale)
+
+    def class_stats(self) -> Dict[str, Any]:
+        """`ScoreMatrix.class_stats` without the per-assertion pass rates."""
+        totals = self.totals()
+        stats: Dict[str, Any] = {"attempts": len(self.attempts)}
+        if totals.size:
+            stats.update(
+                mean=float(totals.mean()),
+                median=float(np.median(totals)),
+                std=float(totals.std()),
+                min=float(totals.min()),
+                max=float(totals.max()),
+            )
+        stats["question_mean"] = dict(
+            zip(self.questions, self.q_totals.mean(axis=0).tolist() if totals.size else [])
+        )
+        return stats
+
+    def question_stats(self) -> pd.DataFrame:
+        """See `ScoreMatrix.question_stats`."""
+        mean = self.q_totals.mean(axis=0) if len(self.attempts) else np.zeros(len(self.questions))
+        return pd.DataFrame(
+            {
+                "question": self.questions,
+                "assertions": self.n_assertions,
+                "mean": mean,
+                "percent": mean / np.maximum(self.n_assertions, 1) * 100,
+                "full_marks": (self.q_totals >= self.n_assertions).sum(axis=0),
+            }
+        )
+
+
+class QuestionTotalsBuilder:
+    """
+    Accumulates graded attempts into per-question totals as they arrive.
+    Only one row of question totals is kept per attempt, so memory grows
+    with attempts × questions rather than with the number of result rows.
+    """
+
+    def __init__(self):
+        self.attempts: List[Tuple[str, str, str]] = []
+        self._totals: List[np.ndarray] = []
+        self._question_ids: Dict[Any, int] = {}
+        self._n_assertions: List[int] = []
+        # Assertions seen so far, keyed like ScoreMatrix columns
+        self._columns: set = set()
+        # Question id of each row, per distinct layout of result rows
+        self._layouts: Dict[Tuple, np.ndarray] = {}
+
+    def __len__(self) -> int:
+        return len(self.attempts)
+
+    def add(self, item: Dict[str, Any]) -> bool:
+        """Add one legacy result dict; False when it has no rows (left out)."""
+        rows = item.get("results", []) or []
+        if not rows:
+            return False
+        q, a, _, score, _, desc = zip(*map(row_values, rows))
+
+        layout = (q, a, desc)
+        qids = self._layouts.get(layout)
+        if qids is None:
+            seen: Dict[Tuple, int] = {}
+            ids = []
+            for key in zip(q, a, desc):
+                n = seen.get(key, 0)
+                seen[key] = n + 1
+                qid = self._question_ids.setdefault(key[0], len(self._question_ids))
+                if qid == len(self._n_assertions):
+                    self._n_assertions.append(0)
+                if key + (n,) not in self._columns:
+                    self._columns.add(key + (n,))
+                    self._n_assertions[qid] += 1
+                ids.append(qid)
+            qids = self._layouts[layout] = np.asarray(ids, dtype=np.intp)
+
+        self.attempts.append(attempt_identity(item))
+        self._totals.append(np.bincount(qids, weights=_scores_array(score)))
+        return True
+
+    def build(self) -> QuestionTotals:
+        """`QuestionTotals` of the attempts added so far."""
+        q_totals = np.zeros((len(self.attempts), len(self._question_ids)))
+        for i, totals in enumerate(self._totals):
+            q_totals[i, : len(totals)] = totals
+        return QuestionTotals(
+            list(self.attempts),
+            list(self._question_ids),
+            q_totals,
+            np.asarray(self._n_assertions, dtype=np.intp),
+        )
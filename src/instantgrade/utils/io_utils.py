@@ -75,8 +75,17 @@ def load_raw_code(path: Path) -> str:
 
 
 def generate_student_notebook(instructor_path: str | Path, output_path: str | Path):
-    instructor_path = Path(instructor_path)
     output_path = Path(output_path)
+    new_nb = build_student_template(instructor_path)
+
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    nbformat.write(new_nb, output_path)
+    print(f"✅ Student notebook generated at: {output_path}")
+
+
+def build_student_template(instructor_path: str | Path) -> nbformat.NotebookNode:
+    """Build (in memory) the notebook students receive for this solution."""
+    instructor_path = Path(instructor_path)
 
     if not instructor_path.exists():
         raise FileNotFoundError(f"Notebook not found: {instructor_path}")
@@ -133,10 +142,7 @@ def generate_student_notebook(instructor_path: str | Path, output_path: str | Pa
     new_nb = nbformat.v4.new_notebook()
     new_nb.cells = new_cells
     new_nb.metadata = nb.metadata
-
-    output_path.parent.mkdir(parents=True, exist_ok=True)
-    nbformat.write(new_nb, output_path)
-    print(f"✅ Student notebook generated at: {output_path}")
+    return new_nb
 
 
 def remove_notebook_with_line(directory: str | Path, line: str):
@@ -0,0 +1,83 @@
+import copy
+import json
+import pickle
+import sys
+from pathlib import Path
+
+import pytest
+
+
+def _setup_paths():
+    repo = Path(__file__).resolve().parents[1]
+    sys.path.insert(0, str(repo))
+    sys.path.insert(0, str(repo / "src"))
+    return repo
+
+
+def test_records_share_specs_and_read_like_dicts():
+    _setup_paths()
+    try:
+        from instantgrade.core.models import ROW_FIELDS, AssertionRecord
+    except Exception as e:
+        pytest.skip(f"instantgrade import failed: {e}")
+
+    a = AssertionRecord.make("add", "assert add(1, 2) == 3", "passed", 1)
+    b = AssertionRecord.make("add", "assert add(1, 2) == 3", "failed", 0, "boom")
+    assert a.spec is b.spec
+    assert tuple(a) == ROW_FIELDS
+    assert a["status"] == "passed" and a.get("error") is None
+    assert b.to_dict() == {
+        "question": "add",
+        "assertion": "assert add(1, 2) == 3",
+        "status": "failed",
+        "score": 0,
+        "error": "boom",
+        "description": "",
+    }
+    assert b == b.to_dict()
+
+    b["description"] = "Adds numbers"
+    assert b.description == "Adds numbers" and a.description == ""
+    b["error"] = "setup failed\n" + b["error"]
+    assert b.error == "setup failed\nboom"
+    with pytest.raises(KeyError):
+        b["extra"] = 1
+
+    for clone in (pickle.loads(pickle.dumps(b)), copy.deepcopy(b)):
+        assert clone == b and clone is not b
+        assert clone.spec is b.spec
+
+
+def test_comparison_and_memo_use_records(tmp_path):
+    _setup_paths()
+    try:
+        from instantgrade.core.models import AssertionRecord
+        from instantgrade.evaluators.python.comparison.comparison_service import (
+            ComparisonService,
+        )
+        from instantgrade.evaluators.python.comparison.memo import ResultMemo
+    except Exception as e:
+        pytest.skip(f"instantgrade import failed: {e}")
+
+    def add(a, b):
+        return a + b
+
+    qdata = {
+        "function": "def add(a, b):\n    return a + b\n",
+        "tests": ["assert add(1, 2) == 3", "assert add(1, 1) == 3"],
+        "description": "Add two numbers",
+    }
+    rows = ComparisonService().run_question("add", qdata, {"add": add})
+    assert all(isinstance(r, AssertionRecord) for r in rows)
+    assert [r["status"] for r in rows] == ["passed", "failed"]
+    assert rows[1].description == "Add two numbers"
+
+    memo = ResultMemo(tmp_path / "memo.json")
+    memo.put("k", rows)
+    added = memo.take_added()
+    assert type(added["k"][0]) is dict
+    memo.save()
+    reloaded = ResultMemo(tmp_path / "memo.json")
+    reloaded.load()
+    assert reloaded.get("k") == rows
+    assert json.loads((tmp_path / "memo.json").read_text())["entries"]["k"][0]["score"] == 1
@@ -0,0 +1,192 @@
+import sys
+from pathlib import Path
+
+import nbformat
+import pytest
+
+
+def _setup_paths():
+    repo = Path(__file__).resolve().parents[1]
+    sys.path.insert(0, str(repo))
+    sys.path.insert(0, str(repo / "src"))
+    return repo
+
+
+def _write_solution(tmp_path, directive):
+    nb = nbformat.v4.new_notebook()
+    nb.cells = [
+        nbformat.v4.new_code_cell('name = "student name"\nroll_number = "student roll number"'),
+        nbformat.v4.new_markdown_cell("## Fibonacci\n\nReturn the n-th Fibonacci number."),
+        nbformat.v4.new_code_cell(
+            "def fib(n: int) -> int:\n"
+            "    a, b = 0, 1\n"
+            "    for _ in range(n):\n"
+            "        a, b = b, a + b\n"
+            "    return a"
+        ),
+        nbformat.v4.new_code_cell(f"{directive}\nassert fib(5) == 5\nassert fib(10) == 55"),
+    ]
+    path = tmp_path / "solution.ipynb"
+    nbformat.write(nb, path)
+    return path
+
+
+def test_differential_scores_pass_fraction(tmp_path):
+    _setup_paths()
+    try:
+        from instantgrade.evaluators.python.ingestion.solution_ingestion import SolutionIngestion
+        from instantgrade.evaluators.python.comparison.comparison_service import (
+            ComparisonService,
+        )
+    except Exception as e:
+        pytest.skip(f"instantgrade import failed: {e}")
+
+    solution = SolutionIngestion(
+        _write_solution(tmp_path, "# differential: k=50 seed=1 max_failures=50")
+    ).understand_notebook_solution()
+
+    qdata = solution["questions"]["fib"]
+    assert qdata["differential"]["k"] == 50
+    # 2 asserts + 1 differential row
+    assert solution["summary"]["total_assertions"] == 3
+
+    svc = ComparisonService()
+
+    correct = {}
+    exec(qdata["function"], correct)
+    [row] = svc.run_differential("fib", qdata, correct)
+    assert row["status"] == "passed" and row["score"] == 1.0
+
+    # Off for every n > 5: partially correct -> fractional score
+    partial = {}
+    exec("def fib(n):\n    return 0 if n > 5 else [0, 1, 1, 2, 3, 5][n]", partial)
+    [row] = svc.run_differential("fib", qdata, partial)
+    assert row["status"] == "failed"
+    assert 0.0 < row["score"] < 1.0
+    assert "Input: fib(" in row["error"]
+
+    [row] = svc.run_differential("fib", qdata, {})
+    assert row["score"] == 0.0 and "NameError" in row["error"]
+
+
+def test_differential_early_exit_and_timeout(tmp_path):
+    _setup_paths()
+    try:
+        from instantgrade.evaluators.python.ingestion.solution_ingestion import SolutionIngestion
+        from instantgrade.evaluators.python.comparison.comparison_service import (
+            ComparisonService,
+        )
+    except Exception as e:
+        pytest.skip(f"instantgrade import failed: {e}")
+
+    solution = SolutionIngestion(
+        _write_solution(tmp_path, "# differential: k=200 seed=0 max_failures=3 timeout=0.5")
+    ).understand_notebook_solution()
+    qdata = solution["questions"]["fib"]
+    svc = ComparisonService()
+
+    calls = []
+    wrong = {"calls": calls}
+    exec("def fib(n):\n    calls.append(n)\n    return -1", wrong)
+    [row] = svc.run_differential("fib", qdata, wrong)
+    assert len(calls) == 3
+    assert "Stopped early" in row["error"]
+
+    looping = {}
+    exec("def fib(n):\n    while True:\n        pass", looping)
+    [row] = svc.run_differential("fib", qdata, looping)
+    assert row["score"] == 0.0
+    assert "time budget" in row["error"]
+
+
+def test_reference_runs_on_solution_setup(tmp_path):
+    _setup_paths()
+    try:
+        from instantgrade.evaluators.python.ingestion.solution_ingestion import SolutionIngestion
+        from instantgrade.evaluators.python.comparison.comparison_service import (
+            ComparisonService,
+        )
+    except Exception as e:
+        pytest.skip(f"instantgrade import failed: {e}")
+
+    def solution(setup):
+        nb = nbformat.v4.new_notebook()
+        nb.cells = [
+            nbformat.v4.new_code_cell('name = "student name"\nroll_number = "student roll number"'),
+            nbformat.v4.new_code_cell(setup),
+            nbformat.v4.new_markdown_cell("## Hypotenuse\n\nLength of the hypotenuse."),
+            nbformat.v4.new_code_cell(
+                "def hyp(a: int, b: int) -> float:\n    return Box(math.hypot(a, b))"
+            ),
+            nbformat.v4.new_code_cell("# differential: k=20 seed=0\nassert hyp(3, 4) == 5"),
+        ]
+        path = tmp_path / "solution.ipynb"
+        nbformat.write(nb, path)
+        return SolutionIngestion(path).understand_notebook_solution()["questions"]["hyp"]
+
+    box = (
+        "%matplotlib inline\n"
+        "import math\n"
+        "class Box:\n"
+        "    def __init__(self, v):\n"
+        "        self.v = v\n"
+        "    def __eq__(self, other):\n"
+        '        return abs(self.v - getattr(other, "v", None)) < 1e-9\n'
+        "    def __repr__(self):\n"
+        "        raise RuntimeError('no repr')\n"
+    )
+    qdata = solution(box)
+    student = {}
+    exec(
+        box.split("\n", 1)[1] + "def hyp(a, b):\n    return Box((a * a + b * b) ** 0.5)\n", student
+    )
+    [row] = ComparisonService().run_differential("hyp", qdata, student)
+    assert row["status"] == "passed" and row["score"] == 1.0
+
+    # A reference that cannot run is reported as an instructor error
+    qdata = solution("import no_such_module_anywhere\n" + box.split("\n", 2)[2])
+    [row] = ComparisonService().run_differential("hyp", qdata, student)
+    assert row["status"] == "error" and row["score"] == 0.0
+    assert "Instructor error" in row["error"] and "NameError" in row["error"]
+    assert "No module named" in row["error"]
+
+
+def test_mutated_arguments_do_not_leak_between_students(tmp_path, monkeypatch):
+    _setup_paths()
+    try:
+        from instantgrade.evaluators.python.ingestion import solution_ingestion
+        from instantgrade.evaluators.python.comparison.comparison_service import (
+            ComparisonService,
+        )
+    except Exception as e:
+        pytest.skip(f"instantgrade import failed: {e}")
+
+    def solution(function, tests):
+        nb = nbformat.v4.new_notebook()
+        nb.cells = [
+            nbformat.v4.new_markdown_cell("## Drain\n\nSum a list and empty it."),
+            nbformat.v4.new_code_cell(function),
+            nbformat.v4.new_code_cell(f"# differential: k=20 seed=3\n{tests}"),
+        ]
+        path = tmp_path / "solution.ipynb"
+        nbformat.write(nb, path)
+        return solution_ingestion.SolutionIngestion(path).understand_notebook_solution()
+
+    # The reference empties its argument in place
+    drain = (
+        "def drain(xs: list[int]) -> int:\n    total = sum(xs)\n    xs.clear()\n    return total"
+    )
+    qdata = solution(drain, "assert drain([1, 2]) == 3")["questions"]["drain"]
+    svc = ComparisonService()
+    for src in (drain, "def drain(xs):\n    return sum(xs)", drain):
+        student = {}
+        exec(src, student)
+        [row] = svc.run_differential("drain", qdata, student)
+        assert row["status"] == "passed" and row["score"] == 1.0, row["error"]
+
+    # A directive whose argument types cannot be inferred is reported
+    warnings = []
+    monkeypatch.setattr(solution_ingestion.logger, "warning", warnings.append)
+    questions = solution("def drain(xs):\n    return 0", "assert drain(make()) == 0")["questions"]
+    assert "differential" not in questions["drain"]
+    assert len(warnings) == 1 and "'drain'" in warnings[0]
@@ -0,0 +1,85 @@
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+
+def _setup_paths():
+    repo = Path(__file__).resolve().parents[1]
+    sys.path.insert(0, str(repo))
+    sys.path.insert(0, str(repo / "src"))
+    return repo
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="fork() not available on this platform")
+def test_crashing_question_does_not_poison_others():
+    _setup_paths()
+    try:
+        from instantgrade.evaluators.python.comparison.comparison_service import (
+            ComparisonService,
+        )
+        from instantgrade.evaluators.python.execution.forking import grade_questions_forked
+    except Exception as e:
+        pytest.skip(f"instantgrade import failed: {e}")
+
+    ns = {}
+    exec(
+        "import os, sys\n"
+        "def good(x):\n    return x + 1\n"
+        "def quits(x):\n    sys.exit(3)\n"
+        "def dies(x):\n    os._exit(9)\n"
+        "def spins(x):\n    while True:\n        pass\n"
+        "state = []\n"
+        "def mutates(x):\n    state.append(x)\n    return len(state)\n",
+        ns,
+    )
+    questions = {
+        "quits": {"tests": ["assert quits(1) == 1"], "description": "q"},
+        "dies": {"tests": ["assert dies(1) == 1"]},
+        "spins": {"tests": ["assert spins(1) == 1"]},
+        "mutates": {"tests": ["assert mutates(1) == 1"]},
+        "good": {"tests": ["assert good(1) == 2", "assert mutates(1) == 1"]},
+    }
+
+    svc = ComparisonService()
+    rows = grade_questions_forked(questions, lambda q, d: svc.run_question(q, d, ns), timeout=1)
+    by_q = {}
+    for r in rows:
+        by_q.setdefault(r["question"], []).append(r)
+
+    assert "sys.exit(3)" in by_q["quits"][0]["error"]
+    assert by_q["quits"][0]["description"] == "q"
+    assert "exited unexpectedly" in by_q["dies"][0]["error"]
+    assert "Timed out" in by_q["spins"][0]["error"]
+    # Mutations made while grading one question never reach the next
+    assert [r["status"] for r in by_q["mutates"]] == ["passed"]
+    assert [r["status"] for r in by_q["good"]] == ["passed", "passed"]
+    assert ns["state"] == []
+
+
+def test_docker_grader_receives_question_limits(tmp_path, monkeypatch):
+    _setup_paths()
+    try:
+        from instantgrade.evaluators.python import execution_service_docker as docker_mod
+    except Exception as e:
+        pytest.skip(f"instantgrade import failed: {e}")
+
+    commands = []
+
+    def fake_popen(cmd, **kwargs):
+        commands.append(cmd)
+        raise RuntimeError("docker not started in tests")
+
+    monkeypatch.setattr(docker_mod.subprocess, "Popen", fake_popen)
+    svc = docker_mod.ExecutionServiceDocker(
+        per_question_timeout=7, question_memory_mb=256, isolation="fork"
+    )
+    monkeypatch.setattr(svc, "ensure_docker_image_exists", lambda: None)
+    for name in ("student.ipynb", "solution.ipynb"):
+        (tmp_path / name).write_text("{}")
+    with pytest.raises(RuntimeError):
+        svc.execute_student(tmp_path / "solution.ipynb", tmp_path / "student.ipynb")
+
+    assert "QUESTION_TIMEOUT=7" in commands[0]
+    assert "QUESTION_MEMORY_MB=256" in commands[0]
@@ -0,0 +1,46 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+
+def _setup_paths():
+    repo = Path(__file__).resolve().parents[1]
+    sys.path.insert(0, str(repo))
+    sys.path.insert(0, str(repo / "src"))
+    return repo
+
+
+def test_missing_or_uncallable_function_short_circuits_question():
+    _setup_paths()
+    try:
+        from instantgrade.evaluators.python.comparison.comparison_service import (
+            ComparisonService,
+        )
+    except Exception as e:
+        pytest.skip(f"instantgrade import failed: {e}")
+
+    question = {
+        "function": "def area(r):\n    return 3 * r * r",
+        "tests": ["assert area(1) == 3", "assert area(2) == 12"],
+        "context_code": "",
+        "description": "Area",
+    }
+    svc = ComparisonService()
+
+    missing = svc.run_question("area", question, {"name": "Ann"})
+    assert [r["assertion"] for r in missing] == question["tests"]
+    assert all(r["status"] == "failed" and r["score"] == 0 for r in missing)
+    assert "'area' is not defined" in missing[0]["error"]
+    assert missing[0]["error"] is missing[1]["error"]
+
+    shadowed = svc.run_question("area", question, {"area": 3.0})
+    assert "'area' is not a function" in shadowed[0]["error"]
+    assert "float" in shadowed[0]["error"]
+
+    # Setup code that defines the function itself is still run normally
+    helper = dict(question, context_code="def area(r):\n    return 3 * r * r")
+    assert [r["status"] for r in svc.run_question("area", helper, {})] == ["passed", "passed"]
+
+    # No assertions: nothing to fill in
+    assert svc.run_question("area", dict(question, tests=[]), {}) == []
@@ -0,0 +1,53 @@
+import sys
+from pathlib import Path
+
+import nbformat
+import pytest
+
+
+def _setup_paths():
+    repo = Path(__file__).resolve().parents[1]
+    sys.path.insert(0, str(repo))
+    sys.path.insert(0, str(repo / "src"))
+    return repo
+
+
+def _notebook(path, *sources):
+    nb = nbformat.v4.new_notebook()
+    nb.cells = [nbformat.v4.new_code_cell(src) for src in sources]
+    nbformat.write(nb, path)
+    return path
+
+
+def test_prescan_rejects_only_certain_default_identities(tmp_path):
+    _setup_paths()
+    try:
+        from instantgrade.evaluators.python.ingestion.identity_scan import (
+            prescan_submissions,
+            rejected_result,
+        )
+    except Exception as e:
+        pytest.skip(f"instantgrade import failed: {e}")
+
+    defaults = ("student name", "student roll number")
+    paths = [
+        _notebook(tmp_path / "default.ipynb", "name = 'student name'\nroll_number = 'R1'"),
+        _notebook(tmp_path / "missing.ipynb", "x = 1"),
+        _notebook(
+            tmp_path / "ok.ipynb", "name = 'student name'", "name = 'Ann'\nroll_number = 'R1'"
+        ),
+        # Identity set by code the scan cannot evaluate: left to the runtime check
+        _notebook(tmp_path / "dynamic.ipynb", "name = 'An' + 'n'\nroll_number = 'R2'"),
+        _notebook(tmp_path / "loop.ipynb", "for name in ['a']:\n    pass\nroll_number = 'R3'"),
+    ]
+
+    for workers in (1, 2):
+        scans = prescan_submissions(paths, workers=workers)
+        assert [s.path for s in scans] == paths
+        rejected = [s.path.name for s in scans if s.is_unpersonalized(*defaults)]
+        assert rejected == ["default.ipynb", "missing.ipynb"]
+
+    result = rejected_result(scans[0], *defaults)
+    assert result["execution"]["student_meta"] == {"name": "student name", "roll_number": "R1"}
+    assert [r["question"] for r in result["results"]] == ["_identity_check_"]
+    assert result["results"][0]["score"] == 0
@@ -0,0 +1,44 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+
+def _setup_paths():
+    repo = Path(__file__).resolve().parents[1]
+    sys.path.insert(0, str(repo))
+    sys.path.insert(0, str(repo / "src"))
+    return repo
+
+
+def test_context_code_is_isolated_per_question():
+    _setup_paths()
+    try:
+        from instantgrade.evaluators.python.comparison.comparison_service import (
+            ComparisonService,
+        )
+        from instantgrade.evaluators.python.execution.namespace import OverlayNamespace
+    except Exception as e:
+        pytest.skip(f"instantgrade import failed: {e}")
+
+    base = {"double": lambda x: 2 * x, "data": [1, 2, 3]}
+    svc = ComparisonService()
+
+    # Question 1 rebinds a shared name in its own setup code
+    q1 = OverlayNamespace(base)
+    res1 = svc.run_assertions(
+        ["assert [double(x) for x in data] == [20]"],
+        q1,
+        question_name="q1",
+        context_code="data = [10]",
+    )
+    assert res1[0]["status"] == "passed"
+
+    # Question 2 still sees the student's original value
+    q2 = OverlayNamespace(base)
+    res2 = svc.run_assertions(["assert double(data[0]) == 2"], q2, question_name="q2")
+    assert res2[0]["status"] == "passed"
+
+    assert base["data"] == [1, 2, 3]
+    assert q1.layer().keys() - {"__builtins__"} == {"data"}
+    assert "double" in q1 and q1.get("missing", 0) == 0
@@ -0,0 +1,54 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+
+def _setup_paths():
+    repo = Path(__file__).resolve().parents[1]
+    sys.path.insert(0, str(repo))
+    sys.path.insert(0, str(repo / "src"))
+    return repo
+
+
+def _result():
+    ns = {}
+    exec("name = 'Ann'\nroll_number = 'R1'\ndata = [1, 2, 3]\ndef f(x):\n    return x", ns)
+    ns = {k: v for k, v in ns.items() if not k.startswith("__")}
+    return {"student_path": Path("ann.ipynb"), "execution": {"namespace": ns}, "results": []}
+
+
+def test_retention_policies(tmp_path):
+    _setup_paths()
+    try:
+        from instantgrade.evaluators.python.execution.retention import (
+            apply_retention,
+            load_spilled_namespace,
+        )
+    except Exception as e:
+        pytest.skip(f"instantgrade import failed: {e}")
+
+    dropped = apply_retention(_result(), "drop")["execution"]
+    assert dropped["namespace"] == {"name": "Ann", "roll_number": "R1"}
+
+    summary = apply_retention(_result(), "summary")["execution"]["namespace"]
+    assert summary["name"] == "Ann"
+    assert summary["data"] == {"type": "builtins.list", "size": 3}
+    assert summary["f"]["type"] == "builtins.function"
+
+    spilled = apply_retention(_result(), "spill", tmp_path)["execution"]
+    assert spilled["namespace"]["data"]["size"] == 3
+    restored = load_spilled_namespace(spilled["namespace_file"])
+    assert restored["data"] == [1, 2, 3]
+    assert "f" not in restored  # notebook-defined functions cannot be pickled
+
+    kept = _result()
+    assert apply_retention(kept, "keep")["execution"]["namespace"]["data"] == [1, 2, 3]
+
+    numeric = _result()
+    numeric["execution"]["namespace"]["roll_number"] = 2423531
+    dropped = apply_retention(numeric, "drop")["execution"]
+    assert dropped["namespace"] == {"name": "Ann", "roll_number": "2423531"}
+
+    with pytest.raises(ValueError):
+        apply_retention(_result(), "everything")
@@ -0,0 +1,139 @@
+import io
+import sys
+from pathlib import Path
+
+import pytest
+
+
+def _setup_paths():
+    repo = Path(__file__).resolve().parents[1]
+    sys.path.insert(0, str(repo))
+    sys.path.insert(0, str(repo / "src"))
+    return repo
+
+
+def _legacy():
+    ns = {"name": "Ann", "roll_number": "R1", "f": lambda x: x, "data": [1, 2]}
+    return {
+        "student_path": Path("subs/ann.ipynb"),
+        "execution": {
+            "success": True,
+            "errors": [],
+            "namespace": ns,
+            "student_meta": {"name": "Ann", "roll_number": "R1"},
+        },
+        "results": [
+            {
+                "question": "add",
+                "assertion": "assert add(1, 2) == 3",
+                "status": "passed",
+                "score": 1.0,
+                "error": None,
+                "description": "",
+                "extra": object(),
+            },
+            {
+                "question": "add",
+                "assertion": "assert add(0, 0) == 0",
+                "status": "failed",
+                "score": 0.5,
+                "error": "AssertionError",
+            },
+        ],
+    }
+
+
+def test_envelope_round_trips():
+    _setup_paths()
+    try:
+        from instantgrade.core.models import ROW_FIELDS, ExecutionResult
+    except Exception as e:
+        pytest.skip(f"instantgrade import failed: {e}")
+
+    result = ExecutionResult.from_dict(_legacy())
+    assert result.name == "Ann" and result.success
+    assert all(tuple(r) == ROW_FIELDS for r in result.results)
+    assert result.results[0]["score"] == 1 and result.results[1]["score"] == 0.5
+
+    text = result.to_json()
+    assert "\n" not in text
+    from_json = ExecutionResult.from_json(text)
+    assert from_json.results == result.results
+    assert from_json.namespace["f"] == {"type": "builtins.function"}
+    assert from_json.namespace["data"] == [1, 2]
+
+    from_bytes = ExecutionResult.from_bytes(result.to_bytes())
+    assert from_bytes.to_json() == text
+
+    legacy = from_json.to_dict()
+    assert legacy["student_path"] == Path("subs/ann.ipynb")
+    assert legacy["execution"]["student_meta"] == {"name": "Ann", "roll_number": "R1"}
+    assert legacy["results"] == result.results
+
+    with pytest.raises(ValueError):
+        ExecutionResult.from_bytes(b"not a result")
+
+
+def test_non_string_identity_survives_the_round_trip():
+    _setup_paths()
+    try:
+        from instantgrade.core.models import ExecutionResult
+    except Exception as e:
+        pytest.skip(f"instantgrade import failed: {e}")
+
+    item = _legacy()
+    item["execution"].pop("student_meta")
+    item["execution"]["namespace"]["roll_number"] = 2423531
+    result = ExecutionResult.from_dict(item)
+    assert result.roll_number == "2423531"
+    meta = ExecutionResult.from_bytes(result.to_bytes()).to_dict()["execution"]["student_meta"]
+    assert meta == {"name": "Ann", "roll_number": "2423531"}
+
+
+def test_streams_and_legacy_error_key():
+    _setup_paths()
+    try:
+        from instantgrade.core.models import (
+            ExecutionResult,
+            dump_binary,
+            dump_jsonl,
+            load_binary,
+            load_jsonl,
+        )
+    except Exception as e:
+        pytest.skip(f"instantgrade import failed: {e}")
+
+    skipped = ExecutionResult.from_dict(
+        {
+            "student_path": Path("bob.ipynb"),
+            "execution": {"namespace": {}, "errors": [], "success": False},
+            "results": [],
+            "skipped": True,
+            "error": "Skipping bob.ipynb",
+        }
+    )
+    assert skipped.errors == ["Skipping bob.ipynb"] and skipped.skipped
+    results = [ExecutionResult.from_dict(_legacy()), skipped]
+
+    text = io.StringIO()
+    assert dump_jsonl(results, text) == 2
+    text.seek(0)
+    assert [r.to_json() for r in load_jsonl(text)] == [r.to_json() for r in results]
+
+    data = io.BytesIO()
+    assert dump_binary(results, data) == 2
+    data.seek(0)
+    assert [r.to_json() for r in load_binary(data)] == [r.to_json() for r in results]
+
+
+def test_reporting_accepts_envelopes():
+    _setup_paths()
+    try:
+        from instantgrade.core.models import ExecutionResult
+        from instantgrade.reporting.reporting_service import ReportingService
+    except Exception as e:
+        pytest.skip(f"instantgrade import failed: {e}")
+
+    svc = ReportingService(executed_results=[ExecutionResult.from_dict(_legacy())])
+    assert list(svc.df["student"]) == ["Ann", "Ann"]
+    assert svc.df["score"].sum() == 1.5
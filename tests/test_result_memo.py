@@ -0,0 +1,104 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+
+def _setup_paths():
+    repo = Path(__file__).resolve().parents[1]
+    sys.path.insert(0, str(repo))
+    sys.path.insert(0, str(repo / "src"))
+    return repo
+
+
+def _student(src):
+    ns = {}
+    exec(compile(src, "<student_cell>", "exec"), ns)
+    return {k: v for k, v in ns.items() if not k.startswith("__")}
+
+
+def test_identical_functions_are_graded_once(tmp_path):
+    _setup_paths()
+    try:
+        from instantgrade.evaluators.python.comparison.comparison_service import (
+            ComparisonService,
+        )
+        from instantgrade.evaluators.python.comparison.memo import ResultMemo
+    except Exception as e:
+        pytest.skip(f"instantgrade import failed: {e}")
+
+    questions = {"fib": {"tests": ["assert fib(10) == 55"], "context_code": ""}}
+    # Same function: different formatting, comments, docstring and local names
+    alice = _student(
+        "def fib(n):\n    a, b = 0, 1\n    for _ in range(n):\n        a, b = b, a + b\n    return a"
+    )
+    bob = _student(
+        "def fib(n):\n"
+        "    '''Iterative.'''\n"
+        "    x,y=0,1  # start\n"
+        "    for i in range(n): x,y=y,x+y\n"
+        "    return x\n"
+        "notes = ['unused']"
+    )
+    carol = _student("def fib(n):\n    return n")
+    # Mutable global state: never memoized
+    dave = _student("calls = []\ndef fib(n):\n    calls.append(n)\n    return 55")
+
+    svc = ComparisonService()
+    graded = []
+
+    def grade(qs):
+        graded.append(list(qs))
+        rows = []
+        for name, data in qs.items():
+            rows.extend(svc.run_question(name, data, ns))
+        return rows
+
+    memo = ResultMemo(tmp_path / "memo.json")
+    statuses = []
+    for ns in (alice, bob, carol, dave):
+        statuses.append([r["status"] for r in memo.grade(questions, ns, grade)])
+
+    assert statuses == [["passed"], ["passed"], ["failed"], ["passed"]]
+    assert (memo.hits, memo.misses, memo.bypassed) == (1, 2, 1)
+    assert len(graded) == 3
+
+    # Persisted across runs
+    memo.save()
+    again = ResultMemo(tmp_path / "memo.json")
+    assert [r["status"] for r in again.grade(questions, bob, grade)] == ["passed"]
+    assert again.hits == 1 and len(graded) == 3
+
+
+def test_key_covers_reference_description_and_file_io():
+    _setup_paths()
+    try:
+        import pandas as pd
+
+        from instantgrade.evaluators.python.comparison.memo import ResultMemo
+    except Exception as e:
+        pytest.skip(f"instantgrade import failed: {e}")
+
+    memo = ResultMemo()
+    ns = _student("def double(x):\n    return 2 * x")
+    question = {
+        "tests": ["assert double(2) == 4"],
+        "differential": {"inputs": [[1]]},
+        "function": "def double(x):\n    return 2 * x",
+        "description": "Double a number.",
+    }
+    key = memo.key("double", question, ns)
+    assert key is not None
+    # A changed reference solution or description must not reuse old rows
+    assert (
+        memo.key("double", dict(question, function="def double(x):\n    return x + x"), ns) != key
+    )
+    assert memo.key("double", dict(question, description="Twice x."), ns) != key
+
+    # pandas stays allow-listed, but its file I/O does not
+    ns = _student("import pandas as pd\ndef size(x):\n    return len(pd.Series(x))")
+    assert memo.key("size", {"tests": ["assert size([1]) == 1"]}, ns) is not None
+    ns = _student("import pandas as pd\ndef size(path):\n    return len(pd.read_csv(path))")
+    assert memo.key("size", {"tests": ["assert size('a.csv') == 1"]}, ns) is None
+    ns = {"load": pd.read_csv}
+    assert memo.key("load", {"tests": ["assert len(load('a.csv')) == 1"]}, ns) is None
@@ -0,0 +1,148 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+
+def _setup_paths():
+    repo = Path(__file__).resolve().parents[1]
+    sys.path.insert(0, str(repo))
+    sys.path.insert(0, str(repo / "src"))
+    return repo
+
+
+def _result(name, scores):
+    return {
+        "student_path": Path(f"subs/{name.lower()}.ipynb"),
+        "execution": {"student_meta": {"name": name, "roll_number": f"R-{name}"}},
+        "results": [
+            {
+                "question": question,
+                "assertion": f"assert {question}({k})",
+                "status": "passed" if score else "failed",
+                "score": score,
+                "error": None if score else "AssertionError",
+                "description": "",
+            }
+            for question, question_scores in scores.items()
+            for k, score in enumerate(question_scores)
+        ],
+    }
+
+
+def test_runs_are_stored_and_queried_across_runs(tmp_path):
+    _setup_paths()
+    try:
+        from instantgrade.core.models import ExecutionResult
+        from instantgrade.reporting.results_store import ResultsStore
+    except Exception as e:
+        pytest.skip(f"instantgrade import failed: {e}")
+
+    db = tmp_path / "results.db"
+    with ResultsStore(db, batch_size=2) as store:
+        first = store.add_run(
+            [
+                _result("Ann", {"q1": [1, 1], "q2": [1]}),
+                ExecutionResult.from_dict(_result("Bob", {"q1": [0, 1], "q2": [0.5]})),
+                {"student_path": Path("subs/empty.ipynb"), "execution": {}, "results": []},
+            ],
+            name="fall",
+            meta={"best_n": 2},
+        )
+        assert store.conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+    with ResultsStore(db) as store:
+        second = store.start_run("spring")
+        assert store.add_result(second, _result("Ann", {"q1": [1, 0], "q2": [1]}))
+        assert store.add_result(second, _result("Bob", {"q1": [1, 1], "q2": [0.5]}))
+
+        runs = store.runs()
+        assert runs["name"].tolist() == ["fall", "spring"]
+        assert runs["attempts"].tolist() == [2, 2]
+
+        history = store.student_history("Ann")
+        assert history["run"].tolist() == ["fall", "spring"]
+        assert history["total_score"].tolist() == [3.0, 2.0]
+        assert store.student_history("Bob", "q2")["score"].tolist() == [0.5, 0.5]
+
+        compared = store.compare_runs(first, second).set_index("question")
+        assert compared.loc["q1", "mean_before"] == compared.loc["q1", "mean_after"] == 1.5
+        assert compared["attempts_after"].tolist() == [2, 2]
+        regressions = store.regressions(first, second)
+        assert regressions.to_dict("records") == [
+            {
+                "student": "Ann",
+                "roll_number": "R-Ann",
+                "question": "q1",
+                "score_before": 2.0,
+                "score_after": 1.0,
+            }
+        ]
+        outcomes = store.query(
+            "SELECT assertion, status, error FROM outcomes WHERE attempt_id = 2 ORDER BY position"
+        )
+        assert outcomes["error"][0] == "AssertionError"
+        assert outcomes["error"].isna().tolist() == [False, True, True]
+
+
+def test_students_sharing_a_name_are_kept_apart(tmp_path):
+    _setup_paths()
+    try:
+        from instantgrade.reporting.results_store import ResultsStore
+    except Exception as e:
+        pytest.skip(f"instantgrade import failed: {e}")
+
+    def ann(roll, score):
+        result = _result("Ann", {"q1": [score]})
+        result["execution"]["student_meta"]["roll_number"] = roll
+        return result
+
+    with ResultsStore(tmp_path / "results.db") as store:
+        first = store.add_run([ann("R1", 1), ann("R2", 0)], name="fall")
+        second = store.add_run([ann("R1", 0), ann("R2", 1)], name="spring")
+
+        assert len(store.student_history("Ann")) == 4
+        history = store.student_history("Ann", roll_number="R1")
+        assert history["total_score"].tolist() == [1.0, 0.0]
+        assert store.student_history("Ann", "q1", roll_number="R2")["score"].tolist() == [0, 1]
+        regressions = store.regressions(first, second)
+        assert regressions[["roll_number", "score_before", "score_after"]].values.tolist() == [
+            ["R1", 1.0, 0.0]
+        ]
+
+
+def test_reporting_service_appends_runs(tmp_path):
+    _setup_paths()
+    try:
+        from instantgrade.reporting.reporting_service import ReportingService
+        from instantgrade.reporting.results_store import ResultsStore
+    except Exception as e:
+        pytest.skip(f"instantgrade import failed: {e}")
+
+    svc = ReportingService([_result("Ann", {"q1": [1, 0]})], total_assertions=2, best_n=1)
+    db = tmp_path / "results.db"
+    assert svc.to_sqlite(db, name="a") == 1
+    assert svc.to_sqlite(db, name="b") == 2
+    with ResultsStore(db) as store:
+        runs = store.runs()
+        assert runs["attempts"].tolist() == [1, 1]
+        assert '"best_n": 1' in runs["meta"][0]
+    assert svc._df is None
+
+
+def test_failed_run_does_not_flush_buffered_rows(tmp_path):
+    _setup_paths()
+    try:
+        from instantgrade.reporting.results_store import ResultsStore
+    except Exception as e:
+        pytest.skip(f"instantgrade import failed: {e}")
+
+    db = tmp_path / "results.db"
+    with pytest.raises(KeyboardInterrupt):
+        with ResultsStore(db) as store:
+            run = store.start_run("interrupted")
+            store.add_result(run, _result("Ann", {"q1": [1, 1]}))
+            raise KeyboardInterrupt
+    with ResultsStore(db) as store:
+        assert store.runs()["attempts"].tolist() == [0]
+        assert store.query("SELECT COUNT(*) AS n FROM outcomes")["n"][0] == 0
@@ -0,0 +1,109 @@
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+
+def _setup_paths():
+    repo = Path(__file__).resolve().parents[1]
+    sys.path.insert(0, str(repo))
+    sys.path.insert(0, str(repo / "src"))
+    return repo
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="fork() not available on this platform")
+def test_prelude_runs_shared_cells_once():
+    _setup_paths()
+    try:
+        from instantgrade.evaluators.python.execution.forking import run_in_fork
+        from instantgrade.evaluators.python.execution.prelude import PreludeSnapshot
+    except Exception as e:
+        pytest.skip(f"instantgrade import failed: {e}")
+
+    template = [
+        "name = 'student name'\nroll_number = 'student roll number'",
+        "import math\nloads = []\nloads.append(1)\ndata = [1, 2, 3]",
+        "def total(xs):\n    pass",
+    ]
+    alice = [
+        "name = 'Alice'\nroll_number = 'R1'",
+        template[1],
+        "def total(xs):\n    return sum(xs)",
+    ]
+    bob = ["name = 'Bob'\nroll_number = 'R2'", "data = [9]", template[2]]
+
+    snapshot = PreludeSnapshot(template)
+    # Identity cells may differ; the setup cell must be byte-identical
+    assert snapshot.matching_prefix(alice) == 2
+    assert snapshot.matching_prefix(bob) == 1
+    assert snapshot.choose_length([2, 1, 3]) == 2
+
+    snapshot.warm()
+    assert snapshot.namespace["loads"] == [1]
+
+    def grade(exec_result):
+        ns = exec_result["namespace"]
+        return ns["name"], ns["total"](ns["data"]), list(ns["loads"])
+
+    ok, value = run_in_fork(lambda: snapshot.run_student(alice, grade))
+    assert ok and value == ("Alice", 6, [1])
+    # The warm state in the parent is untouched by the child
+    assert "total" not in snapshot.namespace
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="fork() not available on this platform")
+def test_prelude_reports_cell_errors_like_the_local_executor(tmp_path, monkeypatch):
+    _setup_paths()
+    try:
+        import nbformat
+
+        from instantgrade.evaluators.python import notebook_executor
+        from instantgrade.evaluators.python.execution.forking import run_in_fork
+        from instantgrade.evaluators.python.execution.prelude import PreludeSnapshot
+    except Exception as e:
+        pytest.skip(f"instantgrade import failed: {e}")
+
+    template = [
+        "%matplotlib inline\nimport math",
+        "data = [1, 2, 3]\nanswer = input('?')",
+        "def total(xs):\n    pass",
+    ]
+    student = [
+        template[0],
+        template[1],
+        "name = 'Ann'\nroll_number = 'R1'",
+        "def total(xs):\n    return sum(xs) / missing",
+        "total(data)",
+    ]
+    path = tmp_path / "ann.ipynb"
+    nb = nbformat.v4.new_notebook(cells=[nbformat.v4.new_code_cell(src) for src in student])
+    nbformat.write(nb, path)
+
+    class KernelRun:
+        # Stands in for a successful nbclient kernel pass
+        def __init__(self, nb, **kwargs):
+            self.nb = nb
+
+        def execute(self):
+            return self.nb
+
+    monkeypatch.setattr(notebook_executor, "NotebookClient", KernelRun)
+    local = notebook_executor.NotebookExecutor()._run_notebook_locally(path)
+
+    snapshot = PreludeSnapshot(template)
+    snapshot.choose_length([snapshot.matching_prefix(student)])
+    assert snapshot.length == 2
+    snapshot.warm()
+
+    def summary(exec_result):
+        ns = exec_result["namespace"]
+        return sorted(k for k in ns if k != "input"), exec_result["errors"], exec_result["success"]
+
+    ok, value = run_in_fork(lambda: snapshot.run_student(student, summary))
+    assert ok
+    names, errors, success = value
+    assert names == sorted(k for k in local["namespace"] if k != "input")
+    # The magic line, the input() warning and the failing call, in order
+    assert [e.splitlines()[0] for e in errors] == [e.splitlines()[0] for e in local["errors"]]
+    assert len(errors) == 3 and success is local["success"] is False
@@ -0,0 +1,71 @@
+import sys
+from pathlib import Path
+
+import nbformat
+import pytest
+
+
+def _setup_paths():
+    repo = Path(__file__).resolve().parents[1]
+    sys.path.insert(0, str(repo))
+    sys.path.insert(0, str(repo / "src"))
+    return repo
+
+
+def _notebook(path, *sources, outputs=False):
+    nb = nbformat.v4.new_notebook()
+    for i, src in enumerate(sources):
+        cell = nbformat.v4.new_code_cell(src)
+        if outputs:
+            cell.execution_count = i + 7
+            cell.outputs = [nbformat.v4.new_output("stream", text="noise")]
+        nb.cells.append(cell)
+    nbformat.write(nb, path)
+    return path
+
+
+def test_identical_code_is_graded_once(tmp_path):
+    _setup_paths()
+    try:
+        from instantgrade.evaluators.python.ingestion.submission_dedup import (
+            fan_out,
+            group_submissions,
+        )
+    except Exception as e:
+        pytest.skip(f"instantgrade import failed: {e}")
+
+    code = "def f(x):\n    return x + 1"
+    a = _notebook(tmp_path / "a.ipynb", "name = 'Ann'\nroll_number = 'R1'", code)
+    # Same code, different identity, formatting, comments and outputs
+    b = _notebook(
+        tmp_path / "b.ipynb",
+        'name = "Ben"\nroll_number = "R2"',
+        "def f(x):  # add one\n    return (x + 1)",
+        outputs=True,
+    )
+    c = _notebook(
+        tmp_path / "c.ipynb", "name = 'Cy'\nroll_number = 'R3'", "def f(x):\n    return x"
+    )
+    # Untouched template never shares results with a personalized notebook
+    d = _notebook(tmp_path / "d.ipynb", "name = 'student name'\nroll_number = 'roll'", code)
+
+    # Identity literals need not be strings
+    e = _notebook(tmp_path / "e.ipynb", "name = 'Eve'\nroll_number = 2423531", code)
+
+    reps, dups = group_submissions([a, b, c, d, e], ("student name", "roll"))
+    assert reps == [a, c, d]
+    assert [fp.path for fp in dups[a]] == [b, e]
+
+    result = {
+        "student_path": a,
+        "execution": {"student_meta": {"name": "Ann", "roll_number": "R1"}, "namespace": {}},
+        "results": [{"question": "f", "score": 1}],
+    }
+    copy_b = fan_out(result, dups[a][0])
+    assert copy_b["student_path"] == b
+    assert copy_b["execution"]["student_meta"] == {"name": "Ben", "roll_number": "R2"}
+    assert copy_b["duplicate_of"] == str(a)
+    assert copy_b["results"] == result["results"]
+    assert copy_b["results"][0] is not result["results"][0]
+    copy_e = fan_out(result, dups[a][1])
+    assert copy_e["execution"]["student_meta"] == {"name": "Eve", "roll_number": "2423531"}
@@ -0,0 +1,89 @@
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+
+def _setup_paths():
+    repo = Path(__file__).resolve().parents[1]
+    sys.path.insert(0, str(repo))
+    sys.path.insert(0, str(repo / "src"))
+    return repo
+
+
+def test_untouched_stubs_are_not_attempted():
+    _setup_paths()
+    try:
+        from instantgrade.evaluators.python.ingestion.template_diff import (
+            grade_attempted,
+            untouched_questions,
+        )
+    except Exception as e:
+        pytest.skip(f"instantgrade import failed: {e}")
+
+    questions = {
+        "add": {
+            "function": "def add(a, b=1):\n    '''Add.'''\n    return a + b",
+            "tests": ["assert add(1, 2) == 3", "assert add(1) == 2"],
+            "description": "Addition",
+        },
+        "neg": {"function": "def neg(x):\n    return -x", "tests": ["assert neg(1) == -1"]},
+        "sq": {"function": "def sq(x):\n    return x * x", "tests": ["assert sq(3) == 9"]},
+    }
+    student = [
+        "name = 'Ann'",
+        "def add(a, b = 1):\n    pass  # TODO",
+        "def neg(x):\n    pass",
+        "def neg(x):\n    return -x",  # redefined later: attempted
+        "def sq(y):\n    pass",  # signature changed: attempted
+    ]
+    assert untouched_questions(student, questions) == {"add"}
+
+    graded = []
+
+    def grade(qs):
+        graded.extend(qs)
+        return [{"question": q, "status": "passed", "score": 1} for q in qs]
+
+    rows = grade_attempted(questions, {"add"}, grade)
+    assert graded == ["neg", "sq"]
+    assert [(r["question"], r["status"], r["score"]) for r in rows] == [
+        ("add", "not attempted", 0),
+        ("add", "not attempted", 0),
+        ("neg", "passed", 1),
+        ("sq", "passed", 1),
+    ]
+    assert rows[0]["description"] == "Addition"
+
+
+def test_docker_grader_only_skips_unattempted_when_asked(tmp_path, monkeypatch):
+    _setup_paths()
+    try:
+        from instantgrade.evaluators.python import execution_service_docker as docker_mod
+    except Exception as e:
+        pytest.skip(f"instantgrade import failed: {e}")
+
+    launched = []
+
+    def fake_popen(cmd, **kwargs):
+        workspace = Path(cmd[cmd.index("-v") + 1].split(":")[0])
+        stubs = workspace / "stubs.json"
+        launched.append((cmd, stubs.read_text() if stubs.exists() else None))
+        raise RuntimeError("docker not started in tests")
+
+    monkeypatch.setattr(docker_mod.subprocess, "Popen", fake_popen)
+    for name in ("student.ipynb", "solution.ipynb"):
+        (tmp_path / name).write_text("{}")
+    stubs = {"add": "FunctionDef(name='add')"}
+    for options in ({}, {"skip_unattempted": True, "template_stubs": stubs}):
+        svc = docker_mod.ExecutionServiceDocker(**options)
+        monkeypatch.setattr(svc, "ensure_docker_image_exists", lambda: None)
+        with pytest.raises(RuntimeError):
+            svc.execute_student(tmp_path / "solution.ipynb", tmp_path / "student.ipynb")
+
+    (default_cmd, default_stubs), (skip_cmd, skip_stubs) = launched
+    assert "SKIP_UNATTEMPTED=1" not in default_cmd and default_stubs is None
+    assert "SKIP_UNATTEMPTED=1" in skip_cmd
+    assert "TEMPLATE_STUBS=/workspace/stubs.json" in skip_cmd
+    assert json.loads(skip_stubs) == stubs